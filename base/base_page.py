@@ -1,7 +1,21 @@
+from collections import namedtuple
+
+from selenium.common.exceptions import StaleElementReferenceException
+
 from base.driver_wrapper import DriverWrapper
 from utilities.custom_logger import create_custom_logger
 from utilities.util_methods import UtilityMethods
 
+# Snapshot of the state of the whole UI (see BasePage.probe_state). block is
+# the name of the main block that is displayed ('population', 'organism', or
+# 'analysis'), visible and texts map element ids to whether they are visible
+# and to their text, dialogs lists the ids of the visible dialogs, dropdowns
+# maps each main menu tab to whether it is expanded, and menu_disabled maps the
+# id of every 'mn*' menu element to whether it is disabled.
+UIState = namedtuple("UIState", ["block", "visible", "texts", "dialogs",
+                                 "dropdowns", "menu_disabled",
+                                 "crash_report"])
+
 
 class BasePage(DriverWrapper):
     """
@@ -80,11 +94,173 @@ class BasePage(DriverWrapper):
     __crash_dlg = "dijit_Dialog_11"
 
     # Locator for items in the Freezer
-    __fz_item_xpath = "//*/div[@class='dojoDndItem']"
+    __fz_item_xpath = "//*/div[contains(concat(' ', normalize-space(@class)," \
+                      " ' '), ' dojoDndItem ')]"
+
+    # Javascript that maps the name of every item in the Freezer to its element.
+    __fz_index_script = """
+        var items = document.evaluate(arguments[0], document, null,
+                                      XPathResult.ORDERED_NODE_SNAPSHOT_TYPE,
+                                      null);
+        var index = {};
+        for (var i = 0; i < items.snapshotLength; i++) {
+            var item = items.snapshotItem(i);
+            var name = (item.innerText || item.textContent || '').trim();
+            if (!(name in index)) {
+                index[name] = item;
+            }
+        }
+        return index;
+    """
 
     # Class name for highlighted items in Freezer
     __fz_highlight_class = "dojoDndItemAnchor"
 
+    # Javascript function that speeds up the page's timers by a scale factor:
+    # setTimeout and setInterval delays are divided by it, animation frames
+    # are scheduled that much more often, and performance.now runs that much
+    # faster. Date.now is left alone, and the real setTimeout is kept in
+    # window.__avedRealSetTimeout, so that the waits' timeouts still use real
+    # time.
+    __time_warp_shim = """
+        function (scale) {
+            if (window.__avedTimeWarp) {
+                return;
+            }
+            var realSetTimeout = window.setTimeout;
+            window.__avedRealSetTimeout = realSetTimeout;
+            var realSetInterval = window.setInterval;
+            var realClearTimeout = window.clearTimeout;
+            var realNow = performance.now.bind(performance);
+            var start = realNow();
+            var warp = function (real) {
+                return function (callback, delay) {
+                    var args = Array.prototype.slice.call(arguments, 2);
+                    return real.apply(window,
+                        [callback, (delay || 0) / scale].concat(args));
+                };
+            };
+            window.setTimeout = warp(realSetTimeout);
+            window.setInterval = warp(realSetInterval);
+            performance.now = function () {
+                return start + (realNow() - start) * scale;
+            };
+            window.requestAnimationFrame = function (callback) {
+                return realSetTimeout(function () {
+                    callback(performance.now());
+                }, 16 / scale);
+            };
+            window.cancelAnimationFrame = function (handle) {
+                realClearTimeout(handle);
+            };
+            window.__avedTimeWarp = {scale: scale};
+        }
+    """
+
+    # Ids of the elements whose visibility and text are recorded by
+    # probe_state. Subclasses add the ids that their own checks read from a
+    # UIState by setting _probe_visible_ids and _probe_text_ids (see
+    # __init_subclass__), so that they can be answered from the same snapshot
+    # whichever page object took it.
+    __probe_blocks = (("population", __population_block),
+                      ("organism", __organism_block),
+                      ("analysis", __analysis_block))
+    __probe_visible_ids = [__population_block, __organism_block,
+                           __analysis_block, __crash_dlg]
+    __probe_text_ids = []
+    __probe_tabs = [__avida_ed_tab, __file_tab, __freezer_tab, __control_tab,
+                    __help_tab]
+
+    # Javascript that reads everything in a UIState. Arguments are the ids to
+    # check the visibility of, the ids to read the text of, the menu tab ids,
+    # and the classes marking expanded tabs and disabled menu items.
+    __probe_script = """
+        var isVisible = """ + DriverWrapper._js_is_visible + """;
+        var expandedClass = arguments[3];
+        var disabledClass = arguments[4];
+        var state = {visible: {}, texts: {}, dropdowns: {},
+                     menu_disabled: {}, dialogs: []};
+        arguments[0].forEach(function (id) {
+            state.visible[id] = isVisible(document.getElementById(id));
+        });
+        arguments[1].forEach(function (id) {
+            var el = document.getElementById(id);
+            state.texts[id] = el === null ? null
+                : (el.innerText || el.textContent || '').trim();
+        });
+        arguments[2].forEach(function (id) {
+            var el = document.getElementById(id);
+            state.dropdowns[id] = el !== null
+                && el.classList.contains(expandedClass);
+        });
+        var items = document.querySelectorAll('[id^="mn"]');
+        for (var i = 0; i < items.length; i++) {
+            state.menu_disabled[items[i].id] =
+                items[i].classList.contains(disabledClass);
+        }
+        var dialogs = document.querySelectorAll('.dijitDialog');
+        for (var j = 0; j < dialogs.length; j++) {
+            if (dialogs[j].id && isVisible(dialogs[j])) {
+                state.dialogs.push(dialogs[j].id);
+            }
+        }
+        return state;
+    """
+
+    # Javascript that performs the action of a main menu option by calling its
+    # dijit widget's onClick, without opening the dropdown. Arguments are the
+    # option's id, the class marking disabled menu items, and the answer to
+    # give any prompt the action raises (null for the prompt's default).
+    # Alerts and prompts are captured rather than shown, since a native dialog
+    # would block the script.
+    __menu_action_script = """
+        var registry = (""" + DriverWrapper._js_dijit_registry + """)();
+        var widget = registry ? registry.byId(arguments[0]) : null;
+        if (!widget || typeof widget.onClick !== 'function') {
+            return {status: 'missing', alerts: [], prompts: []};
+        }
+        if (widget.get('disabled') || (widget.domNode
+                && widget.domNode.classList.contains(arguments[1]))) {
+            return {status: 'disabled', alerts: [], prompts: []};
+        }
+        var answer = arguments[2];
+        var result = {status: 'invoked', alerts: [], prompts: []};
+        var realAlert = window.alert;
+        var realPrompt = window.prompt;
+        window.alert = function (message) {
+            result.alerts.push(String(message));
+        };
+        window.prompt = function (message, value) {
+            result.prompts.push(String(message));
+            return answer === null ? (value === undefined ? '' : value)
+                : answer;
+        };
+        try {
+            widget.onClick({type: 'click', target: widget.domNode,
+                            preventDefault: function () {},
+                            stopPropagation: function () {}});
+        } catch (e) {
+            result.status = 'error';
+            result.error = String(e);
+        } finally {
+            window.alert = realAlert;
+            window.prompt = realPrompt;
+        }
+        return result;
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        # Record the ids that the subclass reads from UIStates.
+        super().__init_subclass__(**kwargs)
+        for probe_ids, added in (
+                (BasePage.__probe_visible_ids,
+                 cls.__dict__.get("_probe_visible_ids", ())),
+                (BasePage.__probe_text_ids,
+                 cls.__dict__.get("_probe_text_ids", ()))):
+            for element_id in added:
+                if element_id not in probe_ids:
+                    probe_ids.append(element_id)
+
     def __init__(self, driver):
         """
         Initializes the BasePage object.
@@ -113,15 +289,67 @@ class BasePage(DriverWrapper):
         :return: None.
         """
         self.refresh_page()
+        self.invalidate_freezer_index()
         self.wait_until_splash_gone()
 
-    def population_displayed(self):
+    def install_time_warp(self, scale=10):
+        """
+        Makes Avida-ED's timers run scale times faster so that experiments
+        advance as fast as Avida can compute updates rather than at the pace
+        the UI requests them. Reloads Avida-ED.
+
+        In Chrome the shim is registered through the DevTools Protocol so that
+        it is in place before the app's scripts load. Otherwise it is injected
+        after the reload, which only affects timers created from then on.
+
+        :param scale: Factor to speed up timers by.
+
+        :return: True if the shim is in effect; False otherwise.
+        """
+        source = "(" + self.__time_warp_shim + ")(" + str(scale) + ");"
+        result = self.execute_cdp_command(
+            "Page.addScriptToEvaluateOnNewDocument", {"source": source})
+        before_load = result is not None
+        self.driver._aved_time_warp = result["identifier"] if before_load \
+            else None
+        self.refresh_avida_ed()
+        if not before_load:
+            self.execute_script(source)
+
+        in_effect = self.execute_script(
+            "return window.__avedTimeWarp ? window.__avedTimeWarp.scale "
+            ": null;") == scale
+        self.log.info("Time warp with scale " + str(scale) + " in effect: "
+                      + str(in_effect) + " (installed before page load: "
+                      + str(before_load) + ").")
+        return in_effect
+
+    def remove_time_warp(self):
+        """
+        Puts Avida-ED's timers back to real time by reloading it without the
+        shim installed by install_time_warp.
+
+        :return: None.
+        """
+        identifier = getattr(self.driver, "_aved_time_warp", None)
+        if identifier is not None:
+            self.execute_cdp_command(
+                "Page.removeScriptToEvaluateOnNewDocument",
+                {"identifier": identifier})
+            self.driver._aved_time_warp = None
+        self.refresh_avida_ed()
+        self.log.info("Removed time warp.")
+
+    def population_displayed(self, state=None):
         """
         Checks if the population pane is currently displayed.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the population pane is displayed, false otherwise. 
         """
-        pop_displayed = self.element_displayed(self.__population_block)
+        pop_displayed = self.__displayed(self.__population_block, state)
         self.log.info("Checked if population window displayed: found to be "
                       + str(pop_displayed) + ".")
         return pop_displayed
@@ -137,13 +365,16 @@ class BasePage(DriverWrapper):
         else:
             self.log.warning("Failed to navigate to population window.")
 
-    def organism_displayed(self):
+    def organism_displayed(self, state=None):
         """
         Checks if the organism pane is currently displayed.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the organism pane is displayed, false otherwise.
         """
-        org_displayed = self.element_displayed(self.__organism_block)
+        org_displayed = self.__displayed(self.__organism_block, state)
         self.log.info("Checked if organism window displayed: found to be "
                       + str(org_displayed) + ".")
 
@@ -160,13 +391,16 @@ class BasePage(DriverWrapper):
         else:
             self.log.warning("Failed to navigate to organism window.")
 
-    def analysis_displayed(self):
+    def analysis_displayed(self, state=None):
         """
         Checks if the analysis pane is currently displayed.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the analysis pane is displayed, false otherwise. 
         """
-        ana_displayed = self.element_displayed(self.__analysis_block)
+        ana_displayed = self.__displayed(self.__analysis_block, state)
         self.log.info("Checked if analysis window displayed: found to be "
                       + str(ana_displayed) + ".")
         return ana_displayed
@@ -182,14 +416,78 @@ class BasePage(DriverWrapper):
         else:
             self.log.warning("Failed to navigate to analysis window.")
 
-    def crash_report_displayed(self):
+    def crash_report_displayed(self, state=None):
         """
         Checks if the crash report dialog box is displayed.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the dialog is displayed, False otherwise.
         """
+        if state is not None:
+            return state.crash_report
         return self.element_displayed(self.__crash_dlg)
 
+    def probe_state(self):
+        """
+        Takes a snapshot of the state of the whole UI in a single Javascript
+        call: which main block is displayed, which panels and dialogs are open,
+        which menu tabs are expanded, which menu items are disabled, the text
+        of the elements that page objects read it from, and whether the crash
+        report is displayed.
+
+        The result can be passed to the checks on BasePage and PopulationPage
+        (via their state param) so that checking many things costs one round
+        trip.
+
+        :return: A UIState holding the snapshot, or None if it could not be
+        taken.
+        """
+        values = self.execute_script(self.__probe_script,
+                                     self.__probe_visible_ids,
+                                     self.__probe_text_ids,
+                                     self.__probe_tabs,
+                                     self.__item_selected,
+                                     self.__dijit_item_disabled,
+                                     mutating=False)
+        if values is None:
+            self.log.warning("Failed to probe UI state.")
+            return None
+        visible = values["visible"]
+        block = next((name for name, block_id in self.__probe_blocks
+                      if visible.get(block_id)), None)
+        state = UIState(block, visible, values["texts"], values["dialogs"],
+                        values["dropdowns"], values["menu_disabled"],
+                        visible.get(self.__crash_dlg, False))
+        self.log.info("Probed UI state: " + str(state))
+        return state
+
+    def invalidate_freezer_index(self):
+        """
+        Throws away the cached index of Freezer items so that it is rebuilt on
+        the next lookup. Should be called after anything that adds, removes, or
+        renames items in the Freezer.
+
+        The index is stored on the driver so that it is shared by every page
+        object using that driver.
+
+        :return: None.
+        """
+        self.driver._aved_freezer_index = None
+        self.log.info("Invalidated Freezer index.")
+
+    def get_freezer_item_names(self):
+        """
+        Gets the names of all items currently in the Freezer. The Freezer index
+        is rebuilt to make sure that the names are up to date.
+
+        :return: Sorted list of the names of the Freezer items.
+        """
+        names = sorted(self.__get_freezer_index(rebuild=True).keys())
+        self.log.info("Freezer items: " + str(names))
+        return names
+
     def freezer_item_highlighted(self, text_name):
         """
         Checks to see if there are any highlighted Freezer items with text
@@ -199,13 +497,13 @@ class BasePage(DriverWrapper):
 
         :return: True if the item exists and is highlighted, False otherwise.
         """
-        item = self.__get_freezer_item(text_name)
-
-        highlighted = False
-        if item is not None:
-            highlighted = self.element_has_class(
+        highlighted = self.__with_freezer_item(
+            text_name,
+            lambda item: self.element_has_class(
                 class_name=self.__fz_highlight_class,
-                element=item)
+                element=item))
+        if highlighted is None:
+            highlighted = False
 
         self.log.info("Is freezer item with name " + text_name
                       + " highlighted? " + str(highlighted))
@@ -219,22 +517,45 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        item = self.__get_freezer_item(text_name)
-        if item is not None:
-            self.click_element(element=item)
+        if self.__with_freezer_item(text_name, self.__click_item):
             self.log.info("Clicked on freezer item with name " + text_name)
         else:
             self.log.warning("Failed to click on any freezer item with name "
                              + text_name)
 
-    def avida_ed_dropdown_expanded(self):
+    def use_real_menu_clicks(self, real=True):
+        """
+        Sets how options in the File, Freezer, and Control tabs of the main
+        menu bar are used. By default, real clicks open the dropdown and click
+        on the option like a user would. The faster direct path instead
+        performs the option's action in a single Javascript call through its
+        dijit widget (after checking that the option is enabled), without
+        opening the dropdown, and captures any alerts and prompts it raises.
+
+        The setting is shared by all page objects using the same driver.
+
+        :param real: True if real clicks should be used, False for the faster
+        direct path.
+
+        :return: The previous setting.
+        """
+        previous = getattr(self.driver, "_aved_real_menu_clicks", True)
+        self.driver._aved_real_menu_clicks = real
+        self.log.info("Using real menu clicks? " + str(real))
+        return previous
+
+    def avida_ed_dropdown_expanded(self, state=None):
         """
         Determines whether the "Avida-ED" dropdown at the top of the page is
         expanded.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the dropdown is expanded, false otherwise.
         """
-        expanded = self.__menu_dropdown_expanded(self.__avida_ed_tab)
+        expanded = self.__menu_dropdown_expanded(self.__avida_ed_tab,
+                                                 state=state)
         self.log.info("Is Avida-ED dropdown expanded? " + str(expanded))
         return expanded
 
@@ -297,14 +618,18 @@ class BasePage(DriverWrapper):
             else:
                 self.log.warning("Failed to close 'About' dialog box in Avida-ED tab.")
 
-    def file_dropdown_expanded(self):
+    def file_dropdown_expanded(self, state=None):
         """
         Determines whether the "File" dropdown at the top of the website has
         been expanded.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the dropdown is expanded, false otherwise.
         """
-        expanded = self.__menu_dropdown_expanded(self.__file_tab)
+        expanded = self.__menu_dropdown_expanded(self.__file_tab,
+                                                 state=state)
         self.log.info("Is File dropdown expanded? " + str(expanded))
         return expanded
 
@@ -339,8 +664,7 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_file_dropdown()
-        self.click_element(self.__file_save_workspace)
+        self.__menu_action(self.__file_save_workspace, self.open_file_dropdown)
         self.log.info("Click on 'Save Current Workspace' in File tab.")
 
     def save_current_workspace_as(self, workspace_name):
@@ -354,9 +678,12 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_file_dropdown()
-        self.click_element(self.__file_save_workspace_as)
+        action = self.__menu_action(self.__file_save_workspace_as,
+                                    self.open_file_dropdown,
+                                    answer=workspace_name)
         self.log.info("Clicked on 'Save Current Workspace As' in File tab.")
+        if action["status"] != "clicked":
+            return
 
         try:
             workspace_name_alert = self.switch_to_alert()
@@ -375,6 +702,7 @@ class BasePage(DriverWrapper):
         """
         self.open_file_dropdown()
         self.click_element(self.__file_open_def_workspace)
+        self.invalidate_freezer_index()
         self.log.info("Clicked on 'Open Default Workspace' in File tab.")
 
     def open_workspace(self, workspace_path):
@@ -393,6 +721,7 @@ class BasePage(DriverWrapper):
         """
         self.open_file_dropdown()
         self.click_element(self.__file_open_workspace)
+        self.invalidate_freezer_index()
         self.log.info("Click on 'Open Workspace' in File tab.")
 
     def import_freezer_item(self, freezer_item_path):
@@ -411,6 +740,7 @@ class BasePage(DriverWrapper):
         """
         self.open_file_dropdown()
         self.click_element(self.__file_import_freezer_item)
+        self.invalidate_freezer_index()
         self.log.info("Clicked on 'Import Freezer Item' in File tab.")
 
     def export_data(self):
@@ -424,8 +754,7 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_file_dropdown()
-        self.click_element(self.__file_export_data)
+        self.__menu_action(self.__file_export_data, self.open_file_dropdown)
         self.log.info("Clicked on 'Export Data' in the File tab.")
 
     def export_graphics(self):
@@ -438,8 +767,8 @@ class BasePage(DriverWrapper):
         :return: None.
         """
         if not self.export_graphics_dialog_displayed():
-            self.open_file_dropdown()
-            self.click_element(self.__file_export_graph)
+            self.__menu_action(self.__file_export_graph,
+                               self.open_file_dropdown)
             if self.wait_until_visible(self.__file_export_graph_dlg):
                 self.log.info("Clicked on 'Export Graphics' in File tab.")
             else:
@@ -475,14 +804,18 @@ class BasePage(DriverWrapper):
             # Closing the dialog takes some time, so we will wait a bit.
             self.util.sleep(1)
 
-    def freezer_dropdown_expanded(self):
+    def freezer_dropdown_expanded(self, state=None):
         """
         Determines whether the "Freezer" dropdown menu at the top of the page is
         expanded.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the dropdown is expanded, False otherwise.
         """
-        expanded = self.__menu_dropdown_expanded(self.__freezer_tab)
+        expanded = self.__menu_dropdown_expanded(self.__freezer_tab,
+                                                 state=state)
         self.log.info("Is Freezer dropdown expanded? " + str(expanded))
         return expanded
 
@@ -516,29 +849,37 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_freezer_dropdown()
-        self.click_element(self.__fz_save_exp_conf)
+        action = self.__menu_action(self.__fz_save_exp_conf,
+                                    self.open_freezer_dropdown, answer=name)
         self.log.info("Clicked 'Save Experiment Configuration' button in"
                       " Freezer tab.")
+        if action["status"] != "clicked":
+            self.invalidate_freezer_index()
+            return
         try:
             name_exp_conf_alert = self.switch_to_alert()
             if name is not None:
                 name_exp_conf_alert.send_keys(name)
             name_exp_conf_alert.accept()
+            self.invalidate_freezer_index()
             self.log.info("Successfully named our saved experiment "
                           " configuration '" + name + "'.")
         except Exception:
             self.log.info("Error occurred while interacting with 'Save"
                           " Experiment Configuration' JS alert.")
 
-    def can_save_current_pop(self):
+    def can_save_current_pop(self, state=None):
         """
         Determines whether the option to "Save Current Population" within the
         Freezer tab of the main menu bar is clickable or grayed out.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the option is clickable, False otherwise.
         """
-        clickable = not self.__menu_item_disabled(self.__fz_save_pop)
+        clickable = not self.__menu_item_disabled(self.__fz_save_pop,
+                                                  state=state)
         self.log.info("Is 'Save Current Population' clickable? "
                       + str(clickable))
         return clickable
@@ -555,11 +896,15 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_freezer_dropdown()
-        if self.can_save_current_pop():
-            self.click_element(self.__fz_save_pop)
+        action = self.__menu_action(self.__fz_save_pop,
+                                    self.open_freezer_dropdown,
+                                    self.can_save_current_pop, answer=name)
+        if action["status"] in ("invoked", "clicked"):
             self.log.info("Successfully clicked on 'Save Current Population'"
                           " button in Freezer tab.")
+            if action["status"] == "invoked":
+                self.invalidate_freezer_index()
+                return
             name_popup = self.switch_to_alert()
             if name is not None:
                 name_popup.send_keys(name)
@@ -568,19 +913,28 @@ class BasePage(DriverWrapper):
             else:
                 self.log.info("Saving current population with default name.")
             name_popup.accept()
-
+            self.invalidate_freezer_index()
+        elif action["status"] == "error":
+            # The handler may have failed after changing the Freezer.
+            self.invalidate_freezer_index()
+            self.log.warning("Using 'Save Current Population' raised an error"
+                             " in Freezer tab.")
         else:
             self.log.info("Failed to click on 'Save Current Population' button"
                           " button in Freezer tab.")
 
-    def can_save_selected_org(self):
+    def can_save_selected_org(self, state=None):
         """
         Determines whether the option to "Save Selected Organism" within the
         Freezer tab of the main menu bar is clickable or grayed out.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the option is clickable, False otherwise.
         """
-        clickable = not self.__menu_item_disabled(self.__fz_save_org)
+        clickable = not self.__menu_item_disabled(self.__fz_save_org,
+                                                  state=state)
         self.log.info("Is 'Save Selected Organism' clickable? "
                       + str(clickable))
         return clickable
@@ -596,12 +950,15 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_freezer_dropdown()
-        if self.can_save_selected_org():
-            self.click_element(self.__fz_save_org)
+        action = self.__menu_action(self.__fz_save_org,
+                                    self.open_freezer_dropdown,
+                                    self.can_save_selected_org, answer=name)
+        if action["status"] in ("invoked", "clicked"):
             self.log.info("Successfully clicked on 'Save Selected Organism' in"
                           " Freezer tab.")
-
+            if action["status"] == "invoked":
+                self.invalidate_freezer_index()
+                return
             name_popup = self.switch_to_alert()
             if name is not None:
                 name_popup.send_keys(name)
@@ -609,19 +966,28 @@ class BasePage(DriverWrapper):
             else:
                 self.log.info("Saving selected organism with default name.")
             name_popup.accept()
-
+            self.invalidate_freezer_index()
+        elif action["status"] == "error":
+            # The handler may have failed after changing the Freezer.
+            self.invalidate_freezer_index()
+            self.log.warning("Using 'Save Selected Organism' raised an error"
+                             " in Freezer tab.")
         else:
             self.log.info("Failed to click on 'Save Selected Organism' in"
                           " Freezer tab.")
 
-    def can_save_offspring_org(self):
+    def can_save_offspring_org(self, state=None):
         """
         Determines whether the "Save Offspring Organism" option in the Freezer
         tab of the main menu bar is clickable or grayed out.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the option is clickable, False otherwise.
         """
-        clickable = not self.__menu_item_disabled(self.__fz_save_offspring)
+        clickable = not self.__menu_item_disabled(self.__fz_save_offspring,
+                                                  state=state)
         self.log.info("Can click on 'Save Offspring Organism'? "
                       + str(clickable))
         return clickable
@@ -637,12 +1003,15 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_freezer_dropdown()
-        if self.can_save_offspring_org():
-            self.click_element(self.__fz_save_offspring)
+        action = self.__menu_action(self.__fz_save_offspring,
+                                    self.open_freezer_dropdown,
+                                    self.can_save_offspring_org, answer=name)
+        if action["status"] in ("invoked", "clicked"):
             self.log.info("Successfully clicked on 'Save Offspring Organism'"
                           " button in Freezer tab.")
-
+            if action["status"] == "invoked":
+                self.invalidate_freezer_index()
+                return
             name_popup = self.switch_to_alert()
             if name is not None:
                 name_popup.send_keys(name)
@@ -651,7 +1020,12 @@ class BasePage(DriverWrapper):
             else:
                 self.log.info("Saving offspring organism with default name.")
             name_popup.accept()
-
+            self.invalidate_freezer_index()
+        elif action["status"] == "error":
+            # The handler may have failed after changing the Freezer.
+            self.invalidate_freezer_index()
+            self.log.warning("Using 'Save Offspring Organism' raised an error"
+                             " in Freezer tab.")
         else:
             self.log.info("Failed to click on 'Save Offspring Organism' button"
                           " in Freezer tab.")
@@ -665,8 +1039,7 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_freezer_dropdown()
-        self.click_element(self.__fz_add_conf_dish)
+        self.__menu_action(self.__fz_add_conf_dish, self.open_freezer_dropdown)
         self.log.info("Clicked on 'Add Highlighted Configured Dish to"
                       " Experiment' button in Freezer tab.")
 
@@ -677,10 +1050,16 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_freezer_dropdown()
-        self.click_element(self.__fz_add_org)
+        action = self.__menu_action(self.__fz_add_org,
+                                    self.open_freezer_dropdown)
         self.log.info("Clicked on 'Add Highlighted Organism to Experiment'"
                       " button in Freezer tab.")
+        if action["status"] != "clicked":
+            if action["alerts"]:
+                self.log.warning("Alert appeared after trying to add org to"
+                                 " experiment -- no organism was highlighted.")
+                return False
+            return action["status"] == "invoked"
 
         # Check for alerts
         alert = self.switch_to_alert()
@@ -697,8 +1076,7 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_freezer_dropdown()
-        self.click_element(self.__fz_add_pop_dish)
+        self.__menu_action(self.__fz_add_pop_dish, self.open_freezer_dropdown)
         self.log.info("Clicked on 'Add Highlighted Populated Dish to"
                       " Experiment' button in Freezer tab.")
 
@@ -712,8 +1090,8 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_freezer_dropdown()
-        self.click_element(self.__fz_bring_org_to_org_view)
+        self.__menu_action(self.__fz_bring_org_to_org_view,
+                           self.open_freezer_dropdown)
         self.log.info("Clicked on the 'Put Highlighted Organism in Organism"
                       " View' button in Freezer tab.")
 
@@ -723,19 +1101,23 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_freezer_dropdown()
-        self.click_element(self.__fz_bring_dish_to_ana_view)
+        self.__menu_action(self.__fz_bring_dish_to_ana_view,
+                           self.open_freezer_dropdown)
         self.log.info("Clicked on the 'Put Highlighted Populated Dish in"
                       " Analysis View' button in Freezer tab.")
 
-    def control_dropdown_expanded(self):
+    def control_dropdown_expanded(self, state=None):
         """
         Determines whether the "Control" dropdown within the menu bar is
         expanded.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the dropdown is expanded, false otherwise.
         """
-        expanded = self.__menu_dropdown_expanded(self.__control_tab)
+        expanded = self.__menu_dropdown_expanded(self.__control_tab,
+                                                 state=state)
         self.log.info("Is Control dropdown expanded? " + str(expanded))
         return expanded
 
@@ -759,14 +1141,18 @@ class BasePage(DriverWrapper):
             self.__click_control_dropdown()
             self.log.info("Closing 'Control' dropdown menu.")
 
-    def can_run_from_menu(self):
+    def can_run_from_menu(self, state=None):
         """
         Determines whether the "Run" option in the Control tab of the main menu
         bar is clickable or grayed out.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the option is clickable, false otherwise.
         """
-        clickable = not self.__menu_item_disabled(self.__cn_run)
+        clickable = not self.__menu_item_disabled(self.__cn_run,
+                                                  state=state)
         self.log.info("Is 'Run' clicakble? " + str(clickable))
         return clickable
 
@@ -779,21 +1165,26 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_control_dropdown()
-        if self.can_run_from_menu():
-            self.click_element(self.__cn_run)
+        action = self.__menu_action(self.__cn_run,
+                                    self.open_control_dropdown,
+                                    self.can_run_from_menu)
+        if action["status"] in ("invoked", "clicked"):
             self.log.info("Successfully clicked on 'Run' in Control tab.")
         else:
             self.log.warning("Attempt to use 'Run' in Control tab failed.")
 
-    def can_pause_from_menu(self):
+    def can_pause_from_menu(self, state=None):
         """
         Determines whether the "Pause" option in the Control tab of the main
         menu is clickable or grayed out.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the option is clickable, False otherwise.
         """
-        clickable = not self.__menu_item_disabled(self.__cn_pause)
+        clickable = not self.__menu_item_disabled(self.__cn_pause,
+                                                  state=state)
         self.log.info("Is 'Pause' clickable? " + str(clickable))
         return clickable
 
@@ -804,9 +1195,10 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_control_dropdown()
-        if self.can_pause_from_menu():
-            self.click_element(self.__cn_pause)
+        action = self.__menu_action(self.__cn_pause,
+                                    self.open_control_dropdown,
+                                    self.can_pause_from_menu)
+        if action["status"] in ("invoked", "clicked"):
             self.log.info("Successfully clicked on 'Pause' in Control tab via"
                           "the menu bar.")
         else:
@@ -821,8 +1213,7 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_control_dropdown()
-        self.click_element(self.__cn_one_update)
+        self.__menu_action(self.__cn_one_update, self.open_control_dropdown)
         self.log.info("Clicked on 'Forward' in Control tab via the menu bar.")
 
     def start_new_exp_from_menu(self):
@@ -837,18 +1228,21 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_control_dropdown()
-        self.click_element(self.__cn_new_exp)
+        self.__menu_action(self.__cn_new_exp, self.open_control_dropdown)
         self.log.info("Clicked on 'Start New Experiment' in Control tab.")
 
-    def can_bring_to_org_window(self):
+    def can_bring_to_org_window(self, state=None):
         """
         Determines whether the "Put Selected Organism in Organism View" option
         in the Control tab of the main menu bar is clickable or grayed out.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the option is clickable, false otherwise.
         """
-        clickable = not self.__menu_item_disabled(self.__cn_bring_to_org)
+        clickable = not self.__menu_item_disabled(self.__cn_bring_to_org,
+                                                  state=state)
         self.log.info("Is 'Put Selected Organism in Organism View' clickable? "
                       + str(clickable))
         return clickable
@@ -860,22 +1254,26 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_control_dropdown()
-        if self.can_bring_to_org_window():
-            self.click_element(self.__cn_bring_to_org)
+        action = self.__menu_action(self.__cn_bring_to_org,
+                                    self.open_control_dropdown,
+                                    self.can_bring_to_org_window)
+        if action["status"] in ("invoked", "clicked"):
             self.log.info("Successfully used on 'Put Highlighted Organism in Organism View' button.")
         else:
             self.log.info("Tried but failed to use 'Put Highlighted Organism in Organism View' menu option.")
 
-    def can_bring_child_to_org_window(self):
+    def can_bring_child_to_org_window(self, state=None):
         """
         Determines whether the "Put Offspring in Organism View" option in the
         Control tab of the main menu bar is clickable or grayed out.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the option is clickable, false otherwise.
         """
         clickable = not self.__menu_item_disabled(
-            self.__cn_bring_offspring_to_org)
+            self.__cn_bring_offspring_to_org, state=state)
 
         self.log.info("Is 'Put Offspring in Organism View' button clickable? "
                       + str(clickable))
@@ -888,21 +1286,26 @@ class BasePage(DriverWrapper):
 
         :return: None.
         """
-        self.open_control_dropdown()
-        if self.can_bring_child_to_org_window():
-            self.click_element(self.__cn_bring_offspring_to_org)
+        action = self.__menu_action(self.__cn_bring_offspring_to_org,
+                                    self.open_control_dropdown,
+                                    self.can_bring_child_to_org_window)
+        if action["status"] in ("invoked", "clicked"):
             self.log.info("Successfully used Put Offspring in Organism View menu option.")
         else:
             self.log.info("Attempt to use 'Put Organism in Offspring View' menu option failed.")
 
-    def help_dropdown_expanded(self):
+    def help_dropdown_expanded(self, state=None):
         """
         Determines whether the "Help" dropdown in the main menu bar on the site
         is expanded.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
         :return: True if the dropdown is expanded, False otherwise.
         """
-        expanded = self.__menu_dropdown_expanded(self.__help_tab)
+        expanded = self.__menu_dropdown_expanded(self.__help_tab,
+                                                 state=state)
         self.log.info("Is Help menu dropdown expanded? " + str(expanded) + ".")
         return expanded
 
@@ -950,7 +1353,23 @@ class BasePage(DriverWrapper):
     # Methods below this point shouldn't be called outside this class.
     ############################################################################
 
-    def __menu_dropdown_expanded(self, my_locator, locator_type="id"):
+    def __displayed(self, element_id, state=None):
+        """
+        Determines whether an element is displayed.
+
+        :param element_id: Id of the element.
+
+        :param state: Optional UIState to read the value from instead of
+        querying the page.
+
+        :return: True if the element is displayed, False otherwise.
+        """
+        if state is not None:
+            return state.visible.get(element_id, False)
+        return self.element_displayed(element_id)
+
+    def __menu_dropdown_expanded(self, my_locator, locator_type="id",
+                                 state=None):
         """
         Determines whether the dropdown on a menu option is currently displayed.
 
@@ -959,17 +1378,23 @@ class BasePage(DriverWrapper):
         :param locator_type: Type of locator that my_locator is; could be an ID,
         CSS selector, etc.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page (my_locator must then be an id).
+
         :return: True if the dropdown is expanded, false otherwise.
         """
-        expanded = self.element_has_class(my_locator, locator_type,
-                                          self.__item_selected)
+        if state is not None:
+            expanded = state.dropdowns.get(my_locator, False)
+        else:
+            expanded = self.element_has_class(my_locator, locator_type,
+                                              self.__item_selected)
         self.log.info("Is dropdown menu with locator " + my_locator
                       + " of type " + locator_type + "expanded? "
                       + str(expanded) + ".")
 
         return expanded
 
-    def __menu_item_disabled(self, my_locator, locator_type="id"):
+    def __menu_item_disabled(self, my_locator, locator_type="id", state=None):
         """
         Determines if a menu option in the main menu bar is disabled.
 
@@ -978,42 +1403,156 @@ class BasePage(DriverWrapper):
         :param locator_type: Type of locator that my_locator is; could be ID,
         CSS Selector, etc.
 
+        :param state: Optional UIState to read the value from instead of
+        querying the page (my_locator must then be an id).
+
         :return: True if the menu item is disabled, False otherwise.
         """
-        disabled = self.element_has_class(my_locator,
-                                          locator_type,
-                                          self.__dijit_item_disabled)
+        if state is not None:
+            disabled = state.menu_disabled.get(my_locator, False)
+        else:
+            disabled = self.element_has_class(my_locator,
+                                              locator_type,
+                                              self.__dijit_item_disabled)
         self.log.info("Is menu item with locator " + my_locator + " of type "
                       + locator_type + " disabled? " + str(disabled))
         return disabled
 
-    def __get_freezer_item(self, text_name):
+    def __menu_action(self, item_id, open_dropdown, can_click=None,
+                      answer=None):
+        """
+        Performs the action of an option in the main menu bar, either by
+        opening the dropdown and clicking on the option or, if the direct path
+        is being used (see use_real_menu_clicks) and the widget can be found,
+        directly through its dijit widget.
+
+        :param item_id: Id of the menu option.
+
+        :param open_dropdown: Method that opens the dropdown holding the option.
+
+        :param can_click: Optional method that determines whether the option
+        is clickable before it is really clicked. The direct path always checks
+        in-page that the option is enabled.
+
+        :param answer: Text to answer a prompt raised by the option with on the
+        direct path, or None to accept the prompt's default value.
+
+        :return: Dict with the keys 'status' ('invoked' for the direct path,
+        'clicked' for a real click, 'disabled', or 'error' if the option's
+        handler raised an error), 'alerts' (messages of alerts captured on the
+        direct path), and 'prompts' (messages of prompts answered on the direct
+        path). Alerts and prompts raised by a real click are left open.
+        """
+        if not getattr(self.driver, "_aved_real_menu_clicks", True):
+            action = self.execute_script(self.__menu_action_script, item_id,
+                                         self.__dijit_item_disabled, answer)
+            if action is not None and action["status"] != "missing":
+                if action["status"] == "error":
+                    self.log.warning("Menu item " + item_id + " raised an"
+                                     " error: " + str(action.get("error")))
+                self.log.info("Used menu item " + item_id + " directly: "
+                              + action["status"] + ".")
+                return action
+            self.log.info("No widget found for menu item " + item_id
+                          + " -- clicking on it instead.")
+
+        open_dropdown()
+        if can_click is not None and not can_click():
+            return {"status": "disabled", "alerts": [], "prompts": []}
+        self.click_element(item_id)
+        return {"status": "clicked", "alerts": [], "prompts": []}
+
+    def __get_freezer_index(self, rebuild=False):
+        """
+        Gets the cached index of Freezer items, building it with a single
+        Javascript call if there is none (or if rebuild is True).
+
+        :param rebuild: True if the index should be rebuilt even if it is
+        cached.
+
+        :return: Dict mapping the name of each Freezer item to its WebElement.
+        """
+        index = getattr(self.driver, "_aved_freezer_index", None)
+        if index is None or rebuild:
+            index = self.execute_script(self.__fz_index_script,
+                                        self.__fz_item_xpath, mutating=False)
+            if index is None:
+                index = {}
+            self.driver._aved_freezer_index = index
+            self.log.info("Built Freezer index with " + str(len(index))
+                          + " items.")
+        return index
+
+    def __get_freezer_item(self, text_name, rebuild=False):
         """
         Finds and returns a WebElement in the Freezer with matching text_name.
 
+        The lookup uses the cached Freezer index, which is rebuilt once if the
+        name is not in it (in case the Freezer changed without the index being
+        invalidated).
+
         :param text_name: The text title of the item (e.g. @ancestor).
 
+        :param rebuild: True if the index should be rebuilt before the lookup.
+
         :return: The first WebElement with matching name (or None if no match
         found).
         """
         self.log.info("Attempting to find freezer item with name "
                       + text_name + ".")
 
-        freezer_items = self.get_element_list(
-            self.__fz_item_xpath,
-            "xpath"
-        )
+        index = self.__get_freezer_index(rebuild)
+        if text_name not in index and not rebuild:
+            index = self.__get_freezer_index(rebuild=True)
 
-        found = False
-
-        for item in freezer_items:
-            if self.get_text(element=item) == text_name:
-                self.log.info("Freezer item found.")
-                found = True
-                return item
-        if not found:
+        item = index.get(text_name)
+        if item is not None:
+            self.log.info("Freezer item found.")
+        else:
             self.log.info("Freezer item not found.")
-        return None
+        return item
+
+    def __with_freezer_item(self, text_name, action):
+        """
+        Looks up a Freezer item and performs an action on it. If the cached
+        element turns out to be stale, the index is rebuilt and the action is
+        tried once more.
+
+        :param text_name: The text title of the item (e.g. @ancestor).
+
+        :param action: Function that takes the item's WebElement.
+
+        :return: The value returned by action, or None if no item was found.
+        """
+        item = self.__get_freezer_item(text_name)
+        if item is None:
+            return None
+        try:
+            return action(item)
+        except StaleElementReferenceException:
+            self.log.info("Freezer index was stale -- rebuilding it.")
+            item = self.__get_freezer_item(text_name, rebuild=True)
+            if item is None:
+                return None
+            return action(item)
+
+    def __click_item(self, item):
+        """
+        Clicks on an element, letting a StaleElementReferenceException through
+        so that the caller can look the element up again.
+
+        :param item: The WebElement to click.
+
+        :return: True if the element was clicked, False otherwise.
+        """
+        try:
+            item.click()
+        except StaleElementReferenceException:
+            raise
+        except Exception:
+            self.log.info("Failed to click on freezer item.")
+            return False
+        return True
 
     def __click_avida_ed_dropdown(self):
         """
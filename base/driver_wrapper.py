@@ -1,13 +1,16 @@
 import time
 import os
 import logging
+import uuid
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
 
+from base.page_macro import MacroResult, MacroStepResult
 from utilities.custom_logger import create_custom_logger
+from utilities.action_timer import timer, instrument_class
 
 
 class DriverWrapper:
@@ -19,9 +22,419 @@ class DriverWrapper:
     """
     log = create_custom_logger(logging.DEBUG)
 
+    # Javascript used by wait_for_condition. Arguments are the predicate body,
+    # the timeout and the polling interval (both in ms).
+    __wait_script = """
+        var done = arguments[arguments.length - 1];
+        var check = new Function(arguments[0]);
+        var timeout = arguments[1];
+        var interval = arguments[2];
+        var state = {};
+        var start = Date.now();
+        new Promise(function (resolve) {
+            (function poll() {
+                var satisfied = false;
+                try {
+                    satisfied = !!check.call(state);
+                } catch (e) {
+                    satisfied = false;
+                }
+                var elapsed = Date.now() - start;
+                if (satisfied || elapsed >= timeout) {
+                    resolve({satisfied: satisfied, elapsed: elapsed});
+                } else {
+                    setTimeout(poll, interval);
+                }
+            })();
+        }).then(done);
+    """
+
+    # Javascript function that determines whether an element is visible in
+    # roughly the same way that Selenium does. Shared with subclasses so that
+    # their injected scripts agree with the waits below.
+    _js_is_visible = """
+        function (el) {
+            if (el === null) {
+                return false;
+            }
+            var style = window.getComputedStyle(el);
+            return !!(el.offsetWidth || el.offsetHeight
+                      || el.getClientRects().length)
+                && style.visibility !== 'hidden' && style.opacity !== '0';
+        }
+    """
+
+    # Javascript function that returns the dijit widget registry (or null if
+    # it has not been loaded). Shared with subclasses for injected scripts that
+    # drive dijit widgets directly.
+    _js_dijit_registry = """
+        function () {
+            try {
+                if (window.require) {
+                    return require('dijit/registry');
+                }
+            } catch (e) {
+                // Fall through to the legacy global.
+            }
+            return (window.dijit && window.dijit.registry) || null;
+        }
+    """
+
+    # Javascript function that finds the first element matching a locator of
+    # the given type (id, name, xpath, css, class, or link), or null.
+    __js_find = """
+        function (locator, type) {
+            switch (type) {
+                case 'id':
+                    return document.getElementById(locator);
+                case 'name':
+                    return document.getElementsByName(locator)[0] || null;
+                case 'xpath':
+                    return document.evaluate(
+                        locator, document, null,
+                        XPathResult.FIRST_ORDERED_NODE_TYPE,
+                        null).singleNodeValue;
+                case 'css':
+                    return document.querySelector(locator);
+                case 'class':
+                    return document.getElementsByClassName(locator)[0]
+                        || null;
+                case 'link':
+                    for (var i = 0; i < document.links.length; i++) {
+                        if (document.links[i].textContent.trim() === locator) {
+                            return document.links[i];
+                        }
+                    }
+                    return null;
+            }
+            return null;
+        }
+    """
+
+    # Javascript function that reads a value from an element (see read_many
+    # for what can be read).
+    __js_read_value = """
+        function (el, what, isVisible) {
+            if (what === 'displayed') {
+                return isVisible(el);
+            }
+            if (el === null) {
+                return null;
+            }
+            if (what === 'text') {
+                return (el.innerText || '').trim();
+            } else if (what.indexOf('attribute:') === 0) {
+                return el.getAttribute(what.slice(10));
+            } else if (what.indexOf('property:') === 0) {
+                return el[what.slice(9)];
+            }
+            return null;
+        }
+    """
+
+    # Javascript that installs (once per page load) a MutationObserver that
+    # tracks the state of watched elements in window.__avedWatch. State
+    # transitions are buffered in a queue that can be drained from Python, and
+    # waiters are resolved as soon as a transition satisfies them.
+    __watch_install_script = """
+        var w = window.__avedWatch;
+        if (!w) {
+            w = window.__avedWatch = {ids: {}, states: {}, queue: [],
+                                      waiters: [], limit: 1000};
+            w.isVisible = """ + _js_is_visible + """;
+            w.read = function (id) {
+                var el = document.getElementById(id);
+                if (el === null) {
+                    return {present: false, visible: false, enabled: false,
+                            cls: null};
+                }
+                return {present: true, visible: w.isVisible(el),
+                        enabled: !el.hasAttribute('disabled') && !el.disabled,
+                        cls: el.className};
+            };
+            w.matches = function (state, want) {
+                switch (want) {
+                    case 'visible': return state.visible;
+                    case 'invisible': return !state.visible;
+                    case 'enabled': return state.present && state.enabled;
+                    case 'disabled': return state.present && !state.enabled;
+                    case 'present': return state.present;
+                    case 'absent': return !state.present;
+                }
+                return false;
+            };
+            w.scan = function () {
+                var now = Date.now();
+                Object.keys(w.ids).forEach(function (id) {
+                    var prev = w.states[id];
+                    var next = w.read(id);
+                    if (prev.present !== next.present
+                            || prev.visible !== next.visible
+                            || prev.enabled !== next.enabled
+                            || prev.cls !== next.cls) {
+                        w.states[id] = next;
+                        w.queue.push({id: id, time: now,
+                                      present: next.present,
+                                      visible: next.visible,
+                                      enabled: next.enabled,
+                                      cls: next.cls});
+                        if (w.queue.length > w.limit) {
+                            w.queue.shift();
+                        }
+                    }
+                });
+                w.waiters = w.waiters.filter(function (waiter) {
+                    return !waiter();
+                });
+            };
+            w.watch = function (ids) {
+                ids.forEach(function (id) {
+                    if (!w.ids[id]) {
+                        w.ids[id] = true;
+                        w.states[id] = w.read(id);
+                    }
+                });
+            };
+            w.observer = new MutationObserver(w.scan);
+            w.observer.observe(document.documentElement, {
+                attributes: true, childList: true, subtree: true,
+                attributeFilter: ['style', 'class', 'disabled', 'hidden']});
+        }
+    """
+
+    # Javascript that starts watching the given ids and returns their states.
+    __watch_script = __watch_install_script + """
+        w.watch(arguments[0]);
+        var states = {};
+        arguments[0].forEach(function (id) {
+            states[id] = w.states[id];
+        });
+        return states;
+    """
+
+    # Javascript that returns and empties the queue of state transitions.
+    __drain_script = __watch_install_script + """
+        var events = w.queue;
+        w.queue = [];
+        return events;
+    """
+
+    # Javascript used by wait_for_element_state. Arguments are the ids, the
+    # wanted state and the timeout (in ms). The timeout uses the real
+    # setTimeout, since the time-warp shim (see BasePage.install_time_warp)
+    # shortens the page's own.
+    __element_wait_script = __watch_install_script + """
+        var done = arguments[arguments.length - 1];
+        var ids = arguments[0];
+        var want = arguments[1];
+        var timeout = arguments[2];
+        var start = Date.now();
+        var realSetTimeout = window.__avedRealSetTimeout || window.setTimeout;
+        var check = function () {
+            return ids.every(function (id) {
+                return w.matches(w.states[id], want);
+            });
+        };
+        w.watch(ids);
+        new Promise(function (resolve) {
+            if (check()) {
+                resolve({satisfied: true, elapsed: 0});
+                return;
+            }
+            var timer = null;
+            var waiter = function () {
+                if (!check()) {
+                    return false;
+                }
+                clearTimeout(timer);
+                resolve({satisfied: true, elapsed: Date.now() - start});
+                return true;
+            };
+            timer = realSetTimeout.call(window, function () {
+                w.waiters = w.waiters.filter(function (other) {
+                    return other !== waiter;
+                });
+                w.scan();
+                resolve({satisfied: check(), elapsed: Date.now() - start});
+            }, timeout);
+            w.waiters.push(waiter);
+        }).then(done);
+    """
+
+    # Javascript used by read_many. The argument is a list of [key, locator,
+    # locator type, what to read] entries.
+    __read_many_script = """
+        var isVisible = """ + _js_is_visible + """;
+        var find = """ + __js_find + """;
+        var readValue = """ + __js_read_value + """;
+        var results = {};
+        arguments[0].forEach(function (item) {
+            results[item[0]] = readValue(find(item[1], item[2]), item[3],
+                                         isVisible);
+        });
+        return results;
+    """
+
+    # Javascript used by run_macro that runs a list of in-page macro steps
+    # (see PageMacro) in order. Arguments are the steps, whether to stop at
+    # the first failed step, and a token identifying this run. Returns the
+    # result of every step that ran. Results are also kept in
+    # window.__avedMacro as they come in, so that it can be checked how far
+    # the run got if the script fails part way through, and the run stops
+    # before its next step (or poll) once it is marked as cancelled there.
+    __macro_script = """
+        var done = arguments[arguments.length - 1];
+        var steps = arguments[0];
+        var stopOnFailure = arguments[1];
+        var results = [];
+        var macro = window.__avedMacro = {token: arguments[2],
+                                          results: results, cancelled: false};
+        var isVisible = """ + _js_is_visible + """;
+        var find = """ + __js_find + """;
+        var readValue = """ + __js_read_value + """;
+        var registry = (""" + _js_dijit_registry + """)();
+        var matches = function (el, want) {
+            switch (want) {
+                case 'visible': return isVisible(el);
+                case 'invisible': return !isVisible(el);
+                case 'enabled': return el !== null && !el.disabled
+                    && !el.hasAttribute('disabled');
+                case 'disabled': return el !== null && (el.disabled
+                    || el.hasAttribute('disabled'));
+                case 'present': return el !== null;
+                case 'absent': return el === null;
+            }
+            return false;
+        };
+        var poll = function (check, step, finish) {
+            var start = Date.now();
+            (function next() {
+                if (macro.cancelled) {
+                    return;
+                }
+                var satisfied = false;
+                try {
+                    satisfied = !!check();
+                } catch (e) {
+                    satisfied = false;
+                }
+                if (satisfied) {
+                    finish(true, true, null);
+                } else if (Date.now() - start >= step.wait_time * 1000) {
+                    finish(false, false, 'timed out');
+                } else {
+                    setTimeout(next, step.poll_interval * 1000);
+                }
+            })();
+        };
+        var runStep = function (index) {
+            if (macro.cancelled) {
+                return;
+            }
+            if (index >= steps.length) {
+                done(results);
+                return;
+            }
+            var step = steps[index];
+            var stepStart = Date.now();
+            var finish = function (ok, value, error) {
+                results.push({ok: ok, value: value === undefined ? null
+                                                                : value,
+                              elapsed: (Date.now() - stepStart) / 1000,
+                              error: error});
+                if (!ok && stopOnFailure) {
+                    done(results);
+                } else {
+                    runStep(index + 1);
+                }
+            };
+            try {
+                var el = step.locator === undefined ? null
+                    : find(step.locator, step.locator_type || 'id');
+                if (step.kind === 'click') {
+                    if (el === null) {
+                        finish(false, null, 'element not found');
+                    } else if (el.disabled) {
+                        finish(false, null, 'element disabled');
+                    } else {
+                        el.click();
+                        finish(true, null, null);
+                    }
+                } else if (step.kind === 'set_value') {
+                    var widget = registry && el !== null
+                        && registry.byId(el.id);
+                    if (el === null) {
+                        finish(false, null, 'element not found');
+                    } else if (widget) {
+                        widget.set('value', step.value);
+                        finish(true, widget.get('value'), null);
+                    } else {
+                        el.value = step.value;
+                        el.dispatchEvent(new Event('input', {bubbles: true}));
+                        el.dispatchEvent(new Event('change',
+                                                   {bubbles: true}));
+                        finish(true, el.value, null);
+                    }
+                } else if (step.kind === 'wait') {
+                    var check = new Function(step.predicate);
+                    var state = {};
+                    poll(function () {
+                        return check.call(state);
+                    }, step, finish);
+                } else if (step.kind === 'wait_state') {
+                    poll(function () {
+                        return matches(document.getElementById(step.locator),
+                                       step.state);
+                    }, step, finish);
+                } else if (step.kind === 'read') {
+                    finish(el !== null || step.what === 'displayed',
+                           readValue(el, step.what, isVisible),
+                           el === null ? 'element not found' : null);
+                } else {
+                    finish(false, null, 'unknown step ' + step.kind);
+                }
+            } catch (e) {
+                finish(false, null, String(e));
+            }
+        };
+        runStep(0);
+    """
+
+    # Javascript that cancels the macro run with the given token, so that it
+    # runs no more steps, and returns the results it recorded so far (null if
+    # that run never started).
+    __macro_cancel_script = """
+        var macro = window.__avedMacro;
+        if (!macro || macro.token !== arguments[0]) {
+            return {results: null};
+        }
+        macro.cancelled = true;
+        return {results: macro.results};
+    """
+
+    # Extra time (in seconds) given to async scripts beyond their own timeout.
+    __script_timeout_margin = 5
+
+    # Longest script timeout (in seconds) that is left in place after the
+    # script that needed it. Longer timeouts are only used for their own
+    # script, so that a later hung script still fails in reasonable time.
+    __script_timeout_cap = 120
+
+    # ChromeDriver endpoint for running Chrome DevTools Protocol commands,
+    # which Selenium 3.5 doesn't know about and so has to be registered.
+    __cdp_command = "executeCdpCommand"
+    __cdp_endpoint = ("POST", "/session/$sessionId/goog/cdp/execute")
+
+    def __init_subclass__(cls, **kwargs):
+        # Time every public method of page objects (see action_timer).
+        super().__init_subclass__(**kwargs)
+        instrument_class(cls)
+
     def __init__(self, driver: webdriver):
         """ Initializes a DriverWrapper object. """
         self.driver = driver
+        self.last_wait_elapsed = None
+        timer.instrument_driver(driver)
 
     def get_title(self):
         """
@@ -56,6 +469,7 @@ class DriverWrapper:
         :return: None.
         """
 
+        self.invalidate_reads()
         try:
             if element is None:
                 element = self.get_element(my_locator, locator_type)
@@ -88,6 +502,27 @@ class DriverWrapper:
         it will be set equal to the first found by searching with my_locator and
         locator_type.
         
+        :return: String containing the text from the chosen element.
+        """
+        if element is None:
+            return self.cached_read(
+                ("text", my_locator, locator_type),
+                lambda: self.__read_text(my_locator, locator_type))
+        return self.__read_text(my_locator, locator_type, element)
+
+    def __read_text(self, my_locator="", locator_type="id", element=None):
+        """
+        Reads text from an on-screen element (see get_text).
+
+        :param my_locator: A string containing the locator that will be searched
+        for if element is not specified.
+
+        :param locator_type: A string representing the type of locator that
+        my_locator is.
+
+        :param element: The element to read the text of, or None to search for
+        it with my_locator and locator_type.
+
         :return: String containing the text from the chosen element.
         """
         text = None
@@ -163,6 +598,43 @@ class DriverWrapper:
             self.log.info("Locator type " + locator_type + " not supported.")
         return False
 
+    def __ensure_script_timeout(self, wait_time):
+        """
+        Makes sure that the WebDriver script timeout is long enough for an
+        async script that needs wait_time seconds.
+
+        The timeout is stored on the driver itself because it is shared by
+        every page object that uses the driver. Timeouts longer than
+        __script_timeout_cap are only meant for a single script, so the
+        previous timeout is returned for the caller to put back.
+
+        :param wait_time: The time in seconds that the script may take.
+
+        :return: The timeout to restore once the script is done, or None if
+        the timeout can be left as it is.
+        """
+        needed = wait_time + self.__script_timeout_margin
+        current = getattr(self.driver, "_aved_script_timeout", 0)
+        if current >= needed:
+            return None
+        self.__set_script_timeout(needed)
+        if needed > self.__script_timeout_cap:
+            # A timeout that was never set is replaced by the cap.
+            return current or self.__script_timeout_cap
+        return None
+
+    def __set_script_timeout(self, timeout):
+        """
+        Sets the WebDriver script timeout and records it on the driver.
+
+        :param timeout: The timeout in seconds.
+
+        :return: None.
+        """
+        self.driver.set_script_timeout(timeout)
+        self.driver._aved_script_timeout = timeout
+        self.log.info("Set script timeout to " + str(timeout) + " seconds.")
+
     def get_element(self, my_locator, locator_type="id"):
         """
         Attempts to get an element on the webpage from the driver.
@@ -247,6 +719,7 @@ class DriverWrapper:
 
         :return: None.
         """
+        self.invalidate_reads()
         try:
             if element is None:
                 element = self.get_element(my_locator, locator_type)
@@ -418,22 +891,473 @@ class DriverWrapper:
                           + str(attr_val))
             return attr_val
 
-    def execute_script(self, script_text):
+    def execute_script(self, script_text, *args, mutating=True):
         """
         Executes arbitrary Javascript code to interact with the page.
 
         :param script_text: The Javascript code to be executed.
 
-        :return: None.
-        """
+        :param args: Optional arguments that are made available to the code
+        through the 'arguments' array.
 
+        :param mutating: Whether the code may change the state of the app,
+        which clears any cached reads (see mark_paused). Pass False for code
+        that only reads.
+
+        :return: The value returned by the Javascript code (or None).
+        """
+        if mutating:
+            self.invalidate_reads()
         try:
-            value = self.driver.execute_script(script_text)
+            value = self.driver.execute_script(script_text, *args)
             self.log.info("Run Javascript code: '" + script_text + "'.")
             return value
         except Exception:
             self.log.info("Attempt to run Javascript code failed.")
 
+    def execute_async_script(self, script_text, *args, wait_time=10,
+                             mutating=True):
+        """
+        Executes asynchronous Javascript code, which signals that it is finished
+        by calling the callback passed in as its last argument.
+
+        :param script_text: The Javascript code to be executed.
+
+        :param args: Optional arguments that are made available to the code
+        through the 'arguments' array (before the callback).
+
+        :param wait_time: The amount of time in seconds that the code is
+        expected to need. The WebDriver script timeout is raised if it is
+        shorter than this (and put back afterwards if it had to be raised a
+        lot).
+
+        :param mutating: Whether the code may change the state of the app,
+        which clears any cached reads (see mark_paused). Pass False for code
+        that only reads.
+
+        :return: The value passed to the callback (or None).
+        """
+        if mutating:
+            self.invalidate_reads()
+        previous = None
+        try:
+            previous = self.__ensure_script_timeout(wait_time)
+            value = self.driver.execute_async_script(script_text, *args)
+            self.log.info("Run async Javascript code: '" + script_text + "'.")
+            return value
+        except Exception:
+            self.log.info("Attempt to run async Javascript code failed.")
+        finally:
+            if previous is not None:
+                try:
+                    self.__set_script_timeout(previous)
+                except Exception:
+                    self.log.warning("Failed to restore the script timeout.")
+
+    def execute_cdp_command(self, command, params=None):
+        """
+        Runs a Chrome DevTools Protocol command (e.g.
+        'Page.addScriptToEvaluateOnNewDocument') through ChromeDriver.
+
+        :param command: Name of the DevTools Protocol command.
+
+        :param params: Optional dict of the command's parameters.
+
+        :return: The command's result, or None if it failed (e.g. because the
+        browser isn't Chrome).
+        """
+        try:
+            executor = self.driver.command_executor
+            executor._commands.setdefault(self.__cdp_command,
+                                          self.__cdp_endpoint)
+            result = self.driver.execute(self.__cdp_command,
+                                         {"cmd": command,
+                                          "params": params or {}})
+            self.log.info("Ran DevTools command " + command + ".")
+            return result["value"]
+        except Exception:
+            self.log.info("Attempt to run DevTools command " + command
+                          + " failed.")
+            return None
+
+    def read_script(self, script_text, *args, fresh=False):
+        """
+        Executes Javascript code that only reads from the page, reusing the
+        value read last time if the app is known to be paused (see
+        mark_paused).
+
+        :param script_text: The Javascript code to be executed.
+
+        :param args: Optional arguments that are made available to the code
+        through the 'arguments' array.
+
+        :param fresh: True if the page should be read even if the value is
+        cached.
+
+        :return: The value returned by the Javascript code (or None).
+        """
+        return self.cached_read(
+            ("script", script_text, repr(args)),
+            lambda: self.execute_script(script_text, *args, mutating=False),
+            fresh)
+
+    def mark_paused(self):
+        """
+        Records that the app is paused, so that reads made through
+        read_script, read_many, and get_text can't change and are cached until
+        the next call that may change the app (a click, keyboard input, a
+        mutating script, or a refresh).
+
+        Caching is only turned on by an explicit call (or by waits that are
+        asked to, e.g. PopulationPage.wait_until_update_stable with
+        cache_reads=True), since a cached read can't notice the app changing
+        on its own.
+
+        The cache is stored on the driver so that it is shared by every page
+        object using that driver.
+
+        :return: None.
+        """
+        self.driver._aved_read_cache = {}
+        self.log.info("App marked as paused; caching reads.")
+
+    def invalidate_reads(self):
+        """
+        Clears cached reads and stops caching until mark_paused is called
+        again.
+
+        :return: None.
+        """
+        if getattr(self.driver, "_aved_read_cache", None) is not None:
+            self.driver._aved_read_cache = None
+            self.log.info("Cleared cached reads.")
+
+    def cached_read(self, key, read, fresh=False):
+        """
+        Gets a value from the read cache if the app is known to be paused,
+        reading (and caching) it otherwise. Values of None aren't cached.
+
+        :param key: Hashable key identifying what is read.
+
+        :param read: Function without parameters that reads the value.
+
+        :param fresh: True if the value should be read (and cached again) even
+        if it is cached.
+
+        :return: The value.
+        """
+        cache = getattr(self.driver, "_aved_read_cache", None)
+        if cache is None:
+            return read()
+        if key in cache and not fresh:
+            return cache[key]
+        value = read()
+        if value is not None:
+            cache[key] = value
+        return value
+
+    def wait_for_condition(self, predicate, wait_time=10, poll_interval=0.05,
+                           description=None):
+        """
+        Waits until a Javascript predicate holds, polling it inside the browser
+        so that the whole wait costs a single WebDriver call.
+
+        The predicate is the body of a Javascript function that returns a
+        truthy value once the condition holds (e.g. "return
+        av.grd.popStatsMsg.update >= 9;"). It is called with 'this' set to an
+        object that persists between polls, so it can keep track of state.
+
+        The time taken by the wait (in seconds) is stored in
+        last_wait_elapsed.
+
+        :param predicate: Javascript function body for the condition.
+
+        :param wait_time: The amount of time in seconds to wait before giving
+        up.
+
+        :param poll_interval: Time in seconds between checks of the predicate.
+
+        :param description: Optional description of the condition for the log.
+
+        :return: True if the condition held before wait_time ran out; False
+        otherwise.
+        """
+        if description is None:
+            description = predicate
+        result = self.execute_async_script(self.__wait_script,
+                                           predicate,
+                                           int(wait_time * 1000),
+                                           int(poll_interval * 1000),
+                                           wait_time=wait_time,
+                                           mutating=False)
+        if result is None:
+            self.last_wait_elapsed = None
+            self.log.error("wait_for_condition for '" + description
+                           + "' could not be run.")
+            return False
+
+        self.last_wait_elapsed = result["elapsed"] / 1000.0
+        if result["satisfied"]:
+            self.log.info("Condition '" + description + "' held after "
+                          + str(self.last_wait_elapsed) + " seconds.")
+            return True
+        self.log.error("wait_for_condition for '" + description
+                       + "' timed out after "
+                       + str(self.last_wait_elapsed) + " seconds.")
+        return False
+
+    def wait_until_stable(self, expression, stable_time=0.5, wait_time=10,
+                          description=None):
+        """
+        Waits until the value of a Javascript expression has not changed for
+        stable_time seconds (e.g. until the update number stops changing after
+        pausing).
+
+        :param expression: Javascript expression whose value is watched.
+
+        :param stable_time: Time in seconds that the value must stay the same.
+
+        :param wait_time: The amount of time in seconds to wait before giving
+        up.
+
+        :param description: Optional description of the condition for the log.
+
+        :return: True if the value stayed the same for long enough before
+        wait_time ran out; False otherwise.
+        """
+        predicate = ("var value = JSON.stringify(" + expression + ");"
+                     " var now = Date.now();"
+                     " if (!('since' in this) || this.value !== value) {"
+                     " this.value = value; this.since = now; }"
+                     " return now - this.since >= "
+                     + str(int(stable_time * 1000)) + ";")
+        if description is None:
+            description = expression + " unchanged for " + str(stable_time) \
+                          + " seconds"
+        return self.wait_for_condition(predicate, wait_time,
+                                       description=description)
+
+    def read_many(self, spec):
+        """
+        Reads values from several elements in a single Javascript call.
+
+        Each entry in spec is a tuple of (locator, locator type, what to read),
+        optionally followed by the key the value should be stored under (the
+        locator is used as the key otherwise). What to read can be:
+            'text' -- the visible text of the element (stripped).
+            'displayed' -- whether the element is visible.
+            'attribute:<name>' -- the value of an attribute (None if missing).
+            'property:<name>' -- the value of a DOM property.
+
+        Example:
+            read_many([("notPerf", "id", "text"),
+                       ("orgRun", "id", "attribute:disabled", "run")])
+
+        :param spec: List of tuples describing the values to read.
+
+        :return: Dict mapping each key to the value read, which is None if the
+        element could not be found.
+        """
+        entries = []
+        for item in spec:
+            my_locator, locator_type, what = item[:3]
+            key = item[3] if len(item) > 3 else my_locator
+            entries.append([key, my_locator, locator_type.lower(), what])
+
+        values = self.cached_read(
+            ("read_many", repr(entries)),
+            lambda: self.execute_script(self.__read_many_script, entries,
+                                        mutating=False))
+        if values is None:
+            self.log.info("Failed to read values from " + str(len(entries))
+                          + " elements.")
+            return {}
+        self.log.info("Read values from " + str(len(entries))
+                      + " elements: " + str(values))
+        return values
+
+    def run_macro(self, macro):
+        """
+        Runs the steps of a PageMacro in order. Each part made of consecutive
+        in-page steps is run by a single asynchronous Javascript program, so
+        it costs one WebDriver call however many clicks, inputs, waits, and
+        reads it has. Native steps are run through WebDriver in between. If an
+        in-page part can't be started at all, its steps are run one by one
+        through WebDriver instead; if it fails after starting, it is reported
+        as failed at the step that was running (see __run_page_steps).
+
+        :param macro: The PageMacro to run.
+
+        :return: MacroResult with the result of every step of the macro.
+        """
+        start = time.time()
+        results = []
+        round_trips = 0
+        failed = False
+        for native, steps in macro.segments():
+            ran = []
+            if not failed:
+                if native:
+                    ran = [self.__run_native_step(steps[0])]
+                else:
+                    start_commands = timer.command_count
+                    ran = self.__run_page_steps(steps, macro.stop_on_failure)
+                    round_trips += timer.command_count - start_commands
+                failed = macro.stop_on_failure \
+                    and not all(result.ok for result in ran)
+            results.extend(ran)
+            results.extend(MacroStepResult(step["name"], step["kind"], False,
+                                           None, 0.0, step["native"],
+                                           "skipped")
+                           for step in steps[len(ran):])
+
+        ok = all(result.ok for result in results)
+        elapsed = time.time() - start
+        for result in results:
+            self.log.info("Macro '" + macro.name + "' step '" + result.name
+                          + "' " + ("succeeded" if result.ok
+                                    else "failed (" + str(result.error) + ")")
+                          + " in " + str(result.elapsed) + " seconds.")
+        if ok:
+            self.log.info("Ran macro '" + macro.name + "' with "
+                          + str(len(results)) + " steps in " + str(elapsed)
+                          + " seconds.")
+        else:
+            self.log.error("Macro '" + macro.name + "' failed after "
+                           + str(elapsed) + " seconds.")
+        return MacroResult(ok, results,
+                           {result.name: result.value for result in results
+                            if result.error != "skipped"},
+                           elapsed, round_trips)
+
+    def __run_page_steps(self, steps, stop_on_failure):
+        """
+        Runs consecutive in-page steps of a macro in a single Javascript call.
+
+        If the call fails (e.g. times out), the run is cancelled in the page so
+        that it doesn't go on with its remaining steps, and the page is checked
+        for how far it got. If it never started, the steps are run one by one
+        through WebDriver instead. Otherwise (or if the page can't be checked)
+        the steps that ran keep their results and the step that was running is
+        reported as failed, so that no step is ever run twice.
+
+        :param steps: List of step dicts (see PageMacro).
+
+        :param stop_on_failure: True if no steps should run after a failed one.
+
+        :return: List of MacroStepResults of the steps that ran.
+        """
+        mutating = any(step["kind"] in ("click", "set_value")
+                       for step in steps)
+        wait_time = sum(step.get("wait_time", 0) for step in steps)
+        token = uuid.uuid4().hex
+        page_results = self.execute_async_script(self.__macro_script, steps,
+                                                 stop_on_failure, token,
+                                                 wait_time=wait_time,
+                                                 mutating=mutating)
+        if page_results is not None:
+            return self.__page_step_results(steps, page_results)
+
+        progress = self.execute_script(self.__macro_cancel_script, token,
+                                       mutating=False)
+        if progress is None or progress["results"] is not None:
+            page_results = [] if progress is None else progress["results"]
+            results = self.__page_step_results(steps, page_results)
+            finished = len(results) == len(steps) \
+                or (stop_on_failure and results and not results[-1].ok)
+            if not finished:
+                failed = steps[len(results)]
+                self.log.error("Macro steps failed in the page at step '"
+                               + failed["name"] + "'.")
+                results.append(MacroStepResult(failed["name"],
+                                               failed["kind"], False, None,
+                                               0.0, False,
+                                               "script failed in the page"))
+            return results
+
+        self.log.warning("Could not run macro steps in the page -- running"
+                         " them through WebDriver instead.")
+        results = []
+        for step in steps:
+            results.append(self.__run_native_step(step))
+            if stop_on_failure and not results[-1].ok:
+                break
+        return results
+
+    def __page_step_results(self, steps, page_results):
+        """
+        Converts the results returned by the macro script into
+        MacroStepResults.
+
+        :param steps: List of step dicts that were run (see PageMacro).
+
+        :param page_results: List of result dicts of the steps that ran.
+
+        :return: List of MacroStepResults.
+        """
+        return [MacroStepResult(step["name"], step["kind"], result["ok"],
+                                result["value"], result["elapsed"], False,
+                                result["error"])
+                for step, result in zip(steps, page_results)]
+
+    def __run_native_step(self, step):
+        """
+        Runs a single step of a macro through WebDriver.
+
+        :param step: The step dict (see PageMacro).
+
+        :return: MacroStepResult of the step.
+        """
+        start = time.time()
+        kind = step["kind"]
+        value = None
+        error = None
+        try:
+            if kind == "call":
+                value = step["function"]()
+                ok = value is not False
+                if not ok:
+                    error = "returned False"
+            elif kind in ("wait", "wait_state"):
+                if kind == "wait":
+                    ok = self.wait_for_condition(step["predicate"],
+                                                 step["wait_time"],
+                                                 step["poll_interval"],
+                                                 description=step["name"])
+                else:
+                    ok = self.wait_for_element_state(step["locator"],
+                                                     step["state"],
+                                                     step["wait_time"])
+                value = ok
+                if not ok:
+                    error = "timed out"
+            elif kind == "read":
+                value = self.read_many([(step["locator"],
+                                         step["locator_type"], step["what"],
+                                         "value")]).get("value")
+                ok = value is not None or step["what"] == "displayed"
+                if not ok:
+                    error = "element not found"
+            else:
+                element = self.get_element(step["locator"],
+                                           step["locator_type"])
+                ok = element is not None
+                if not ok:
+                    error = "element not found"
+                elif kind == "click":
+                    self.invalidate_reads()
+                    element.click()
+                else:
+                    self.invalidate_reads()
+                    element.clear()
+                    element.send_keys(step["value"])
+                    value = element.get_attribute("value")
+        except Exception as e:
+            ok = False
+            error = str(e)
+        return MacroStepResult(step["name"], kind, ok, value,
+                               time.time() - start, True, error)
+
     def switch_to_alert(self):
         """
         Allows interaction with Javscript alerts.
@@ -442,18 +1366,101 @@ class DriverWrapper:
         """
         return self.driver.switch_to.alert
 
+    def watch_elements(self, element_ids):
+        """
+        Starts watching elements with an in-page MutationObserver. Every change
+        to whether a watched element is present, visible, or enabled (or to
+        its classes) is buffered in the page until drain_element_events is
+        called.
+
+        :param element_ids: List of ids of the elements to watch.
+
+        :return: Dict mapping each id to its current state (a dict with the
+        keys 'present', 'visible', 'enabled', and 'cls').
+        """
+        states = self.execute_script(self.__watch_script, list(element_ids),
+                                     mutating=False)
+        self.log.info("Watching elements with ids " + str(element_ids) + ".")
+        return states
+
+    def drain_element_events(self):
+        """
+        Gets (and clears) the state transitions of watched elements that have
+        been buffered in the page since the last drain.
+
+        :return: List of dicts describing each transition in order (with the
+        keys 'id', 'time', 'present', 'visible', 'enabled', and 'cls').
+        """
+        events = self.execute_script(self.__drain_script, mutating=False)
+        if events is None:
+            events = []
+        self.log.info("Drained " + str(len(events)) + " element events.")
+        return events
+
+    def wait_for_element_state(self, element_ids, state, wait_time=10):
+        """
+        Waits until one or more elements are in the given state. The wait is
+        resolved inside the page by a MutationObserver as soon as the
+        transition happens, so it costs a single WebDriver call.
+
+        The time taken by the wait (in seconds) is stored in
+        last_wait_elapsed.
+
+        :param element_ids: An element id, or a list of ids that must all be in
+        the given state.
+
+        :param state: One of 'visible', 'invisible', 'enabled', 'disabled',
+        'present', or 'absent'.
+
+        :param wait_time: The amount of time in seconds to wait before giving
+        up.
+
+        :return: True if the elements reached the state in time; False
+        otherwise.
+        """
+        if isinstance(element_ids, str):
+            element_ids = [element_ids]
+        result = self.execute_async_script(self.__element_wait_script,
+                                           list(element_ids),
+                                           state,
+                                           int(wait_time * 1000),
+                                           wait_time=wait_time,
+                                           mutating=False)
+        if result is None:
+            self.last_wait_elapsed = None
+            self.log.error("wait_for_element_state for elements with ids "
+                           + str(element_ids) + " could not be run.")
+            return False
+
+        self.last_wait_elapsed = result["elapsed"] / 1000.0
+        if result["satisfied"]:
+            self.log.info("Elements with ids " + str(element_ids)
+                          + " found to be " + state + " after "
+                          + str(self.last_wait_elapsed) + " seconds.")
+            return True
+        self.log.error("Waiting for elements with ids " + str(element_ids)
+                       + " to be " + state + " timed out after "
+                       + str(self.last_wait_elapsed) + " seconds.")
+        return False
+
     def wait_until_visible(self, my_locator="", locator_type="id", wait_time=10):
         """
-        Use WebdriverWait until an element is visible on the screen.
+        Waits until an element is visible on the screen.
+
+        Elements located by id are waited on through wait_for_element_state;
+        other locator types use WebdriverWait.
 
         :param my_locator: The locator used to find the element.
 
         :param locator_type: The type of locator used -- can be id, class, css selector, xpath, etc.
 
-        :param wait_time: The amount of time that WebDriverWait will wait before raising an exception.
+        :param wait_time: The amount of time that the wait will last before giving up.
 
         :return: True if wait successful; False otherwise.
         """
+        if locator_type == "id":
+            return self.wait_for_element_state(my_locator, "visible",
+                                               wait_time)
         try:
             WebDriverWait(self.driver, wait_time) \
                 .until(ec.visibility_of_element_located((locator_type, my_locator)))
@@ -465,17 +1472,22 @@ class DriverWrapper:
 
     def wait_until_invisible(self, my_locator="", locator_type="id", wait_time=10):
         """
-        Use WebdriverWait to wait until an element is no longer visible on the
-        screen.
+        Waits until an element is no longer visible on the screen.
+
+        Elements located by id are waited on through wait_for_element_state;
+        other locator types use WebdriverWait.
 
         :param my_locator: The locator used to find the element.
 
         :param locator_type: The type of locator used -- can be id, class, css selector, xpath, etc.
 
-        :param wait_time: The amount of time that WebDriverWait will wait before raising an exception.
+        :param wait_time: The amount of time that the wait will last before giving up.
 
         :return: True if wait successful; False otherwise.
         """
+        if locator_type == "id":
+            return self.wait_for_element_state(my_locator, "invisible",
+                                               wait_time)
         try:
             WebDriverWait(self.driver, wait_time) \
                 .until(ec.invisibility_of_element_located((locator_type, my_locator)))
@@ -491,6 +1503,7 @@ class DriverWrapper:
 
         :return: None.
         """
+        self.invalidate_reads()
         self.driver.refresh()
 
     def close_logger(self):
@@ -504,3 +1517,6 @@ class DriverWrapper:
         for handler in handlers:
             handler.close()
             self.log.removeHandler(handler)
+
+
+instrument_class(DriverWrapper)
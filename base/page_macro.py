@@ -0,0 +1,230 @@
+from collections import namedtuple
+
+# Result of one step of a macro (see DriverWrapper.run_macro). ok is whether
+# the step succeeded, value is what it read (or returned, for call steps),
+# elapsed is the time it took in seconds, native is whether it was run through
+# WebDriver instead of inside the page, and error describes why it failed (or
+# is 'skipped' if an earlier step failed).
+MacroStepResult = namedtuple("MacroStepResult", ["name", "kind", "ok", "value",
+                                                 "elapsed", "native", "error"])
+
+# Result of a whole macro. values maps the name of every step that ran to its
+# value, and round_trips is the number of WebDriver commands sent to run the
+# macro's in-page steps (including any checks and fallbacks).
+MacroResult = namedtuple("MacroResult", ["ok", "steps", "values", "elapsed",
+                                         "round_trips"])
+
+
+class PageMacro:
+    """
+    Class that declares a sequence of page actions to be run together by
+    DriverWrapper.run_macro.
+
+    Consecutive in-page steps are compiled into a single asynchronous
+    Javascript program and run in one WebDriver call. Steps that need native
+    input (marked with native=True, and every call step) are run through
+    WebDriver between the in-page parts, and an in-page part that can't be
+    started at all is retried step by step through WebDriver. A part that
+    fails after it started (e.g. by timing out) is cancelled in the page and
+    reported as failed rather than retried, so no step is run twice.
+
+    Example Usage:
+    macro = (PageMacro("small dish")
+             .click("popSetupButton")
+             .wait_for_state("setupBlock", "visible")
+             .set_value("sizeCols", "10")
+             .set_value("sizeRows", "10")
+             .click("popSetupButton")
+             .wait_for_state("setupBlock", "invisible")
+             .call(bp.add_ancestor_to_dish)
+             .read("sizeCols", "property:value", name="cols"))
+    result = pp.run_macro(macro)
+    """
+
+    # States that wait_for_state accepts (see
+    # DriverWrapper.wait_for_element_state).
+    __element_states = ("visible", "invisible", "enabled", "disabled",
+                        "present", "absent")
+
+    def __init__(self, name="macro", stop_on_failure=True):
+        """
+        Creates an empty macro.
+
+        :param name: Name of the macro for the log.
+
+        :param stop_on_failure: True if the steps after a failed step should be
+        skipped.
+        """
+        self.name = name
+        self.stop_on_failure = stop_on_failure
+        self.steps = []
+
+    def __len__(self):
+        return len(self.steps)
+
+    def click(self, my_locator, locator_type="id", native=False, name=None):
+        """
+        Adds a step that clicks on an element. In the page, this dispatches a
+        click event on the element; elements that only react to real mouse
+        input should use native=True.
+
+        :param my_locator: Locator used to find the element.
+
+        :param locator_type: Type of locator that my_locator is (id, name,
+        xpath, css, class, or link).
+
+        :param native: True if the click should be done through WebDriver.
+
+        :param name: Optional name of the step (defaults to 'click <locator>').
+
+        :return: The macro, so that steps can be chained.
+        """
+        return self.__add("click", name or "click " + my_locator, native,
+                          locator=my_locator, locator_type=locator_type)
+
+    def set_value(self, my_locator, value, locator_type="id", native=False,
+                  name=None):
+        """
+        Adds a step that sets the value of an input. In the page, dijit widgets
+        are set through the widget, and other inputs have their value set
+        followed by 'input' and 'change' events. With native=True, the input
+        is cleared and the value is typed through WebDriver.
+
+        :param my_locator: Locator used to find the input.
+
+        :param value: String to set the input to.
+
+        :param locator_type: Type of locator that my_locator is.
+
+        :param native: True if the value should be typed through WebDriver.
+
+        :param name: Optional name of the step (defaults to 'set <locator>').
+
+        :return: The macro, so that steps can be chained.
+        """
+        return self.__add("set_value", name or "set " + my_locator, native,
+                          locator=my_locator, locator_type=locator_type,
+                          value=str(value))
+
+    def wait_for(self, predicate, wait_time=10, poll_interval=0.05,
+                 name=None):
+        """
+        Adds a step that waits until a Javascript predicate holds (see
+        DriverWrapper.wait_for_condition). The step fails if wait_time runs
+        out.
+
+        :param predicate: Body of a Javascript function that returns a truthy
+        value once the condition holds.
+
+        :param wait_time: Time in seconds to wait before giving up.
+
+        :param poll_interval: Time in seconds between checks of the predicate.
+
+        :param name: Optional name of the step (defaults to the predicate).
+
+        :return: The macro, so that steps can be chained.
+        """
+        return self.__add("wait", name or predicate, False,
+                          predicate=predicate, wait_time=wait_time,
+                          poll_interval=poll_interval)
+
+    def wait_for_state(self, element_id, state, wait_time=10, name=None):
+        """
+        Adds a step that waits until an element is in a state (see
+        DriverWrapper.wait_for_element_state). The step fails if wait_time runs
+        out.
+
+        :param element_id: Id of the element.
+
+        :param state: One of 'visible', 'invisible', 'enabled', 'disabled',
+        'present', or 'absent'.
+
+        :param wait_time: Time in seconds to wait before giving up.
+
+        :param name: Optional name of the step (defaults to '<id> <state>').
+
+        :return: The macro, so that steps can be chained.
+        """
+        if state not in self.__element_states:
+            raise ValueError("Unknown element state '" + str(state) + "'.")
+        return self.__add("wait_state", name or element_id + " " + state,
+                          False, locator=element_id, state=state,
+                          wait_time=wait_time, poll_interval=0.05)
+
+    def read(self, my_locator, what="text", locator_type="id", name=None):
+        """
+        Adds a step that reads a value from an element (see
+        DriverWrapper.read_many for what can be read).
+
+        :param my_locator: Locator used to find the element.
+
+        :param what: 'text', 'displayed', 'attribute:<name>', or
+        'property:<name>'.
+
+        :param locator_type: Type of locator that my_locator is.
+
+        :param name: Optional name of the step, which its value is stored under
+        in the result (defaults to the locator).
+
+        :return: The macro, so that steps can be chained.
+        """
+        return self.__add("read", name or my_locator, False,
+                          locator=my_locator, locator_type=locator_type,
+                          what=what)
+
+    def call(self, function, name=None):
+        """
+        Adds a step that calls a Python function (e.g. a page object method
+        such as BasePage.add_ancestor_to_dish). Call steps always run through
+        WebDriver, between the in-page parts of the macro. The step fails if
+        the function raises an exception or returns False.
+
+        :param function: Function without parameters.
+
+        :param name: Optional name of the step (defaults to the function's
+        name).
+
+        :return: The macro, so that steps can be chained.
+        """
+        return self.__add("call", name or getattr(function, "__name__",
+                                                  "call"),
+                          True, function=function)
+
+    def segments(self):
+        """
+        Splits the macro into the parts that are run together: lists of
+        consecutive in-page steps, and single native steps.
+
+        :return: List of (native, steps) tuples in order.
+        """
+        segments = []
+        for step in self.steps:
+            if step["native"] or not segments or segments[-1][0]:
+                segments.append((step["native"], [step]))
+            else:
+                segments[-1][1].append(step)
+        return segments
+
+    ############################################################################
+    # Methods below this point shouldn't be called outside this class.
+    ############################################################################
+
+    def __add(self, kind, name, native, **params):
+        """
+        Appends a step to the macro.
+
+        :param kind: Kind of step ('click', 'set_value', 'wait', 'wait_state',
+        'read', or 'call').
+
+        :param name: Name of the step.
+
+        :param native: True if the step is run through WebDriver.
+
+        :param params: Parameters of the step.
+
+        :return: The macro.
+        """
+        step = {"kind": kind, "name": name, "native": native}
+        step.update(params)
+        self.steps.append(step)
+        return self
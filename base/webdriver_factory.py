@@ -1,5 +1,11 @@
+import json
+import logging
+import time
+
 from selenium import webdriver
 from selenium.webdriver.firefox.firefox_binary import FirefoxBinary
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from utilities.custom_logger import create_custom_logger
 from utilities.simple_web_server import CustomWebServer
 from base.config import Configuration
 
@@ -14,12 +20,56 @@ class WebDriverFactory:
      driver = wdf.get_webdriver_instance()
      """
 
+    log = create_custom_logger(logging.INFO)
+
     # Path for downloads to go to
     __dwn_path = path.join(getcwd(), "downloads")
-    if not path.exists(__dwn_path):
-        makedirs(__dwn_path)
 
-    def __init__(self, browser, is_local, ui_path, ff_path, av_url):
+    # File that the startup time of every browser launch is appended to.
+    __startup_times_path = path.join("output", "browser_startup",
+                                     "startup_times.jsonl")
+
+    # Supported browser launch profiles.
+    __profiles = ("full", "lean", "headless")
+
+    # Window size used by the lean and headless profiles.
+    __window_size = (1920, 1080)
+
+    # Chrome arguments for the lean profile (also used by headless).
+    __chrome_lean_args = ["--disable-extensions",
+                          "--disable-background-networking",
+                          "--disable-sync",
+                          "--disable-default-apps",
+                          "--disable-translate",
+                          "--disable-component-update",
+                          "--no-first-run",
+                          "--window-size=%d,%d" % __window_size]
+
+    # Extra Chrome arguments for the headless profile.
+    __chrome_headless_args = ["--headless",
+                              "--disable-gpu",
+                              "--use-gl=swiftshader"]
+
+    # Firefox preferences for the lean profile (also used by headless).
+    __ff_lean_prefs = {"extensions.update.enabled": False,
+                       "extensions.blocklist.enabled": False,
+                       "app.update.enabled": False,
+                       "app.update.auto": False,
+                       "browser.search.update": False,
+                       "browser.safebrowsing.malware.enabled": False,
+                       "browser.safebrowsing.phishing.enabled": False,
+                       "network.prefetch-next": False,
+                       "identity.fxaccounts.enabled": False,
+                       "datareporting.healthreport.uploadEnabled": False,
+                       "datareporting.policy.dataSubmissionEnabled": False,
+                       "toolkit.telemetry.enabled": False}
+
+    # Extra Firefox preferences for the headless profile.
+    __ff_headless_prefs = {"layers.acceleration.disabled": True,
+                           "gfx.direct2d.disabled": True}
+
+    def __init__(self, browser, is_local, ui_path, ff_path, av_url,
+                 worker_id=None, server_mode=None, browser_profile=None):
         """
         Initializes a WebDriverFactory object.
 
@@ -36,13 +86,27 @@ class WebDriverFactory:
 
         :param av_url: The URL of a web-hosted version of Avida-ED (needed when
         not running locally).
+
+        :param worker_id: The id of the pytest-xdist worker that the driver is
+        for (e.g. 'gw0'), or None when not running in parallel. Each worker gets
+        its own download directory.
+
+        :param server_mode: The mode of the local web server -- 'cached'
+        (default) or 'simple'. See CustomWebServer.
+
+        :param browser_profile: How the browser is launched -- 'full'
+        (default; a normal maximized window), 'lean' (fixed window size with
+        extensions, background networking, sync, etc. turned off), or
+        'headless' (lean without a window and with software rendering).
         """
+        # The config file is only rewritten when a value actually changes, so
+        # that parallel workers given the same options do not race on it.
         self.config = Configuration()
-        if ui_path is not None:
+        if ui_path is not None and ui_path != self.config.get_ui_path():
             self.config.set_ui_path(ui_path)
-        if ff_path is not None:
+        if ff_path is not None and ff_path != self.config.get_ff_path():
             self.config.set_ff_path(ff_path)
-        if av_url is not None:
+        if av_url is not None and av_url != self.config.get_av_url():
             self.config.set_av_url(av_url)
         if browser is None:
             browser = "chrome"
@@ -51,8 +115,27 @@ class WebDriverFactory:
             self.is_local = True
         else:
             self.is_local = False
+        if browser_profile is None:
+            browser_profile = "full"
+        self.browser_profile = browser_profile.lower()
+        if self.browser_profile not in self.__profiles:
+            raise ValueError("Unknown browser profile '" + browser_profile
+                             + "'; expected one of "
+                             + ", ".join(self.__profiles) + ".")
+        self.worker_id = worker_id
+        self.startup_times = None
 
-        self.server = CustomWebServer()
+        self.dwn_path = self.__dwn_path
+        if worker_id is not None:
+            self.dwn_path = path.join(self.dwn_path, worker_id)
+        makedirs(self.dwn_path, exist_ok=True)
+
+        # Each factory gets its own server on a free port.
+        if server_mode is None:
+            server_mode = "cached"
+        self.server = None
+        if self.is_local:
+            self.server = CustomWebServer(mode=server_mode.lower())
 
     def get_webdriver_instance(self):
         """
@@ -62,35 +145,115 @@ class WebDriverFactory:
         """
         if self.is_local:
             self.server.run_http_server()
-            base_url = "http://127.0.0.1:8000/av_ui/AvidaED.html"
+            base_url = self.server.get_base_url()
         else:
             base_url = self.config.get_av_url()
 
         # Instantiate driver using specified browser (defaults to Chrome)
+        launch_start = time.perf_counter()
         if self.browser == "firefox":
-            binary = FirefoxBinary(self.config.get_ff_path())
-
-            # Set FF preferences up for downloads.
-            profile = webdriver.FirefoxProfile()
-            profile.set_preference("browser.download.folderList", 2)
-            profile.set_preference("browser.download.manager.showWhenStarting",
-                                   False)
-            profile.set_preference("browser.download.dir", self.__dwn_path)
-            profile.set_preference("browser.helperApps.neverAsk.saveToDisk",
-                                   "application/zip")
-
-            # Create the driver itself.
-            driver = webdriver.Firefox(firefox_binary=binary,
-                                       firefox_profile=profile)
+            driver = self.__create_firefox_driver()
         else:
-            driver = webdriver.Chrome()
+            driver = self.__create_chrome_driver()
 
-        # Prepare driver for use -- maximize window, go to avida-ED website.
-        driver.maximize_window()
+        # Prepare driver for use -- size window, go to avida-ED website.
+        if self.browser_profile == "full":
+            driver.maximize_window()
+        elif self.browser == "firefox":
+            driver.set_window_size(*self.__window_size)
+        launch_end = time.perf_counter()
         driver.get(base_url)
+        load_end = time.perf_counter()
 
+        self.__record_startup_time(launch_end - launch_start,
+                                   load_end - launch_end)
         return driver
 
+    def __create_chrome_driver(self):
+        """
+        Launches Chrome using the selected browser profile.
+
+        :return: A Chrome WebDriver instance.
+        """
+        # Set Chrome preferences up for downloads.
+        options = webdriver.ChromeOptions()
+        options.add_experimental_option("prefs", {
+            "download.default_directory": self.dwn_path,
+            "download.prompt_for_download": False
+        })
+
+        if self.browser_profile in ("lean", "headless"):
+            for argument in self.__chrome_lean_args:
+                options.add_argument(argument)
+        if self.browser_profile == "headless":
+            for argument in self.__chrome_headless_args:
+                options.add_argument(argument)
+
+        return webdriver.Chrome(chrome_options=options)
+
+    def __create_firefox_driver(self):
+        """
+        Launches Firefox using the selected browser profile.
+
+        :return: A Firefox WebDriver instance.
+        """
+        binary = FirefoxBinary(self.config.get_ff_path())
+
+        # Set FF preferences up for downloads.
+        profile = webdriver.FirefoxProfile()
+        profile.set_preference("browser.download.folderList", 2)
+        profile.set_preference("browser.download.manager.showWhenStarting",
+                               False)
+        profile.set_preference("browser.download.dir", self.dwn_path)
+        profile.set_preference("browser.helperApps.neverAsk.saveToDisk",
+                               "application/zip")
+
+        prefs = {}
+        if self.browser_profile in ("lean", "headless"):
+            prefs.update(self.__ff_lean_prefs)
+        if self.browser_profile == "headless":
+            prefs.update(self.__ff_headless_prefs)
+        for name, value in prefs.items():
+            profile.set_preference(name, value)
+
+        options = FirefoxOptions()
+        if self.browser_profile == "headless":
+            options.add_argument("-headless")
+
+        # Create the driver itself.
+        return webdriver.Firefox(firefox_binary=binary,
+                                 firefox_profile=profile,
+                                 firefox_options=options)
+
+    def __record_startup_time(self, launch_time, load_time):
+        """
+        Logs how long the browser took to launch and to load Avida-ED, and
+        appends the times to the startup times file so that profiles can be
+        compared across runs.
+
+        :param launch_time: Time in seconds taken to launch the browser.
+
+        :param load_time: Time in seconds taken to load the Avida-ED page.
+
+        :return: None.
+        """
+        self.startup_times = {"browser": self.browser,
+                              "profile": self.browser_profile,
+                              "worker": self.worker_id,
+                              "launch_time": launch_time,
+                              "load_time": load_time,
+                              "timestamp": time.time()}
+        self.log.info("Started " + self.browser + " with '"
+                      + self.browser_profile + "' profile: launch took "
+                      + str(launch_time) + " seconds, page load took "
+                      + str(load_time) + " seconds.")
+        try:
+            makedirs(path.dirname(self.__startup_times_path), exist_ok=True)
+            with open(self.__startup_times_path, "a") as file:
+                file.write(json.dumps(self.startup_times) + "\n")
+        except OSError:
+            self.log.warning("Failed to record browser startup time.")
+
     def clean_webdriver_instance(self):
         """
         Clean up after a driver instance (specifically the web server if running
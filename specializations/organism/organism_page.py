@@ -40,6 +40,15 @@ class OrganismPage(BasePage):
     __org_nor = "norPerf"
     __org_xor = "xorPerf"
     __org_equ = "equPerf"
+    __org_functions = (("not", __org_not),
+                       ("nan", __org_nan),
+                       ("and", __org_and),
+                       ("orn", __org_orn),
+                       ("oro", __org_oro),
+                       ("ant", __org_ant),
+                       ("nor", __org_nor),
+                       ("xor", __org_xor),
+                       ("equ", __org_equ))
 
     # Locators for Active Organism
     __active_org_xpath = "//*/div[@id='activeOrgan']/div"
@@ -160,12 +169,10 @@ class OrganismPage(BasePage):
 
         :return: True if ALL of these buttons are enabled, False otherwise.
         """
-        for identifier in self.__org_rep_controls:
-            if self.__org_rep_control_disabled(
-                    self.get_element(identifier)) is True:
-
-                self.log.info("Org Rep. Controls are not all enabled.")
-                return False
+        disabled = self.__org_rep_controls_disabled_states()
+        if disabled is None or any(disabled.values()):
+            self.log.info("Org Rep. Controls are not all enabled.")
+            return False
         self.log.info("Org Rep. Controls are all enabled.")
         return True
 
@@ -175,26 +182,27 @@ class OrganismPage(BasePage):
 
         :return: True if ALL of these buttons are disabled, False otherwise.
         """
-        for identifier in self.__org_rep_controls:
-            if self.__org_rep_control_disabled(
-                    self.get_element(identifier)) is False:
-
-                self.log.info("Org. Rep. Controls are not all disabled.")
-                return False
+        disabled = self.__org_rep_controls_disabled_states()
+        if disabled is None or not all(disabled.values()):
+            self.log.info("Org. Rep. Controls are not all disabled.")
+            return False
 
         self.log.info("Org. Rep. Controls are all disabled.")
         return True
 
     def wait_until_org_controls_enabled(self):
         """
-        Use WebdriverWait to wait until the reproduction controls are enabled.
+        Waits until the reproduction controls are enabled.
 
         Times out after 30 seconds.
 
-        :return: None.
+        :return: True if the controls were enabled in time; False otherwise.
         """
-        WebDriverWait(self.driver, 30) \
-            .until(self.org_rep_controls_enabled)
+        enabled = self.wait_for_element_state(self.__org_rep_controls,
+                                              "enabled", 30)
+        self.log.info("Were Org Rep. Controls enabled in time? "
+                      + str(enabled))
+        return enabled
 
     def has_active_org(self):
         """
@@ -374,6 +382,25 @@ class OrganismPage(BasePage):
             self.log.info("Settings repeatability mode to 'Demo' in Org "
                           "Settings.")
 
+    def get_org_num_functions_performed(self):
+        """
+        Gets the number of times each function has been performed by the
+        reproducing organism in Organism View, reading the whole panel in one
+        call.
+
+        :return: Dict mapping each function name ('not', 'nan', 'and', 'orn',
+        'oro', 'ant', 'nor', 'xor', 'equ') to the integer number of times it
+        has been performed.
+        """
+        texts = self.read_many([(locator, "id", "text", name)
+                                for name, locator in self.__org_functions])
+        performed = {}
+        for name, _ in self.__org_functions:
+            text = texts.get(name)
+            performed[name] = int(text) if text is not None else None
+        self.log.info("Org. functions performed: " + str(performed))
+        return performed
+
     def get_org_num_not_performed(self):
         """
         Gets the number of NOT functions performed by the reproducing organism
@@ -455,17 +482,25 @@ class OrganismPage(BasePage):
         """
         return int(self.get_text(self.__org_equ))
 
-    def __org_rep_control_disabled(self, element):
-        """
-        Determines if an organism reproduction control (e.g Reset) is disabled.
-
-        :param element: The org. rep. control WebElement that is to be checked.
-
-        :return: True if element is disabled, false otherwise.
-        """
-        disabled = self.element_has_attr(element=element,
-                                         attr_name=self.__org_rep_disabled)
-        self.log.info("Is Organism Reproduction control button disabled? "
+    def __org_rep_controls_disabled_states(self):
+        """
+        Determines which organism reproduction controls (e.g Reset) are
+        disabled, reading all of them in one call.
+
+        :return: Dict mapping each control id to True if it is disabled, False
+        otherwise, or None if the controls could not be read.
+        """
+        attrs = self.read_many([(identifier, "id",
+                                 "attribute:" + self.__org_rep_disabled)
+                                for identifier in self.__org_rep_controls])
+        if any(identifier not in attrs
+               for identifier in self.__org_rep_controls):
+            self.log.warning("Failed to read the state of the Organism "
+                             "Reproduction control buttons.")
+            return None
+        disabled = {identifier: attrs[identifier] is not None
+                    for identifier in self.__org_rep_controls}
+        self.log.info("Are Organism Reproduction control buttons disabled? "
                       + str(disabled))
         return disabled
 
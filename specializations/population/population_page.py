@@ -1,8 +1,98 @@
+import base64
 import logging
+import time
+
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
 
 from base.base_page import BasePage
+from base.page_macro import PageMacro
 from utilities.custom_logger import create_custom_logger
 
+# Pairs of (key in av.grd.popStatsMsg, field name in PopStatsSnapshot).
+_pop_stats_fields = (("update", "update"),
+                     ("organisms", "organisms"),
+                     ("ave_fitness", "ave_fitness"),
+                     ("ave_age", "ave_age"),
+                     ("ave_gestation_time", "ave_gestation_time"),
+                     ("ave_metabolic_rate", "ave_metabolic_rate"),
+                     ("not", "num_not"),
+                     ("nand", "num_nan"),
+                     ("and", "num_and"),
+                     ("orn", "num_orn"),
+                     ("or", "num_oro"),
+                     ("andn", "num_ant"),
+                     ("nor", "num_nor"),
+                     ("xor", "num_xor"),
+                     ("equ", "num_equ"))
+
+# Immutable record of av.grd.popStatsMsg plus the other dish values that are
+# usually checked alongside it (see PopulationPage.snapshot_pop_stats).
+PopStatsSnapshot = namedtuple(
+    "PopStatsSnapshot",
+    [field for _, field in _pop_stats_fields]
+    + ["update_num", "cols", "rows", "mute_rate"])
+
+# Fields of av.grd.msg averaged over the viable organisms in the dish by
+# PopulationPage.calculate_pop_averages (and by default grid_aggregates).
+_grid_average_fields = ("fitness", "gestation", "metabolism")
+
+# A cell holds a viable organism if this av.grd.msg field is positive there.
+# Shared by calculate_pop_averages and grid_aggregates so that they agree.
+_grid_viability_field = "fitness"
+
+# Statistics computed by PopulationPage.grid_aggregates by default.
+_grid_default_stats = ("count", "sum", "mean", "min", "max")
+
+# Pairs of (array in av.pch, field name in GraphTail) for the series plotted
+# in the population graph.
+_graph_series = (("aveNum", "num_orgs"),
+                 ("aveFit", "avg_fit"),
+                 ("aveEar", "avg_rate"),
+                 ("aveCst", "avg_cost"))
+
+# Values read from the end of every av.pch series (see
+# PopulationPage.gr_read_pop_series). Each series field is a list of the values
+# from that series' index in start on. start and length map each series field
+# to its own index and length, since the series don't always grow together, and
+# length is the cursor to pass as 'since' to read only newer values. update is
+# av.grd.updateNum when the series were read.
+GraphTail = namedtuple("GraphTail",
+                       ["start", "length", "update"]
+                       + [field for _, field in _graph_series])
+
+# Pairs of (GraphTail field, PopStatsSnapshot field) that should hold the same
+# values at every update (see PopulationPage.audit_pop_history).
+_graph_stats_fields = (("num_orgs", "organisms"),
+                       ("avg_fit", "ave_fitness"),
+                       ("avg_rate", "ave_metabolic_rate"),
+                       ("avg_cost", "ave_gestation_time"))
+
+# Result of PopulationPage.audit_pop_history. first_divergence is the first
+# update at which the graph and the stats disagree (None if they never do),
+# divergence_values maps each field that disagrees there to its (stats, graph)
+# values, and errors maps each field to its error statistics. misalignment
+# describes why the graph couldn't be lined up with the stats (None if it
+# could), in which case nothing is reported as diverging.
+HistoryAudit = namedtuple("HistoryAudit",
+                          ["passed", "updates_checked", "first_divergence",
+                           "divergence_values", "errors", "misalignment"])
+
+# Largest number of updates by which audit_pop_history looks for the graph
+# being ahead of or behind the stats before reporting a divergence.
+_max_history_shift = 2
+
+# Batch of messages captured by the in-page update recorder (see
+# PopulationPage.drain_updates). stats is a list of PopStatsSnapshots, grids is
+# a list of dicts holding each grid message's update and data arrays, and the
+# dropped counts are how many messages were overwritten in the ring buffers.
+# installed is False if the recorder had to be (re)installed, in which case
+# messages sent before the call were missed.
+UpdateBatch = namedtuple("UpdateBatch", ["stats", "grids", "dropped_stats",
+                                         "dropped_grids", "installed"])
+
 
 class PopulationPage(BasePage):
     """
@@ -49,6 +139,446 @@ class PopulationPage(BasePage):
     __new_dish_saveconf_xpath = "//*/span[@widgetid='newSaveConfig']"
     __new_dish_savepop_xpath = "//*/span[@widgetid='newSaveWorld']"
 
+    # Locators read when capturing the state of the app for fast resets.
+    __state_inputs = [__dish_cols_box, __dish_rows_box, __mut_rate_input,
+                      __pause_update_input]
+    __state_radios = [__manual_update_btn, __auto_update_btn]
+    __state_panels = [__setup_block_id, __stats_window]
+
+    # Ids that the checks below read from a UIState, which BasePage adds to
+    # its probe (see BasePage.probe_state).
+    _probe_visible_ids = [__setup_block_id, __stats_window]
+    _probe_text_ids = [__setup_button_id, __run_pause_pop_button]
+
+    # Javascript that reads the parts of the app's state that a fast reset
+    # restores. Arguments are the input ids, radio ids, panel ids, and the id
+    # of the Run/Pause button.
+    __app_state_script = """
+        var registry = (""" + BasePage._js_dijit_registry + """)();
+        var isVisible = """ + BasePage._js_is_visible + """;
+        var state = {inputs: {}, radios: {}, panels: {}};
+        arguments[0].forEach(function (id) {
+            var widget = registry && registry.byId(id);
+            var el = document.getElementById(id);
+            state.inputs[id] = widget ? widget.get('value')
+                                      : (el ? el.value : null);
+        });
+        arguments[1].forEach(function (id) {
+            var el = document.getElementById(id);
+            state.radios[id] = el ? el.getAttribute('aria-checked') : null;
+        });
+        arguments[2].forEach(function (id) {
+            state.panels[id] = isVisible(document.getElementById(id));
+        });
+        var btn = document.getElementById(arguments[3]);
+        state.run_text = btn ? btn.textContent.trim() : null;
+        state.update_num = av.grd.updateNum;
+        state.active_org = document.querySelector('#activeOrgan > div') !== null;
+        state.dialog_open = Array.prototype.some.call(
+            document.querySelectorAll('.dijitDialog'), isVisible);
+        return state;
+    """
+
+    # Javascript that puts the environmental settings back to captured values.
+    # Arguments are the captured inputs and radios.
+    __restore_settings_script = """
+        var registry = (""" + BasePage._js_dijit_registry + """)();
+        var inputs = arguments[0];
+        var radios = arguments[1];
+        Object.keys(inputs).forEach(function (id) {
+            var widget = registry && registry.byId(id);
+            var el = document.getElementById(id);
+            if (widget) {
+                widget.set('value', inputs[id]);
+            } else if (el) {
+                el.value = inputs[id];
+                el.dispatchEvent(new Event('input', {bubbles: true}));
+                el.dispatchEvent(new Event('change', {bubbles: true}));
+            }
+        });
+        Object.keys(radios).forEach(function (id) {
+            var el = document.getElementById(id);
+            if (radios[id] !== 'true' || el === null
+                    || el.getAttribute('aria-checked') === 'true') {
+                return;
+            }
+            var widget = registry && registry.byId(id);
+            if (widget) {
+                widget.set('checked', true);
+            } else {
+                el.click();
+            }
+        });
+    """
+
+    # Javascript that reads every value stored in a PopStatsSnapshot.
+    __pop_stats_script = (
+        "var msg = av.grd.popStatsMsg || {}; return ["
+        + ", ".join("msg['" + key + "']" for key, _ in _pop_stats_fields)
+        + ", av.grd.updateNum, av.grd.cols, av.grd.rows,"
+          " av.dom.muteInput.value];")
+
+    # Javascript that (once per page load) hooks av.grd.popStatsMsg and
+    # av.grd.msg so that every message the app receives is also appended to a
+    # ring buffer in window.__avedRecorder. Arguments are the popStatsMsg keys
+    # to record and the capacities of the stats and grid buffers. Returns
+    # whether the recorder was already installed.
+    __recorder_install_script = """
+        if (window.__avedRecorder) {
+            return true;
+        }
+        var keys = arguments[0];
+        var ring = function (limit) {
+            return {items: new Array(limit), start: 0, count: 0, dropped: 0,
+                    limit: limit};
+        };
+        var push = function (buffer, item) {
+            buffer.items[(buffer.start + buffer.count) % buffer.limit] = item;
+            if (buffer.count < buffer.limit) {
+                buffer.count += 1;
+            } else {
+                buffer.start = (buffer.start + 1) % buffer.limit;
+                buffer.dropped += 1;
+            }
+        };
+        var hook = function (obj, prop, onSet) {
+            var value = obj[prop];
+            Object.defineProperty(obj, prop, {
+                configurable: true,
+                enumerable: true,
+                get: function () { return value; },
+                set: function (newValue) {
+                    value = newValue;
+                    try {
+                        onSet(newValue);
+                    } catch (e) {}
+                }
+            });
+        };
+        var rec = window.__avedRecorder = {stats: ring(arguments[1]),
+                                           grids: ring(arguments[2])};
+        var data = function (field) {
+            return field ? field['data'] : null;
+        };
+        hook(av.grd, 'popStatsMsg', function (msg) {
+            if (!msg) {
+                return;
+            }
+            push(rec.stats, keys.map(function (key) { return msg[key]; })
+                .concat([av.grd.updateNum, av.grd.cols, av.grd.rows,
+                         av.dom.muteInput.value]));
+        });
+        hook(av.grd, 'msg', function (msg) {
+            if (!msg) {
+                return;
+            }
+            push(rec.grids, {update: msg.update,
+                             fitness: data(msg.fitness),
+                             gestation: data(msg.gestation),
+                             metabolism: data(msg.metabolism)});
+        });
+        return false;
+    """
+
+    # Javascript that empties the recorder's ring buffers and returns their
+    # contents in order.
+    __recorder_drain_script = """
+        var rec = window.__avedRecorder;
+        var drain = function (buffer) {
+            var items = [];
+            for (var i = 0; i < buffer.count; i++) {
+                items.push(buffer.items[(buffer.start + i) % buffer.limit]);
+            }
+            var dropped = buffer.dropped;
+            buffer.items = new Array(buffer.limit);
+            buffer.start = 0;
+            buffer.count = 0;
+            buffer.dropped = 0;
+            return [items, dropped];
+        };
+        var stats = drain(rec.stats);
+        var grids = drain(rec.grids);
+        return [stats[0], grids[0], stats[1], grids[1]];
+    """
+
+    # Javascript that reads the data arrays of the given av.grd.msg fields and
+    # returns each one as a base64 encoded, little-endian Float64Array (empty
+    # cells become NaN), or null if the field has no data.
+    __grid_data_script = """
+        var msg = av.grd.msg;
+        if (!msg) {
+            return null;
+        }
+        var encode = function (values) {
+            var array = new Float64Array(values.length);
+            for (var i = 0; i < values.length; i++) {
+                var value = values[i];
+                array[i] = (value === null || value === undefined)
+                    ? NaN : value;
+            }
+            var bytes = new Uint8Array(array.buffer);
+            var chunks = [];
+            for (var j = 0; j < bytes.length; j += 0x8000) {
+                chunks.push(String.fromCharCode.apply(
+                    null, bytes.subarray(j, j + 0x8000)));
+            }
+            return btoa(chunks.join(''));
+        };
+        var results = {};
+        arguments[0].forEach(function (field) {
+            var data = msg[field] ? msg[field]['data'] : null;
+            results[field] = data ? encode(data) : null;
+        });
+        return results;
+    """
+
+    # Javascript that computes statistics of av.grd.msg fields over the
+    # viable cells of the dish, so that only the results are sent back.
+    # Arguments are the fields, the statistics, and the number of histogram
+    # bins. Percentiles ('p50', 'p90', etc.) interpolate linearly between the
+    # closest values, as NumPy's percentile does by default.
+    __grid_aggregates_script = """
+        var msg = av.grd.msg;
+        var viabilityField = '""" + _grid_viability_field + """';
+        if (!msg || !msg[viabilityField] || !msg[viabilityField]['data']) {
+            return null;
+        }
+        var fields = arguments[0];
+        var stats = arguments[1];
+        var bins = arguments[2];
+        var viability = msg[viabilityField]['data'];
+        var viable = [];
+        for (var i = 0; i < viability.length; i++) {
+            if (viability[i] !== null && viability[i] > 0) {
+                viable.push(i);
+            }
+        }
+        var percentile = function (sorted, p) {
+            var rank = p / 100 * (sorted.length - 1);
+            var low = Math.floor(rank);
+            var high = Math.ceil(rank);
+            return sorted[low] + (sorted[high] - sorted[low]) * (rank - low);
+        };
+        var histogram = function (values, min, max) {
+            var width = (max - min) / bins;
+            var counts = [];
+            var edges = [];
+            for (var b = 0; b < bins; b++) {
+                counts.push(0);
+                edges.push(min + width * b);
+            }
+            edges.push(max);
+            values.forEach(function (value) {
+                var bin = width > 0 ? Math.floor((value - min) / width) : 0;
+                counts[Math.min(bin, bins - 1)] += 1;
+            });
+            return {edges: edges, counts: counts};
+        };
+        var results = {viable: viable.length};
+        fields.forEach(function (field) {
+            var data = msg[field] ? msg[field]['data'] : null;
+            if (!data) {
+                results[field] = null;
+                return;
+            }
+            var values = viable.map(function (index) { return data[index]; });
+            var sum = 0;
+            var min = Infinity;
+            var max = -Infinity;
+            values.forEach(function (value) {
+                sum += value;
+                min = Math.min(min, value);
+                max = Math.max(max, value);
+            });
+            var sorted = null;
+            var result = {};
+            stats.forEach(function (stat) {
+                var empty = values.length === 0;
+                if (stat === 'count') {
+                    result[stat] = values.length;
+                } else if (stat === 'sum') {
+                    result[stat] = sum;
+                } else if (stat === 'mean') {
+                    result[stat] = empty ? null : sum / values.length;
+                } else if (stat === 'min') {
+                    result[stat] = empty ? null : min;
+                } else if (stat === 'max') {
+                    result[stat] = empty ? null : max;
+                } else if (stat === 'histogram') {
+                    result[stat] = empty ? null : histogram(values, min, max);
+                } else if (stat.charAt(0) === 'p') {
+                    if (sorted === null) {
+                        sorted = values.slice().sort(function (a, b) {
+                            return a - b;
+                        });
+                    }
+                    result[stat] = empty ? null
+                        : percentile(sorted, parseFloat(stat.slice(1)));
+                }
+            });
+            results[field] = result;
+        });
+        return results;
+    """
+
+    # Javascript that reads the end of every av.pch series. Arguments are the
+    # series names and the index to read each series from (null for just the
+    # last value). Each series is read up to its own length, and the current
+    # update is read along with them.
+    __graph_tail_script = """
+        var since = arguments[1];
+        var series = arguments[0].map(function (key) {
+            return (av.pch && av.pch[key]) || [];
+        });
+        var starts = series.map(function (values, i) {
+            return since === null ? Math.max(values.length - 1, 0)
+                                  : Math.min(since[i], values.length);
+        });
+        var lengths = series.map(function (values) {
+            return values.length;
+        });
+        var slices = series.map(function (values, i) {
+            return values.slice(starts[i]);
+        });
+        var update = av.grd ? av.grd.updateNum : null;
+        return [starts, lengths, update].concat(slices);
+    """
+
+    # Javascript that advances a paused experiment one update at a time by
+    # clicking the 'Forward' button and waiting for av.grd.popStatsMsg to
+    # report the next update before clicking again. Arguments are the ids of
+    # the 'Forward' and Run/Pause buttons, the number of updates, and the time
+    # (in ms) to wait for each update.
+    __advance_script = """
+        var done = arguments[arguments.length - 1];
+        var forward = document.getElementById(arguments[0]);
+        var runPause = document.getElementById(arguments[1]);
+        var count = arguments[2];
+        var stepTimeout = arguments[3];
+        var read = function () {
+            var msg = av.grd.popStatsMsg;
+            return msg ? msg.update : null;
+        };
+        var start = read();
+        var startTime = Date.now();
+        var result = function (steps, error) {
+            return {steps: steps, start_update: start, update: read(),
+                    elapsed: (Date.now() - startTime) / 1000, error: error};
+        };
+        if (forward === null) {
+            done(result(0, 'Forward button not found.'));
+            return;
+        }
+        if (runPause !== null && runPause.textContent.trim() !== 'Run') {
+            done(result(0, 'Experiment is running.'));
+            return;
+        }
+        new Promise(function (resolve) {
+            (function step(steps) {
+                if (steps === count) {
+                    resolve(result(steps, null));
+                    return;
+                }
+                var previous = read();
+                var clicked = Date.now();
+                forward.click();
+                (function poll() {
+                    var current = read();
+                    if (current !== null && previous !== null
+                            && current > previous + 1) {
+                        resolve(result(steps + 1, 'Skipped from update '
+                            + previous + ' to ' + current + '.'));
+                    } else if (current !== null
+                            && (previous === null || current > previous)) {
+                        step(steps + 1);
+                    } else if (Date.now() - clicked > stepTimeout) {
+                        resolve(result(steps, 'Timed out waiting for update '
+                            + (previous === null ? 0 : previous + 1) + '.'));
+                    } else {
+                        setTimeout(poll, 5);
+                    }
+                })();
+            })(0);
+        }).then(done);
+    """
+
+    # Javascript that (once per page load) wraps the app's grid drawing
+    # function and Plotly's redrawing functions so that they can be skipped or
+    # throttled, then sets whether rendering is suppressed. Arguments are
+    # whether to suppress rendering (null to leave it as it is) and the
+    # minimum time (in ms) between draws while suppressed (0 to skip every
+    # draw). Skipped calls are queued, and replayed in order before the next
+    # call that is let through and when rendering is turned back on, so that
+    # the dish and graph end up as if nothing was skipped. A queued newPlot or
+    # react call replaces the calls queued before it for the same plot.
+    __render_script = """
+        var r = window.__avedRender;
+        if (!r) {
+            r = window.__avedRender = {suppressed: false, interval: 0,
+                                       hooked: [], pending: [], last: {},
+                                       skipped: 0};
+            r.flush = function () {
+                var pending = r.pending;
+                r.pending = [];
+                pending.forEach(function (call) {
+                    call.original.apply(call.context, call.args);
+                });
+            };
+            var hook = function (owner, ownerName, name, replaces,
+                                 skipValue) {
+                if (!owner || typeof owner[name] !== 'function') {
+                    return;
+                }
+                var key = ownerName + '.' + name;
+                var original = owner[name];
+                owner[name] = function () {
+                    if (r.suppressed) {
+                        var now = Date.now();
+                        if (r.interval <= 0
+                                || now - (r.last[key] || 0) < r.interval) {
+                            var target = arguments[0];
+                            if (replaces) {
+                                r.pending = r.pending.filter(function (call) {
+                                    return !call.plotly
+                                        || call.args[0] !== target;
+                                });
+                            }
+                            r.pending.push({original: original, context: this,
+                                            args: arguments,
+                                            plotly: ownerName === 'Plotly'});
+                            r.skipped += 1;
+                            return skipValue(arguments);
+                        }
+                        r.last[key] = now;
+                    }
+                    r.flush();
+                    return original.apply(this, arguments);
+                };
+                r.hooked.push(key);
+            };
+            hook(av.grd, 'av.grd', 'drawGridSetupFn', false, function () {
+                return undefined;
+            });
+            ['newPlot', 'react', 'restyle', 'relayout', 'redraw'].forEach(
+                function (name) {
+                    hook(window.Plotly, 'Plotly', name,
+                         name === 'newPlot' || name === 'react',
+                         function (args) {
+                             return Promise.resolve(args[0]);
+                         });
+                });
+        }
+        if (arguments[0] !== null) {
+            r.suppressed = arguments[0];
+            r.interval = arguments[1];
+        }
+        if (!r.suppressed) {
+            r.flush();
+        }
+        return {hooked: r.hooked, skipped: r.skipped,
+                suppressed: r.suppressed, interval: r.interval};
+    """
+
     def __init__(self, driver):
         """
         Sets up the page for use at initialization.
@@ -58,23 +588,94 @@ class PopulationPage(BasePage):
         super().__init__(driver)
         self.driver = driver
 
-    def env_settings_displayed(self):
+    def capture_startup_state(self, overwrite=False):
+        """
+        Captures the state of the app (environmental settings, panels, Freezer
+        contents, etc.) so that fast_reset_avida_ed can later return to it.
+        Should be called right after Avida-ED has first finished loading.
+
+        The state is stored on the driver so that it is shared by every page
+        object using that driver.
+
+        :param overwrite: True if an already captured state should be replaced.
+
+        :return: The captured state (a dict).
+        """
+        state = getattr(self.driver, "_aved_startup_state", None)
+        if state is None or overwrite:
+            state = self.__read_app_state()
+            self.driver._aved_startup_state = state
+            self.log.info("Captured startup state: " + str(state))
+        return state
+
+    def fast_reset_avida_ed(self):
+        """
+        Puts Avida-ED back into the state captured by capture_startup_state
+        without reloading the page: the experiment is paused and discarded
+        through the app's own 'New' button, the environmental settings and
+        panels are restored, and the result is verified against the captured
+        state. If the verification fails (or no state has been captured), the
+        page is refreshed instead.
+
+        :return: True if the fast reset worked; False if the page had to be
+        refreshed.
+        """
+        startup = getattr(self.driver, "_aved_startup_state", None)
+        if startup is None:
+            self.log.warning("No startup state captured -- refreshing.")
+            self.refresh_avida_ed()
+            return False
+
+        # Stop and discard the current experiment.
+        self.pause_from_pop()
+        self.click_new_exp_nodlg()
+        if self.wait_until_visible(self.__new_dish_dlg, wait_time=1):
+            self.click_element(self.__new_dish_discard_xpath, "xpath")
+            self.wait_until_invisible(self.__new_dish_dlg)
+
+        # Restore the settings and panels.
+        self.execute_script(self.__restore_settings_script,
+                            startup["inputs"], startup["radios"])
+        if startup["panels"][self.__setup_block_id]:
+            self.show_env_settings()
+        else:
+            self.hide_env_settings()
+        if startup["panels"][self.__stats_window]:
+            self.show_pop_stats()
+        else:
+            self.hide_pop_stats()
+
+        # Check that we really are back where we started.
+        state = self.__read_app_state()
+        differences = [key for key in sorted(startup)
+                       if state.get(key) != startup[key]]
+        if differences:
+            self.log.warning("Fast reset did not restore " + str(differences)
+                             + " -- refreshing.")
+            self.refresh_avida_ed()
+            return False
+        self.log.info("Fast reset restored startup state.")
+        return True
+
+    def env_settings_displayed(self, state=None):
         """
         Determines whether the "Environmental Settings" panel within the
         "Population" page is displayed.
         
+        :param state: Optional UIState (from probe_state) to read the value
+        from instead of querying the page.
+
         :return: True if the "Environmental Settings" panel is displayed, false
         otherwise.
         """
-
-        setup_button_text = self.get_text(self.__setup_button_id)
-        displayed = (self.element_displayed(self.__setup_block_id) and
+        setup_button_text, setup_displayed = self.__setup_state(state)
+        displayed = (setup_displayed and
                      self.util.verify_text_matches(setup_button_text,
                                                    self.__setup_dish))
         self.log.info("Is Environmental Settings displayed? " + str(displayed))
         return displayed
 
-    def grid_displayed(self):
+    def grid_displayed(self, state=None):
         """
         Determines whether the main Petri dish grid on the "Population" page
         is displayed.
@@ -85,10 +686,13 @@ class PopulationPage(BasePage):
         fact that if the population window is not displayed, both functions will
         return false.
         
+        :param state: Optional UIState (from probe_state) to read the value
+        from instead of querying the page.
+
         :return: True if the Petri dish is displayed, false otherwise.
         """
-        setup_button_text = self.get_text(self.__setup_button_id)
-        displayed = (not self.element_displayed(self.__setup_block_id) and
+        setup_button_text, setup_displayed = self.__setup_state(state)
+        displayed = (not setup_displayed and
                      self.util.verify_text_matches(setup_button_text,
                                                    self.__setup_setup))
         self.log.info("Is grid displayed? " + str(displayed))
@@ -124,14 +728,20 @@ class PopulationPage(BasePage):
             else:
                 self.log.warning("Failed to hide environmental settings window.")
 
-    def pop_stats_displayed(self):
+    def pop_stats_displayed(self, state=None):
         """
         Checks if the stats panel within the "Population" pane of the Avida-ED
         website.
 
+        :param state: Optional UIState (from probe_state) to read the value
+        from instead of querying the page.
+
         :return: True if the stats panel is visible, false otherwise.
         """
-        pop_stats_displayed = self.element_displayed(self.__stats_window)
+        if state is not None:
+            pop_stats_displayed = state.visible.get(self.__stats_window, False)
+        else:
+            pop_stats_displayed = self.element_displayed(self.__stats_window)
         self.log.info("Is population statistics displayed? "
                       + str(pop_stats_displayed))
         return pop_stats_displayed
@@ -173,15 +783,21 @@ class PopulationPage(BasePage):
         """
         self.click_element(self.__run_pause_pop_button)
 
-    def runpause_text_is_run(self):
+    def runpause_text_is_run(self, state=None):
         """
         Checks whether the text of the 'Run'/'Pause' button underneath the dish
         currently says 'Run'.
 
+        :param state: Optional UIState (from probe_state) to read the value
+        from instead of querying the page.
+
         :return: True if button text is 'Run', false if it is not (in which case
         it must be 'Pause").
         """
-        btn_text = self.get_text(self.__run_pause_pop_button)
+        if state is not None:
+            btn_text = state.texts.get(self.__run_pause_pop_button)
+        else:
+            btn_text = self.get_text(self.__run_pause_pop_button)
         is_run = self.util.verify_text_matches(btn_text, self.__run_text)
         self.log.info("Is Run/Pause button text 'Run'? " + str(is_run))
         return is_run
@@ -205,6 +821,25 @@ class PopulationPage(BasePage):
             self.__click_runpause_pop_button()
             self.log.info("Paused experiment via button under dish.")
 
+    def wait_until_runpause_text_is_run(self, wait_time=30):
+        """
+        Waits until the text of the 'Run'/'Pause' button underneath the dish
+        says 'Run' (e.g. after the experiment has paused itself at an update).
+
+        :param wait_time: The amount of time in seconds to wait before giving
+        up.
+
+        :return: True if the button text became 'Run'; False otherwise.
+        """
+        predicate = ("var btn = document.getElementById('"
+                     + self.__run_pause_pop_button + "');"
+                     " return btn !== null"
+                     " && btn.textContent.trim() === '" + self.__run_text
+                     + "';")
+        return self.wait_for_condition(
+            predicate, wait_time,
+            description="Run/Pause button text is '" + self.__run_text + "'")
+
     def new_exp_dlg_displayed(self):
         """
         Determines if the dialog that is supposed to appear after clicking on
@@ -296,6 +931,7 @@ class PopulationPage(BasePage):
             failing_log_text = "Dialog box still open -- attempt to create new dish & save old dish conf. w/def. name" \
                                " failed."
         name_popup.accept()
+        self.invalidate_freezer_index()
         if self.wait_until_invisible(self.__new_dish_dlg):
             self.log.info(passing_log_text)
         else:
@@ -325,6 +961,7 @@ class PopulationPage(BasePage):
             failing_log_text = "Dialog box still open -- attempt to create new dish & save old dish pop w/def. name"   \
                                " failed."
         name_popup.accept()
+        self.invalidate_freezer_index()
         if self.wait_until_invisible(self.__new_dish_dlg):
             self.log.info(passing_log_text)
         else:
@@ -340,6 +977,111 @@ class PopulationPage(BasePage):
         self.log.info("Moved forward one update via 'Forward' button under dish"
                       ".")
 
+    def advance_updates(self, num_updates, step_wait_time=10,
+                        cache_reads=False):
+        """
+        Moves a paused experiment forward by exactly num_updates updates in a
+        single Javascript call. The 'Forward' button is clicked from inside the
+        page, and each click waits for the app to report the next update before
+        the following one is made.
+
+        :param num_updates: Number of updates to move forward.
+
+        :param step_wait_time: The amount of time in seconds to wait for each
+        update before giving up.
+
+        :param cache_reads: True if the app should then be marked as paused so
+        that reads are cached until the next action (see
+        DriverWrapper.mark_paused).
+
+        :return: True if exactly num_updates updates elapsed; False otherwise.
+        """
+        result = self.execute_async_script(
+            self.__advance_script, self.__forward_button,
+            self.__run_pause_pop_button, num_updates, step_wait_time * 1000,
+            wait_time=num_updates * step_wait_time)
+        if result is None:
+            self.log.warning("Failed to advance " + str(num_updates)
+                             + " updates.")
+            return False
+        self.last_wait_elapsed = result["elapsed"]
+        if result["error"] is not None or result["steps"] != num_updates:
+            self.log.warning("Advanced " + str(result["steps"]) + " of "
+                             + str(num_updates) + " updates (now at update "
+                             + str(result["update"]) + "): "
+                             + str(result["error"]))
+            return False
+        self.log.info("Advanced " + str(num_updates) + " updates from update "
+                      + str(result["start_update"]) + " to "
+                      + str(result["update"]) + " in "
+                      + str(result["elapsed"]) + " seconds.")
+        if cache_reads:
+            self.mark_paused()
+        return True
+
+    def suppress_rendering(self, min_interval=None):
+        """
+        Stops (or throttles) drawing of the dish grid and the population graph
+        so that experiments run faster when only their numbers matter. Lasts
+        until restore_rendering is called or the page is reloaded. Rendering
+        should be restored before checking anything visual.
+
+        :param min_interval: Minimum time in seconds between draws, or None to
+        skip every draw.
+
+        :return: True if any drawing function could be hooked; False
+        otherwise.
+        """
+        interval = 0 if min_interval is None else min_interval * 1000
+        state = self.execute_script(self.__render_script, True, interval)
+        if state is None or not state["hooked"]:
+            self.log.warning("Failed to suppress rendering: no drawing "
+                             "functions found.")
+            return False
+        self.log.info("Suppressed rendering of " + str(state["hooked"])
+                      + " (minimum interval " + str(min_interval) + ").")
+        return True
+
+    def restore_rendering(self):
+        """
+        Turns drawing of the dish grid and the population graph back on and
+        replays, in order, every draw that was skipped while it was
+        suppressed.
+
+        :return: True if rendering is on; False otherwise.
+        """
+        state = self.execute_script(self.__render_script, False, 0)
+        if state is None:
+            self.log.warning("Failed to restore rendering.")
+            return False
+        self.log.info("Restored rendering (" + str(state["skipped"])
+                      + " draws were skipped).")
+        return not state["suppressed"]
+
+    @contextmanager
+    def rendering_restored(self):
+        """
+        Context manager that turns rendering back on (see restore_rendering)
+        for the duration of a block, e.g. for visual checks in a test that
+        runs with rendering suppressed, then suppresses it again as it was.
+        Does nothing if rendering isn't suppressed.
+
+        Example Usage:
+        with self.pp.rendering_restored():
+            assert self.pp.grid_displayed()
+
+        :return: None.
+        """
+        state = self.execute_script(self.__render_script, None, None)
+        suppressed = state is not None and state["suppressed"]
+        if suppressed:
+            self.restore_rendering()
+        try:
+            yield
+        finally:
+            if suppressed:
+                self.suppress_rendering(state["interval"] / 1000 or None)
+
     def get_update_ui_text(self):
         """
         Gets the text from the UI element containing information about the
@@ -396,6 +1138,32 @@ class PopulationPage(BasePage):
         self.hide_env_settings()
         self.log.info("Edited population mutation rate to " + str(rate))
 
+    def env_settings_macro(self, cols=None, rows=None, mut_rate=None):
+        """
+        Creates a PageMacro that edits the dish size and mutation rate in the
+        environmental settings panel and reads each edited value back (under
+        the names 'cols', 'rows', and 'mut_rate'). The values are set through
+        the panel's widgets, so the panel doesn't need to be shown. More steps
+        can be added to the macro before it is run with run_macro.
+
+        :param cols: Optional input for the dish column number.
+
+        :param rows: Optional input for the dish row number.
+
+        :param mut_rate: Optional input for the mutation rate.
+
+        :return: The PageMacro.
+        """
+        macro = PageMacro("edit environmental settings")
+        for locator, name, value in ((self.__dish_cols_box, "cols", cols),
+                                     (self.__dish_rows_box, "rows", rows),
+                                     (self.__mut_rate_input, "mut_rate",
+                                      mut_rate)):
+            if value is not None:
+                macro.set_value(locator, value)
+                macro.read(locator, "property:value", name=name)
+        return macro
+
     def pause_at_update_enabled(self):
         """
         Determines if 'Pause at update' feature is turned on.
@@ -469,259 +1237,588 @@ class PopulationPage(BasePage):
         self.hide_env_settings()
         self.log.info("Edited 'pause at update' to update " + str(update))
 
-    def get_pop_current_update(self):
+    def snapshot_pop_stats(self):
+        """
+        Reads all of av.grd.PopStatsMsg along with av.grd.updateNum, the dish
+        dimensions, and the mutation rate in a single Javascript call.
+
+        The result can be passed to the get_pop_* getters (via their snapshot
+        param) so that checking many statistics costs one round trip.
+
+        :return: A PopStatsSnapshot containing the values, or None if the
+        values could not be read.
+        """
+        values = self.read_script(self.__pop_stats_script)
+        if values is None:
+            self.log.warning("Failed to take snapshot of population stats.")
+            return None
+        snapshot = PopStatsSnapshot(*values)
+        self.log.info("Took snapshot of population stats: " + str(snapshot))
+        return snapshot
+
+    def wait_until_update_reached(self, update, wait_time=30):
+        """
+        Waits until av.grd.PopStatsMsg reports that the experiment has reached
+        at least the given update.
+
+        :param update: The update number to wait for.
+
+        :param wait_time: The amount of time in seconds to wait before giving
+        up.
+
+        :return: True if the update was reached; False otherwise.
+        """
+        return self.wait_until_pop_stats_reach({"update": update}, wait_time)
+
+    def wait_until_pop_stats_reach(self, minimums, wait_time=30):
+        """
+        Waits until every given value in av.grd.PopStatsMsg is at least as large
+        as its minimum.
+
+        :param minimums: Dict mapping keys in av.grd.PopStatsMsg (e.g.
+        'organisms' or 'equ') to the minimum value expected for each.
+
+        :param wait_time: The amount of time in seconds to wait before giving
+        up.
+
+        :return: True if all of the minimums were reached; False otherwise.
+        """
+        conditions = ["msg['" + key + "'] >= " + str(minimum)
+                      for key, minimum in sorted(minimums.items())]
+        predicate = ("var msg = av.grd.popStatsMsg;"
+                     " return msg !== undefined && msg !== null && "
+                     + " && ".join(conditions) + ";")
+        return self.wait_for_condition(predicate, wait_time,
+                                       description=" and ".join(conditions))
+
+    def wait_until_update_stable(self, stable_time=0.5, wait_time=10,
+                                 cache_reads=False):
+        """
+        Waits until the current update has stopped changing, which is a sign
+        that the experiment is paused.
+
+        :param stable_time: Time in seconds that the update must stay the same.
+
+        :param wait_time: The amount of time in seconds to wait before giving
+        up.
+
+        :param cache_reads: True if, when the 'Run'/'Pause' button also says
+        'Run', the app should be marked as paused so that reads are cached
+        until the next action (see DriverWrapper.mark_paused). Tests that
+        check that nothing changes on its own should leave this off.
+
+        :return: True if the update stopped changing; False otherwise.
+        """
+        stable = self.wait_until_stable("av.grd.popStatsMsg.update",
+                                        stable_time, wait_time)
+        if cache_reads and stable and self.runpause_text_is_run():
+            self.mark_paused()
+        return stable
+
+    def install_update_recorder(self, stats_limit=10000, grid_limit=100):
+        """
+        Installs a recorder in the page that keeps every population statistics
+        and grid message the app receives, so that no update is missed between
+        calls to drain_updates. The recorder lasts until the page is reloaded.
+
+        :param stats_limit: Number of population statistics messages kept
+        before the oldest are overwritten.
+
+        :param grid_limit: Number of grid messages kept before the oldest are
+        overwritten. These are much larger, so fewer are kept.
+
+        :return: True if the recorder was already installed; False otherwise.
+        """
+        installed = self.execute_script(
+            self.__recorder_install_script,
+            [key for key, _ in _pop_stats_fields], stats_limit, grid_limit,
+            mutating=False)
+        if not installed:
+            self.log.info("Installed update recorder.")
+        return installed
+
+    def drain_updates(self):
+        """
+        Gets (and removes) every message captured by the update recorder since
+        the last call, in a single Javascript call. Installs the recorder if it
+        isn't installed (e.g. after the page has been refreshed).
+
+        :return: An UpdateBatch holding the captured messages.
+        """
+        installed = self.install_update_recorder()
+        stats, grids, dropped_stats, dropped_grids = \
+            self.execute_script(self.__recorder_drain_script, mutating=False)
+        batch = UpdateBatch([PopStatsSnapshot(*values) for values in stats],
+                            grids, dropped_stats, dropped_grids, installed)
+        self.log.info("Drained " + str(len(batch.stats)) + " stats messages and "
+                      + str(len(batch.grids)) + " grid messages ("
+                      + str(dropped_stats) + " and " + str(dropped_grids)
+                      + " dropped).")
+        if not installed:
+            self.log.warning("Update recorder was not installed before "
+                             "draining; earlier updates were missed.")
+        return batch
+
+    def measure_update_rate(self, duration=10, sample_interval=0.5):
+        """
+        Measures how many updates per second a running experiment completes by
+        sampling the current update for a fixed wall-clock window.
+
+        :param duration: Length of the window in seconds.
+
+        :param sample_interval: Time in seconds between samples of the update.
+
+        :return: Updates per second over the window, or None if the update
+        could not be read.
+        """
+        start_update = self.get_pop_current_update()
+        start_time = time.perf_counter()
+        end_update, end_time = start_update, start_time
+        while end_time - start_time < duration:
+            time.sleep(sample_interval)
+            end_update = self.get_pop_current_update()
+            end_time = time.perf_counter()
+        if start_update is None or end_update is None:
+            self.log.warning("Failed to measure update rate.")
+            return None
+        rate = (end_update - start_update) / (end_time - start_time)
+        self.log.info("Measured update rate of " + str(rate)
+                      + " updates per second.")
+        return rate
+
+    def get_pop_current_update(self, snapshot=None, fresh=False):
         """
         Gets the current update from av.grd.PopStatsMsg.
 
         This is the main storage for this value as opposed to the info stored in
         the Plotly graph.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
+        :param fresh: True if the page should be read even if reads are being
+        cached (see DriverWrapper.mark_paused), e.g. to check that the update
+        really stays the same while paused.
+
         :return: Integer value of current update.
         """
-        return self.execute_script("return av.grd.popStatsMsg.update")
+        return self.__get_pop_stat("update", snapshot, fresh)
 
-    def get_pop_num_orgs(self):
+    def get_pop_num_orgs(self, snapshot=None):
         """
         Gets the current number of organisms from av.grd.PopStatsMsg.
 
         This is the main storage for this value as opposed to the info stored in
         the Plotly graph.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Integer value of current count of all organisms in dish.
         """
-        return self.execute_script("return av.grd.popStatsMsg.organisms")
+        return self.__get_pop_stat("organisms", snapshot)
 
-    def get_pop_avg_fit(self):
+    def get_pop_avg_fit(self, snapshot=None):
         """
         Gets the current average organism fitness from av.grd.PopStatsMsg.
 
         This is the main storage for this value as opposed to the info stored in
         the Plotly graph.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Float value of the average fitness.
         """
-        return self.execute_script("return av.grd.popStatsMsg.ave_fitness")
+        return self.__get_pop_stat("ave_fitness", snapshot)
 
-    def get_pop_avg_age(self):
+    def get_pop_avg_age(self, snapshot=None):
         """
         Gets the current average organism age from av.grd.PopStatsMsg.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Float value of the average age.
         """
-        return self.execute_script("return av.grd.popStatsMsg.ave_age")
+        return self.__get_pop_stat("ave_age", snapshot)
 
-    def get_pop_avg_offspring_cost(self):
+    def get_pop_avg_offspring_cost(self, snapshot=None):
         """
         Gets the current average offspring cost from av.grd.PopStatsMsg.
 
         This is the main storage for this value as opposed to the info stored in
         the Plotly graph.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Integer value of current update.
         """
-        return self.execute_script("return av.grd.popStatsMsg.ave_gestation_time")
+        return self.__get_pop_stat("ave_gestation_time", snapshot)
 
-    def get_pop_avg_energy_rate(self):
+    def get_pop_avg_energy_rate(self, snapshot=None):
         """
         Gets the current avg. energy acquisition rate from av.grd.PopStatsMsg.
 
         This is the main storage for this value as opposed to the info stored in
         the Plotly graph.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Integer value of avg. energy acquisition rate.
         """
-        return self.execute_script("return av.grd.popStatsMsg.ave_metabolic_rate")
+        return self.__get_pop_stat("ave_metabolic_rate", snapshot)
 
-    def get_pop_num_performing_not(self):
+    def get_pop_num_performing_not(self, snapshot=None):
         """
         Gets the current number of organisms that can take advantage of notose
         resource.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Number of orgs that can perform 'not'.
         """
-        return self.execute_script("return av.grd.popStatsMsg.not")
+        return self.__get_pop_stat("not", snapshot)
 
-    def get_pop_num_performing_nan(self):
+    def get_pop_num_performing_nan(self, snapshot=None):
         """
         Gets the current number of organisms that can take advantage of nanose
         resource.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Number of orgs that can perform 'nan'.
         """
-        return self.execute_script("return av.grd.popStatsMsg.nand")
+        return self.__get_pop_stat("nand", snapshot)
 
-    def get_pop_num_performing_and(self):
+    def get_pop_num_performing_and(self, snapshot=None):
         """
         Gets the current number of organisms that can take advantage of andose
         resource.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Number of orgs that can perform 'and'.
         """
-        return self.execute_script("return av.grd.popStatsMsg.and")
+        return self.__get_pop_stat("and", snapshot)
 
-    def get_pop_num_performing_orn(self):
+    def get_pop_num_performing_orn(self, snapshot=None):
         """
         Gets the current number of organisms that can take advantage of ornose
         resource.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Number of orgs that can perform 'orn'.
         """
-        return self.execute_script("return av.grd.popStatsMsg.orn")
+        return self.__get_pop_stat("orn", snapshot)
 
-    def get_pop_num_performing_oro(self):
+    def get_pop_num_performing_oro(self, snapshot=None):
         """
         Gets the current number of organisms that can take advantage of orose
         resource.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Number of orgs that can perform 'oro'.
         """
-        return self.execute_script("return av.grd.popStatsMsg.or")
+        return self.__get_pop_stat("or", snapshot)
 
-    def get_pop_num_performing_ant(self):
+    def get_pop_num_performing_ant(self, snapshot=None):
         """
         Gets the current number of organisms that can take advantage of andnose
         resource.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Number of orgs that can perform 'ant'.
         """
-        return self.execute_script("return av.grd.popStatsMsg.andn")
+        return self.__get_pop_stat("andn", snapshot)
 
-    def get_pop_num_performing_nor(self):
+    def get_pop_num_performing_nor(self, snapshot=None):
         """
         Gets the current number of organisms that can take advantage of norose
         resource.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Number of orgs that can perform 'nor'.
         """
-        return self.execute_script("return av.grd.popStatsMsg.nor")
+        return self.__get_pop_stat("nor", snapshot)
 
-    def get_pop_num_performing_xor(self):
+    def get_pop_num_performing_xor(self, snapshot=None):
         """
         Gets the current number of organisms that can take advantage of xorose
         resource.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Number of orgs that can perform 'xor'.
         """
-        return self.execute_script("return av.grd.popStatsMsg.xor")
+        return self.__get_pop_stat("xor", snapshot)
 
-    def get_pop_num_performing_equ(self):
+    def get_pop_num_performing_equ(self, snapshot=None):
         """
         Gets the current number of organisms that can take advantage of equose
         resource.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Number of orgs that can perform 'equ'.
         """
-        return self.execute_script("return av.grd.popStatsMsg.equ")
+        return self.__get_pop_stat("equ", snapshot)
 
-    def gr_get_pop_current_update(self):
+    def gr_get_pop_current_update(self, snapshot=None):
         """
         Gets the current update from av.grd.updateNum.
 
         Note: This gets a number from the Plotly graph, not the underlying
         message from Avida.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Integer value of the current update.
         """
-        return self.execute_script("return av.grd.updateNum")
+        if snapshot is not None:
+            return snapshot.update_num
+        return self.read_script("return av.grd.updateNum")
 
-    def __gr_get_pop_num_orgs_list(self):
+    def gr_read_pop_series(self, since=None):
         """
-        Gets the list of the current amount of organisms for each update from
-        av.pch.
+        Reads the end of the av.pch series (number of organisms, average
+        fitness, average energy acquisition rate, and average offspring cost)
+        in a single Javascript call, without transferring the whole history.
 
-         Note: This gets a number from the Plotly graph, not the underlying
-        message from Avida.
+        Note: These are the numbers from the Plotly graph, not the underlying
+        messages from Avida.
 
-        :return: List of integers with number of organisms in dish at each
-        update.
+        :param since: Index to read every series from, a dict mapping each
+        series field to its own index (usually the length of a previous
+        GraphTail), or None to read only the last value of each series.
+
+        :return: GraphTail holding the values read, or None if the series
+        could not be read.
         """
-        return self.execute_script("return av.pch.aveNum")
+        fields = [field for _, field in _graph_series]
+        if since is not None:
+            since = [since[field] if isinstance(since, dict) else since
+                     for field in fields]
+        values = self.read_script(self.__graph_tail_script,
+                                  [key for key, _ in _graph_series], since)
+        if values is None:
+            self.log.warning("Failed to read the graph series.")
+            return None
+        tail = GraphTail(dict(zip(fields, values[0])),
+                         dict(zip(fields, values[1])), *values[2:])
+        self.log.info("Read " + str(sum(len(getattr(tail, field))
+                                        for field in fields))
+                      + " values from the end of the graph series.")
+        return tail
 
-    def gr_get_pop_curr_num_orgs(self):
+    def gr_get_pop_curr_num_orgs(self, tail=None):
         """
         Gets the current number of organisms from av.pch.
 
-        :return: Integer value of current number of organisms.
-        """
-        return self.__gr_get_pop_num_orgs_list()[-1]
+        :param tail: Optional GraphTail to read the value from instead of
+        querying the page.
 
-    def __gr_get_pop_avg_fitness_list(self):
-        """
-        Gets the list of average fitnesses for each update in experiment.
-
-        :return: List of average fitnesses (floats).
+        :return: Integer value of current number of organisms.
         """
-        return self.execute_script("return av.pch.aveFit")
+        return self.__gr_get_last("num_orgs", tail)
 
-    def gr_get_pop_curr_avg_fit(self):
+    def gr_get_pop_curr_avg_fit(self, tail=None):
         """
         Gets the current average fitness from av.pch.
 
         Note: This gets a number from the Plotly graph, not the underlying
         message from Avida.
 
+        :param tail: Optional GraphTail to read the value from instead of
+        querying the page.
+
         :return: Float value of average fitness.
         """
-        return self.__gr_get_pop_avg_fitness_list()[-1]
+        return self.__gr_get_last("avg_fit", tail)
 
-    def __gr_get_pop_avg_rate(self):
+    def gr_get_pop_curr_avg_rate(self, tail=None):
         """
-        Gets list of average energy acquisition rates for each update in exp.
+        Gets the current average energy acquisition rate from av.pch.
 
         Note: This gets a number from the Plotly graph, not the underlying
         message from Avida.
 
-        :return: List of average rates.
+        :param tail: Optional GraphTail to read the value from instead of
+        querying the page.
+
+        :return: Float value of average energy acquisition rate.
         """
-        return self.execute_script("return av.pch.aveEar")
+        return self.__gr_get_last("avg_rate", tail)
 
-    def gr_get_pop_curr_avg_rate(self):
+    def gr_get_pop_curr_avg_cost(self, tail=None):
         """
-        Gets the current average energy acquisition rate from av.pch.
+        Gets the current average offspring cost from av.pch.
 
         Note: This gets a number from the Plotly graph, not the underlying
         message from Avida.
 
-        :return: Float value of average energy acquisition rate.
-        """
-        return self.__gr_get_pop_avg_rate()[-1]
+        :param tail: Optional GraphTail to read the value from instead of
+        querying the page.
 
-    def __gr_get_pop_avg_cost(self):
+        :return: Float value of average offspring cost.
         """
-        Gets list of average offspring cost for each update in experiment.
+        return self.__gr_get_last("avg_cost", tail)
 
-        :return: List of average offspring cost.
+    def audit_pop_history(self, stats, tail=None, rtol=1e-6, atol=1e-9):
         """
-        return self.execute_script("return av.pch.aveCst")
+        Checks that the graph history in av.pch matches the population
+        statistics emitted at every update, rather than just the current one.
+        The experiment should be paused so that the graph is up to date.
 
-    def gr_get_pop_curr_avg_cost(self):
-        """
-        Gets the current average offspring cost from av.pch.
+        The graph is lined up with the stats on the page's update axis: its
+        last point is taken to be at the update the page was at when it was
+        read, and each earlier point one update before. Updates in stats that
+        are not in the graph are skipped. If the series have different
+        lengths, or the graph only matches the stats when shifted by a few
+        updates, the audit fails with a misalignment instead of reporting
+        divergences.
 
-        Note: This gets a number from the Plotly graph, not the underlying
-        message from Avida.
+        :param stats: The per-update stats to check against, either a list of
+        PopStatsSnapshots (e.g. from drain_updates) or a dict of arrays (e.g.
+        from RunArchive.read).
 
-        :return: Float value of average offspring cost.
+        :param tail: Optional GraphTail holding the whole graph history (read
+        with gr_read_pop_series(0)) instead of querying the page.
+
+        :param rtol: Relative tolerance of the comparison.
+
+        :param atol: Absolute tolerance of the comparison.
+
+        :return: HistoryAudit describing the result.
         """
-        return self.__gr_get_pop_avg_cost()[-1]
+        if tail is None:
+            tail = self.gr_read_pop_series(0)
+            if tail is None:
+                self.log.warning("Can't audit population history without the "
+                                 "graph series.")
+                return HistoryAudit(False, 0, None, {}, {}, None)
+        fields = ["update"] + [field for _, field in _graph_stats_fields]
+        if isinstance(stats, dict):
+            columns = {field: np.asarray(stats[field], dtype=np.float64)
+                       for field in fields}
+        else:
+            columns = {field: np.array([getattr(record, field)
+                                        for record in stats],
+                                       dtype=np.float64)
+                       for field in fields}
+
+        updates, rows = np.unique(columns["update"], return_index=True)
+        graph = {field: np.asarray(getattr(tail, series), dtype=np.float64)
+                 for series, field in _graph_stats_fields}
+        lengths = {field: values.size for field, values in graph.items()}
+        if updates.size == 0 or 0 in lengths.values():
+            self.log.warning("Nothing to audit in population history.")
+            return HistoryAudit(False, 0, None, {}, {}, None)
+        if len(set(lengths.values())) > 1:
+            return self.__misaligned_history(
+                "graph series have different lengths " + str(lengths))
+        if tail.update is None:
+            return self.__misaligned_history("the page has no current update")
+
+        # Line each recorded update up with its point in the graph.
+        last_update = int(tail.update)
+        checked, compared, diverged = self.__compare_pop_history(
+            columns, updates, rows, graph, last_update, rtol, atol)
+        if checked.size == 0:
+            return self.__misaligned_history(
+                "no recorded update is in the graph, which ends at update "
+                + str(last_update))
+
+        # Before reporting a divergence, check whether the graph is just a few
+        # updates ahead of or behind the page's update.
+        if diverged.any():
+            for shift in range(1, _max_history_shift + 1):
+                for shifted in (last_update - shift, last_update + shift):
+                    shifted_checked, _, shifted_diverged = \
+                        self.__compare_pop_history(columns, updates, rows,
+                                                   graph, shifted, rtol, atol)
+                    if shifted_checked.size > 1 \
+                            and not shifted_diverged.any():
+                        return self.__misaligned_history(
+                            "graph ends at update " + str(shifted)
+                            + " instead of the current update "
+                            + str(last_update))
+
+        errors = {}
+        for field, (expected, actual, close) in compared.items():
+            error = np.abs(actual - expected)
+            finite = error[np.isfinite(error)]
+            errors[field] = {
+                "mismatches": int(np.count_nonzero(~close)),
+                "max_abs_error": float(finite.max()) if finite.size else 0.0,
+                "mean_abs_error": float(finite.mean()) if finite.size else 0.0,
+                "rms_error": float(np.sqrt(np.mean(finite ** 2)))
+                if finite.size else 0.0}
+
+        first_divergence = None
+        divergence_values = {}
+        if diverged.any():
+            index = int(np.argmax(diverged))
+            first_divergence = int(checked[index])
+            divergence_values = {
+                field: (float(expected[index]), float(actual[index]))
+                for field, (expected, actual, close) in compared.items()
+                if not close[index]}
+
+        audit = HistoryAudit(first_divergence is None, int(checked.size),
+                             first_divergence, divergence_values, errors, None)
+        if audit.passed:
+            self.log.info("Population history matches the graph at all "
+                          + str(audit.updates_checked) + " updates.")
+        else:
+            self.log.warning("Population history diverges from the graph at "
+                             "update " + str(first_divergence) + ": "
+                             + str(divergence_values))
+        return audit
 
-    def get_pop_cols(self):
+    def get_pop_cols(self, snapshot=None):
         """
         Gets the current number of columns in the dish grid.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Integer value of columns in dish.
         """
-        return self.execute_script("return av.grd.cols")
+        if snapshot is not None:
+            return snapshot.cols
+        return self.read_script("return av.grd.cols")
 
-    def get_pop_rows(self):
+    def get_pop_rows(self, snapshot=None):
         """
         Gets the current number of columns in the dish grid.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: Integer value of rows in dish.
         """
-        return self.execute_script("return av.grd.rows")
+        if snapshot is not None:
+            return snapshot.rows
+        return self.read_script("return av.grd.rows")
 
-    def get_pop_mute_rate_string(self):
+    def get_pop_mute_rate_string(self, snapshot=None):
         """
         Gets the current mutation rate (for the experiment in the population
         window.
@@ -729,9 +1826,35 @@ class PopulationPage(BasePage):
         NOTE: Returns the string because although the mutation rate should be an
         integer, you can easily put in a non-integer value.
 
+        :param snapshot: Optional PopStatsSnapshot to read the value from
+        instead of querying the page.
+
         :return: String containing the current mutation rate.
         """
-        return self.execute_script("return av.dom.muteInput.value")
+        if snapshot is not None:
+            return snapshot.mute_rate
+        return self.read_script("return av.dom.muteInput.value")
+
+    def get_grid_data(self, fields=_grid_average_fields):
+        """
+        Gets the data arrays of several av.grd.msg fields (e.g. 'fitness') in a
+        single Javascript call. The arrays are transferred as binary rather
+        than JSON lists, so this stays fast for large dishes.
+
+        :param fields: Names of the fields of av.grd.msg to get.
+
+        :return: Dict mapping each field to a read-only NumPy array of float64
+        values (NaN for empty cells) or None if the field has no data, or None
+        if av.grd.msg has not been created yet.
+        """
+        encoded = self.read_script(self.__grid_data_script, list(fields))
+        if encoded is None:
+            self.log.warning("Failed to get grid data: av.grd.msg not found.")
+            return None
+        return {field: None if encoded[field] is None
+                else np.frombuffer(base64.b64decode(encoded[field]),
+                                   dtype="<f8")
+                for field in fields}
 
     def calculate_pop_averages(self):
         """
@@ -743,48 +1866,188 @@ class PopulationPage(BasePage):
         of the three average values listed above, or an empty list (if the
         information has not been created yet).
         """
+        grid = self.get_grid_data(
+            sorted(set(_grid_average_fields) | {_grid_viability_field}))
+        if grid is None or grid[_grid_viability_field] is None:
+            return []
+
+        # A cell holds a viable organism if its viability field is positive
+        # (NaN compares as False, so empty cells are excluded).
+        with np.errstate(invalid="ignore"):
+            viable = grid[_grid_viability_field] > 0
+        viable_sum = int(np.count_nonzero(viable))
+
+        return [viable_sum] + [float(grid[field][viable].sum()) / viable_sum
+                               for field in _grid_average_fields]
+
+    def grid_aggregates(self, fields=_grid_average_fields,
+                        stats=_grid_default_stats, bins=10):
+        """
+        Computes statistics of av.grd.msg fields over the viable organisms in
+        the dish inside the page, so that only the results are transferred.
+        Viable organisms are found in the same way as in
+        calculate_pop_averages, so the two can be cross-checked.
+
+        :param fields: Names of the fields of av.grd.msg to compute statistics
+        of (e.g. 'fitness').
+
+        :param stats: Names of the statistics to compute: 'count', 'sum',
+        'mean', 'min', 'max', 'histogram', or a percentile such as 'p50'.
+
+        :param bins: Number of equal-width bins used for 'histogram'.
+
+        :return: Dict with the number of viable organisms under 'viable' and,
+        for each field, a dict mapping each statistic to its value (None if
+        there are no viable organisms, or in place of the dict if the field
+        has no data). Histograms are dicts of bin 'edges' and 'counts'. Returns
+        None if av.grd.msg has not been created yet.
+        """
+        results = self.read_script(self.__grid_aggregates_script,
+                                   list(fields), list(stats), bins)
+        if results is None:
+            self.log.warning("Failed to get grid aggregates: av.grd.msg not "
+                             "found.")
+            return None
+        self.log.info("Got grid aggregates: " + str(results))
+        return results
 
-        # JS gets a map -- data we want is the list paired with the key 'data'
-        fitness_list = self.execute_script(
-            "return av.grd.msg.fitness")['data']
-        gestation_list = self.execute_script(
-            "return av.grd.msg.gestation")['data']
-        metabolism_list = self.execute_script(
-            "return av.grd.msg.metabolism")['data']
+    def get_pop_current_viable(self):
+        """
+        Gets the number of viable organisms currently in the dish.
 
-        viable_sum = 0
-        fitness_sum = 0.0
-        gestation_sum = 0.0
-        metabolism_sum = 0.0
+        :return: Integer value of number of viable orgs.
+        """
+        return int(self.get_text(self.__viable_num_label))
 
-        results = []
+    ############################################################################
+    # Methods below this point shouldn't be called outside this class.
+    ############################################################################
 
-        if fitness_list is not None:
+    def __read_app_state(self):
+        """
+        Reads the parts of the app's state that fast_reset_avida_ed restores
+        and verifies.
 
-            length = len(fitness_list)
+        :return: Dict describing the state.
+        """
+        state = self.execute_script(self.__app_state_script,
+                                    self.__state_inputs,
+                                    self.__state_radios,
+                                    self.__state_panels,
+                                    self.__run_pause_pop_button,
+                                    mutating=False)
+        if state is None:
+            state = {}
+        state["freezer"] = self.get_freezer_item_names()
+        return state
 
-            # Iterate through each space in the grid
-            for i in range(length):
-                # Check if there is a viable organism at this spot
-                if (fitness_list[i] is not None) and (fitness_list[i] > 0):
-                    viable_sum += 1
-                    fitness_sum += fitness_list[i]
-                    gestation_sum += gestation_list[i]
-                    metabolism_sum += metabolism_list[i]
+    def __setup_state(self, state=None):
+        """
+        Gets the text of the button that toggles the Environmental Settings
+        panel and whether the panel is displayed.
 
-            results = [viable_sum,
-                       (fitness_sum / viable_sum),
-                       (gestation_sum / viable_sum),
-                       (metabolism_sum / viable_sum)]
+        :param state: Optional UIState to read the values from instead of
+        querying the page.
 
-        return results
+        :return: Tuple of the button text and whether the panel is displayed.
+        """
+        if state is not None:
+            return (state.texts.get(self.__setup_button_id),
+                    state.visible.get(self.__setup_block_id, False))
+        return (self.get_text(self.__setup_button_id),
+                self.element_displayed(self.__setup_block_id))
 
-    def get_pop_current_viable(self):
+    def __compare_pop_history(self, columns, updates, rows, graph,
+                              last_update, rtol, atol):
         """
-        Gets the number of viable organisms currently in the dish.
+        Compares the recorded stats with the graph, taking the graph's last
+        point to be at a given update.
 
-        :return: Integer value of number of viable orgs.
+        :param columns: Dict mapping each stats field to its array of values.
+
+        :param updates: Sorted array of the distinct recorded updates.
+
+        :param rows: Array of the row in columns of each update in updates.
+
+        :param graph: Dict mapping each stats field to the array of its graph
+        series.
+
+        :param last_update: Update of the graph's last point.
+
+        :param rtol: Relative tolerance of the comparison.
+
+        :param atol: Absolute tolerance of the comparison.
+
+        :return: Tuple of (array of the updates compared, dict mapping each
+        field to its (expected, actual, close) arrays, array of whether any
+        field diverges at each update compared).
         """
-        return int(self.get_text(self.__viable_num_label))
+        length = next(iter(graph.values())).size
+        positions = (updates - (last_update - (length - 1))).astype(np.int64)
+        in_graph = (positions >= 0) & (positions < length)
+        rows, positions = rows[in_graph], positions[in_graph]
+
+        diverged = np.zeros(positions.size, dtype=bool)
+        compared = {}
+        for field, values in graph.items():
+            expected = columns[field][rows]
+            actual = values[positions]
+            with np.errstate(invalid="ignore"):
+                close = np.isclose(actual, expected, rtol, atol,
+                                   equal_nan=True)
+            compared[field] = (expected, actual, close)
+            diverged |= ~close
+        return updates[in_graph], compared, diverged
+
+    def __misaligned_history(self, reason):
+        """
+        Logs and returns the result of an audit whose graph couldn't be lined
+        up with the stats.
+
+        :param reason: Description of the misalignment.
+
+        :return: HistoryAudit describing the misalignment.
+        """
+        self.log.warning("Population history can't be lined up with the "
+                         "graph: " + reason)
+        return HistoryAudit(False, 0, None, {}, {}, reason)
+
+    def __gr_get_last(self, field, tail=None):
+        """
+        Gets the last value of an av.pch series.
+
+        :param field: Name of the series' field in GraphTail.
+
+        :param tail: Optional GraphTail to read the value from instead of
+        querying the page.
+
+        :return: The last value of the series, or None if it is empty or
+        could not be read.
+        """
+        if tail is None:
+            tail = self.gr_read_pop_series()
+            if tail is None:
+                return None
+        values = getattr(tail, field)
+        return values[-1] if values else None
+
+    def __get_pop_stat(self, msg_key, snapshot=None, fresh=False):
+        """
+        Gets a single value from av.grd.PopStatsMsg, either from the page or
+        from a snapshot that has already been taken.
+
+        :param msg_key: The key of the value within av.grd.PopStatsMsg.
+
+        :param snapshot: Optional PopStatsSnapshot to read the value from.
+
+        :param fresh: True if the page should be read even if the value is
+        cached.
+
+        :return: The value stored under msg_key.
+        """
+        if snapshot is not None:
+            return getattr(snapshot, dict(_pop_stats_fields)[msg_key])
+        return self.read_script("return av.grd.popStatsMsg['" + msg_key
+                                + "']", fresh=fresh)
 
 
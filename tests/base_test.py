@@ -17,7 +17,7 @@ class BaseTest(unittest.TestCase):
     """
 
     @pytest.yield_fixture(autouse=True, scope="class")
-    def class_setup(self, request, driver_setup):
+    def class_setup(self, request, driver_setup, resetmode, menuclicks):
         """
         Sets up class prior to run. Adds necessary variables to the class and
         waits for the splash screen to go away.
@@ -42,6 +42,15 @@ class BaseTest(unittest.TestCase):
         # Wait for splash screen to go away
         request.cls.bp.wait_until_splash_gone()
 
+        # Click on menu options unless the direct path was asked for.
+        request.cls.bp.use_real_menu_clicks(menuclicks != "fast")
+
+        # Remember the state of the app right after it first loads so that
+        # hard resets can return to it without reloading the page.
+        request.cls.reset_mode = resetmode
+        if resetmode != "refresh":
+            request.cls.pp.capture_startup_state()
+
         yield
 
         # Cleanup of logger object.
@@ -56,7 +65,8 @@ class BaseTest(unittest.TestCase):
         :return: None.
         """
         yield
-        assert not self.bp.crash_report_displayed()
+        state = self.bp.probe_state()
+        assert not self.bp.crash_report_displayed(state)
 
     @pytest.yield_fixture()
     def soft_reset(self, closing_assertions):
@@ -76,11 +86,73 @@ class BaseTest(unittest.TestCase):
     @pytest.yield_fixture()
     def hard_reset(self, closing_assertions):
         """
-        Performs a 'hard reset' at the beginning of an experiment by refreshing
-        the Avida-ED webpage and waits for it to load completely.
+        Performs a 'hard reset' at the beginning of an experiment by putting
+        Avida-ED back into the state it was in after first loading.
+
+        By default this is done in-app (see PopulationPage.fast_reset_avida_ed),
+        which falls back to refreshing the page if the app's state cannot be
+        restored. With --resetmode refresh, the Avida-ED webpage is always
+        refreshed and the reset waits for it to load completely.
+
+        :return: None.
+        """
+        yield
+        if self.reset_mode == "refresh":
+            self.bp.refresh_avida_ed()
+        else:
+            self.pp.fast_reset_avida_ed()
+
+    @pytest.yield_fixture()
+    def no_render(self, closing_assertions):
+        """
+        Suppresses drawing of the dish grid and the population graph for the
+        duration of a test, so that experiments run faster. Rendering is only
+        turned back on after the test's own assertions have run, so tests that
+        check anything visual should do it inside a
+        'with self.pp.rendering_restored():' block.
+
+        :return: None.
+        """
+        self.pp.suppress_rendering()
+        yield
+        self.pp.restore_rendering()
+
+    @pytest.yield_fixture()
+    def real_menu_clicks(self, closing_assertions):
+        """
+        Makes menu options be used by opening their dropdown and clicking on
+        them (as with --menuclicks real) for the duration of a test, for tests
+        of the menus themselves.
 
         :return: None.
         """
+        previous = self.bp.use_real_menu_clicks()
         yield
-        self.bp.refresh_avida_ed()
+        self.bp.use_real_menu_clicks(previous)
+
+    @pytest.yield_fixture()
+    def fast_menu_clicks(self, closing_assertions):
+        """
+        Makes menu options be used directly through their dijit widgets (as
+        with --menuclicks fast) for the duration of a test, for tests of that
+        path.
 
+        :return: None.
+        """
+        previous = self.bp.use_real_menu_clicks(False)
+        yield
+        self.bp.use_real_menu_clicks(previous)
+
+    @pytest.yield_fixture()
+    def time_warp(self, closing_assertions, timewarp):
+        """
+        Reloads Avida-ED with its timers sped up (by the --timewarp factor,
+        10 by default) so that experiments reach a given update sooner, and
+        reloads it with real timers afterwards. Fails the test if the shim is
+        not in effect.
+
+        :return: None.
+        """
+        assert self.bp.install_time_warp(timewarp)
+        yield
+        self.bp.remove_time_warp()
@@ -0,0 +1,60 @@
+import pytest
+
+from tests.base_test import BaseTest
+from utilities.benchmark_results import BenchmarkResults
+
+# Size of the (square) dish used for the comparison.
+DISH_SIZE = 60
+
+# Time in seconds to run before measuring, length in seconds of each
+# measurement window, and number of windows measured with rendering on and off.
+WARMUP_TIME = 5
+WINDOW_TIME = 10
+REPETITIONS = 3
+
+
+@pytest.mark.benchmark
+class RenderSuppressionBenchmark(BaseTest):
+    """
+    Benchmark class that measures how much faster Avida-ED runs when drawing
+    of the dish grid and the population graph is suppressed.
+    """
+
+    results = BenchmarkResults("render_suppression",
+                               {"cols": DISH_SIZE, "rows": DISH_SIZE,
+                                "warmup_time": WARMUP_TIME,
+                                "window_time": WINDOW_TIME,
+                                "repetitions": REPETITIONS})
+
+    @pytest.mark.run(order=1)
+    @pytest.mark.usefixtures("hard_reset")
+    def test_throughput_render_on_off(self):
+        """
+        Measures update throughput with rendering on, then off, in the same
+        experiment.
+
+        :return: None.
+        """
+        self.pp.edit_dish_cols(str(DISH_SIZE))
+        self.pp.edit_dish_rows(str(DISH_SIZE))
+        self.bp.add_ancestor_to_dish()
+        self.pp.run_from_pop()
+        assert self.pp.wait_until_update_reached(1)
+        self.bp.util.sleep(WARMUP_TIME, "benchmark warmup")
+
+        # Alternate between rendering on and off so that the population
+        # growing over time affects both equally.
+        samples = {"on": [], "off": []}
+        for _ in range(REPETITIONS):
+            samples["on"].append(self.pp.measure_update_rate(WINDOW_TIME))
+            assert self.pp.suppress_rendering()
+            samples["off"].append(self.pp.measure_update_rate(WINDOW_TIME))
+            assert self.pp.restore_rendering()
+
+        self.pp.pause_from_pop()
+        assert self.pp.wait_until_update_stable()
+
+        for rendering, rates in sorted(samples.items()):
+            assert None not in rates
+            self.results.add({"rendering": rendering}, rates)
+        self.results.write_json()
@@ -0,0 +1,118 @@
+import pytest
+
+from tests.base_test import BaseTest
+from utilities.benchmark_results import BenchmarkResults
+
+# Mutation rates (in percent) swept for every dish size.
+MUTATION_RATES = ("0", "2", "10")
+
+# Time in seconds each configuration runs before measuring starts, so that the
+# population has a chance to spread from the single ancestor.
+WARMUP_TIME = 5
+
+# Length in seconds of each measurement window and number of windows measured
+# for each configuration.
+WINDOW_TIME = 10
+REPETITIONS = 3
+
+
+@pytest.mark.benchmark
+class UpdateThroughputBenchmark(BaseTest):
+    """
+    Benchmark class that measures how many updates per second Avida-ED
+    completes for a range of dish sizes and mutation rates.
+
+    Results are written to output/benchmark after every dish size so that
+    partial runs still produce a file.
+    """
+
+    results = BenchmarkResults("update_throughput",
+                               {"warmup_time": WARMUP_TIME,
+                                "window_time": WINDOW_TIME,
+                                "repetitions": REPETITIONS})
+
+    @pytest.mark.run(order=1)
+    @pytest.mark.usefixtures("hard_reset")
+    def test_throughput_10x10(self):
+        """
+        Measures update throughput on a 10x10 dish.
+
+        :return: None.
+        """
+        self.sweep_mutation_rates(10)
+
+    @pytest.mark.run(order=2)
+    @pytest.mark.usefixtures("hard_reset")
+    def test_throughput_30x30(self):
+        """
+        Measures update throughput on a 30x30 dish.
+
+        :return: None.
+        """
+        self.sweep_mutation_rates(30)
+
+    @pytest.mark.run(order=3)
+    @pytest.mark.usefixtures("hard_reset")
+    def test_throughput_60x60(self):
+        """
+        Measures update throughput on a 60x60 dish.
+
+        :return: None.
+        """
+        self.sweep_mutation_rates(60)
+
+    @pytest.mark.run(order=4)
+    @pytest.mark.usefixtures("hard_reset")
+    def test_throughput_100x100(self):
+        """
+        Measures update throughput on a 100x100 dish.
+
+        :return: None.
+        """
+        self.sweep_mutation_rates(100)
+
+    def sweep_mutation_rates(self, size):
+        """
+        Measures update throughput on a square dish for every mutation rate in
+        MUTATION_RATES and records the results.
+
+        :param size: Number of rows and columns in the dish.
+
+        :return: None.
+        """
+        for rate in MUTATION_RATES:
+            self.reset_app()
+            self.pp.edit_dish_cols(str(size))
+            self.pp.edit_dish_rows(str(size))
+            self.pp.edit_mut_rate(rate)
+            self.bp.add_ancestor_to_dish()
+
+            self.pp.run_from_pop()
+            assert self.pp.wait_until_update_reached(1)
+            self.bp.util.sleep(WARMUP_TIME, "benchmark warmup")
+
+            samples = [self.pp.measure_update_rate(WINDOW_TIME)
+                       for _ in range(REPETITIONS)]
+            snapshot = self.pp.snapshot_pop_stats()
+            self.pp.pause_from_pop()
+            assert self.pp.wait_until_update_stable()
+
+            assert None not in samples
+            self.results.add({"cols": size, "rows": size,
+                              "mutation_rate": rate},
+                             samples,
+                             {"final_update": snapshot.update,
+                              "final_organisms": snapshot.organisms})
+        self.results.write_json()
+
+    def reset_app(self):
+        """
+        Puts Avida-ED back into its startup state in the same way as the
+        hard_reset fixture.
+
+        :return: None.
+        """
+        if self.reset_mode == "refresh":
+            self.bp.refresh_avida_ed()
+        else:
+            self.pp.fast_reset_avida_ed()
@@ -8,7 +8,8 @@ class ExperimentControlsTest(BaseTest):
     Test class that runs a very simple experiment in Avida-ED.
     """
 
-    @pytest.mark.run()
+    @pytest.mark.run(order=1)
+    @pytest.mark.usefixtures("hard_reset", "real_menu_clicks")
     def test_exp_run_controls(self):
         """
         Tests that a simple experiment can be run and that running, pausing, and
@@ -22,7 +23,7 @@ class ExperimentControlsTest(BaseTest):
 
         # Run the experiment.
         self.bp.run_from_menu()
-        self.bp.util.sleep(3, "Waiting for updates to occur.")
+        assert self.pp.wait_until_update_reached(1)
 
         # Assert that updates have occurred.
         assert self.pp.get_pop_current_update() > 0
@@ -30,14 +31,36 @@ class ExperimentControlsTest(BaseTest):
 
         # Pause the experiment.
         self.bp.pause_from_menu()
-        self.bp.util.sleep(1, "Making sure pause goes into effect.")
+        assert self.pp.wait_until_update_stable()
 
         # Get current update, wait a few seconds, assert it has not changed.
-        current_update = self.pp.get_pop_current_update()
+        current_update = self.pp.get_pop_current_update(fresh=True)
         self.bp.util.sleep(3, "Ensuring no updates occur after pause.")
-        assert self.pp.get_pop_current_update() == current_update
+        assert self.pp.get_pop_current_update(fresh=True) == current_update
 
         # Do one update
         self.bp.forward_from_menu()
-        self.bp.util.sleep(1, "Making sure update has time to occur.")
+        assert self.pp.wait_until_update_reached(current_update + 1)
+        assert self.pp.wait_until_update_stable()
         assert (self.pp.get_pop_current_update() - current_update) == 1
+
+    @pytest.mark.run(order=2)
+    @pytest.mark.usefixtures("hard_reset")
+    def test_advance_updates(self):
+        """
+        Tests that a paused experiment can be moved forward by an exact number
+        of updates.
+
+        :return: None.
+        """
+
+        # Add @ancestor to dish and start the experiment with one update.
+        self.bp.add_ancestor_to_dish()
+        assert self.pp.advance_updates(1)
+        start_update = self.pp.get_pop_current_update()
+
+        # Move forward and assert that exactly that many updates occurred.
+        assert self.pp.advance_updates(50)
+        assert self.pp.wait_until_update_stable()
+        assert self.pp.get_pop_current_update() == start_update + 50
+        assert self.pp.runpause_text_is_run()
@@ -23,21 +23,54 @@ class PopStatsSanityTest(BaseTest):
         # Add @ancestor to dish.
         self.bp.add_ancestor_to_dish()
 
-        # Run the experiment for a while, then pause it.
+        # Run the experiment until the ancestor has reproduced, then pause it.
         self.bp.run_from_menu()
-        self.bp.util.sleep(15, "Waiting for updates to occur.")
+        assert self.pp.wait_until_pop_stats_reach({"update": 1,
+                                                   "organisms": 2})
         self.bp.pause_from_menu()
-        self.bp.util.sleep(1, "Waiting for pause to take affect.")
+        assert self.pp.wait_until_update_stable()
 
         # Test that population stats are valid.
-        assert self.pp.get_pop_current_update() > 0
-        assert self.pp.get_pop_num_orgs() > 1
-        assert self.pp.get_pop_avg_fit() >= 0.0
-        assert self.pp.get_pop_avg_energy_rate() > 0
-        assert self.pp.get_pop_avg_offspring_cost() > 0
-        assert self.pp.get_pop_avg_age() >= 0
+        stats = self.pp.snapshot_pop_stats()
+        assert self.pp.get_pop_current_update(stats) > 0
+        assert self.pp.get_pop_num_orgs(stats) > 1
+        assert self.pp.get_pop_avg_fit(stats) >= 0.0
+        assert self.pp.get_pop_avg_energy_rate(stats) > 0
+        assert self.pp.get_pop_avg_offspring_cost(stats) > 0
+        assert self.pp.get_pop_avg_age(stats) >= 0
 
     @pytest.mark.run(order=2)
+    @pytest.mark.usefixtures("hard_reset")
+    def test_pop_stats_every_update_recorded(self):
+        """
+        Tests that the update recorder captures the population statistics of
+        every update of a running experiment, in order and without gaps.
+
+        :return: None.
+        """
+        # Start recording, then run an experiment with @ancestor for a while.
+        self.pp.install_update_recorder()
+        self.bp.add_ancestor_to_dish()
+        self.bp.run_from_menu()
+        assert self.pp.wait_until_update_reached(20)
+        self.bp.pause_from_menu()
+        assert self.pp.wait_until_update_stable()
+
+        # Test that each update was captured exactly once.
+        batch = self.pp.drain_updates()
+        assert batch.installed
+        assert batch.dropped_stats == 0
+        updates = [stats.update for stats in batch.stats]
+        assert updates[-1] == self.pp.get_pop_current_update()
+        assert updates == list(range(updates[0], updates[-1] + 1))
+        assert all(stats.organisms > 0 for stats in batch.stats)
+
+        # Test that the graph history matches the stats at every update.
+        audit = self.pp.audit_pop_history(batch.stats)
+        assert audit.passed, audit
+
+    @pytest.mark.run(order=3)
+    @pytest.mark.usefixtures("time_warp")
     def test_pop_stats_sanity_allfxns(self):
         """
         Tests that running an experiment with @all_functions does not create
@@ -50,28 +83,40 @@ class PopStatsSanityTest(BaseTest):
         # Add @all_functions to dish.
         self.bp.add_all_functions_to_dish()
 
-        # Run the experiment for a while, then pause it.
+        # Run the experiment until every function has been performed, then
+        # pause it.
         self.bp.run_from_menu()
-        self.bp.util.sleep(15, "Waiting for updates to occur.")
+        assert self.pp.wait_until_pop_stats_reach({"update": 1,
+                                                   "organisms": 2,
+                                                   "not": 1,
+                                                   "nand": 1,
+                                                   "and": 1,
+                                                   "orn": 1,
+                                                   "or": 1,
+                                                   "andn": 1,
+                                                   "nor": 1,
+                                                   "xor": 1,
+                                                   "equ": 1})
         self.bp.pause_from_menu()
-        self.bp.util.sleep(1, "Waiting for pause to take affect.")
+        assert self.pp.wait_until_update_stable()
 
         # Test that population stats are valid.
-        assert self.pp.get_pop_current_update() > 0
-        assert self.pp.get_pop_num_orgs() > 1
-        assert self.pp.get_pop_avg_fit() >= 0.0
-        assert self.pp.get_pop_avg_energy_rate() > 0
-        assert self.pp.get_pop_avg_offspring_cost() > 0
-        assert self.pp.get_pop_avg_age() >= 0
+        stats = self.pp.snapshot_pop_stats()
+        assert self.pp.get_pop_current_update(stats) > 0
+        assert self.pp.get_pop_num_orgs(stats) > 1
+        assert self.pp.get_pop_avg_fit(stats) >= 0.0
+        assert self.pp.get_pop_avg_energy_rate(stats) > 0
+        assert self.pp.get_pop_avg_offspring_cost(stats) > 0
+        assert self.pp.get_pop_avg_age(stats) >= 0
 
         # Test that all functions have occurred.
-        assert self.pp.get_pop_num_performing_not() > 0
-        assert self.pp.get_pop_num_performing_nan() > 0
-        assert self.pp.get_pop_num_performing_and() > 0
-        assert self.pp.get_pop_num_performing_orn() > 0
-        assert self.pp.get_pop_num_performing_oro() > 0
-        assert self.pp.get_pop_num_performing_ant() > 0
-        assert self.pp.get_pop_num_performing_nor() > 0
-        assert self.pp.get_pop_num_performing_xor() > 0
-        assert self.pp.get_pop_num_performing_equ() > 0
+        assert self.pp.get_pop_num_performing_not(stats) > 0
+        assert self.pp.get_pop_num_performing_nan(stats) > 0
+        assert self.pp.get_pop_num_performing_and(stats) > 0
+        assert self.pp.get_pop_num_performing_orn(stats) > 0
+        assert self.pp.get_pop_num_performing_oro(stats) > 0
+        assert self.pp.get_pop_num_performing_ant(stats) > 0
+        assert self.pp.get_pop_num_performing_nor(stats) > 0
+        assert self.pp.get_pop_num_performing_xor(stats) > 0
+        assert self.pp.get_pop_num_performing_equ(stats) > 0
 
@@ -9,6 +9,7 @@ class FileTabTest(BaseTest):
     """
 
     @pytest.mark.run()
+    @pytest.mark.usefixtures("real_menu_clicks")
     def test_export_graphics(self):
         """
         Tests that the "Export Graphics" option in the File tab works as
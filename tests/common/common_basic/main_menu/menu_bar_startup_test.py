@@ -18,9 +18,10 @@ class MenuBarStartupTest(BaseTest):
 
         :return: None.
         """
-        assert not self.bp.can_save_current_pop()
-        assert not self.bp.can_save_selected_org()
-        assert not self.bp.can_save_offspring_org()
+        state = self.bp.probe_state()
+        assert not self.bp.can_save_current_pop(state)
+        assert not self.bp.can_save_selected_org(state)
+        assert not self.bp.can_save_offspring_org(state)
 
     @pytest.mark.run()
     def test_control_menu_launch(self):
@@ -30,7 +31,8 @@ class MenuBarStartupTest(BaseTest):
 
         :return: None.
         """
-        assert self.bp.can_run_from_menu()
-        assert not self.bp.can_pause_from_menu()
-        assert not self.bp.can_bring_to_org_window()
-        assert not self.bp.can_bring_child_to_org_window()
+        state = self.bp.probe_state()
+        assert self.bp.can_run_from_menu(state)
+        assert not self.bp.can_pause_from_menu(state)
+        assert not self.bp.can_bring_to_org_window(state)
+        assert not self.bp.can_bring_child_to_org_window(state)
@@ -0,0 +1,65 @@
+import pytest
+
+from tests.base_test import BaseTest
+
+
+class MenuDirectPathTest(BaseTest):
+    """
+    Test class that tests using the options of the main menu bar directly
+    through their dijit widgets (as with --menuclicks fast) instead of
+    clicking on them.
+    """
+
+    @pytest.mark.run(order=1)
+    @pytest.mark.usefixtures("hard_reset", "fast_menu_clicks")
+    def test_direct_disabled_options(self):
+        """
+        Tests that options that are disabled at startup do nothing when used
+        directly, and that no dropdown is opened.
+
+        :return: None.
+        """
+        freezer_items = self.bp.get_freezer_item_names()
+        assert not self.bp.can_save_current_pop()
+        self.bp.save_current_pop("direct_path_pop")
+        self.bp.save_selected_org("direct_path_org")
+        self.bp.save_offspring_org("direct_path_offspring")
+
+        state = self.bp.probe_state()
+        assert not self.bp.freezer_dropdown_expanded(state)
+        assert self.bp.get_freezer_item_names() == freezer_items
+
+    @pytest.mark.run(order=2)
+    @pytest.mark.usefixtures("hard_reset", "fast_menu_clicks")
+    def test_direct_alert_captured(self):
+        """
+        Tests that an alert raised by an option used directly is captured in
+        the page instead of being left open.
+
+        :return: None.
+        """
+        # Nothing is highlighted in the Freezer, so Avida-ED raises an alert.
+        assert not self.bp.add_org_to_exp()
+        state = self.bp.probe_state()
+        assert not self.bp.freezer_dropdown_expanded(state)
+        assert not self.bp.crash_report_displayed(state)
+
+    @pytest.mark.run(order=3)
+    @pytest.mark.usefixtures("hard_reset", "fast_menu_clicks")
+    def test_direct_run_pause(self):
+        """
+        Tests that an experiment can be run and paused through the Control tab
+        used directly.
+
+        :return: None.
+        """
+        self.bp.add_ancestor_to_dish()
+        self.bp.run_from_menu()
+        assert self.pp.wait_until_update_reached(1)
+        assert not self.bp.control_dropdown_expanded()
+
+        self.bp.pause_from_menu()
+        assert self.pp.wait_until_update_stable()
+        current_update = self.pp.get_pop_current_update(fresh=True)
+        self.bp.util.sleep(3, "Ensuring no updates occur after pause.")
+        assert self.pp.get_pop_current_update(fresh=True) == current_update
@@ -26,7 +26,9 @@ class BasicNavigationTest(BaseTest):
         :return: None. 
         """
         self.bp.go_to_population()
-        assert self.bp.population_displayed()
+        state = self.bp.probe_state()
+        assert self.bp.population_displayed(state)
+        assert state.block == "population"
         time.sleep(3)
 
     @pytest.mark.run(order=1)
@@ -37,7 +39,9 @@ class BasicNavigationTest(BaseTest):
         :return: None.
         """
         self.bp.go_to_organism()
-        assert self.bp.organism_displayed()
+        state = self.bp.probe_state()
+        assert self.bp.organism_displayed(state)
+        assert state.block == "organism"
         time.sleep(3)
 
     @pytest.mark.run(order=2)
@@ -48,5 +52,7 @@ class BasicNavigationTest(BaseTest):
         :return: None. 
         """
         self.bp.go_to_analysis()
-        assert self.bp.analysis_displayed()
+        state = self.bp.probe_state()
+        assert self.bp.analysis_displayed(state)
+        assert state.block == "analysis"
         time.sleep(3)
@@ -1,10 +1,155 @@
+import datetime
+import os
+
 import pytest
 from base.webdriver_factory import WebDriverFactory
+from utilities.action_timer import timer
+
+
+def get_worker_id(config):
+    """
+    Gets the id of the pytest-xdist worker (e.g. 'gw0') that this process is,
+    supporting both the current and the older ('slave') xdist naming.
+
+    :return: The worker id, or None if tests are not being run with xdist.
+    """
+    worker_input = getattr(config, "workerinput", None)
+    if worker_input is None:
+        worker_input = getattr(config, "slaveinput", None)
+    if worker_input is None:
+        return None
+    return worker_input.get("workerid", worker_input.get("slaveid"))
+
+
+def pytest_configure(config):
+    # Expose the worker id to code that has no access to the pytest config
+    # (e.g. the logger, so each worker writes its own log).
+    worker_id = get_worker_id(config)
+    if worker_id is not None:
+        os.environ.setdefault("PYTEST_XDIST_WORKER", worker_id)
+
+    config.addinivalue_line(
+        "markers", "command_budget(limit): fail the test if it sends more than "
+                   "limit WebDriver commands.")
+    config.addinivalue_line(
+        "markers", "benchmark: performance benchmark, only run with "
+                   "--benchmark.")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Benchmarks take several minutes, so they only run when asked for.
+    if config.getoption("--benchmark"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="needs --benchmark to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+def get_command_budget(item):
+    """
+    Gets the WebDriver command budget declared on a test with the
+    command_budget marker.
+
+    :return: The budget, or None if the test doesn't declare one.
+    """
+    if hasattr(item, "get_closest_marker"):
+        marker = item.get_closest_marker("command_budget")
+    else:
+        marker = item.get_marker("command_budget")
+    if marker is None:
+        return None
+    if marker.args:
+        return int(marker.args[0])
+    return int(marker.kwargs["limit"])
+
+
+def pytest_sessionfinish(session):
+    # Write the action timings of this run (one file per xdist worker).
+    if not timer.methods and not timer.tests:
+        return
+    run_time = datetime.datetime.now().strftime("%Y_%b_%d_%H_%M_%S")
+    worker_id = get_worker_id(session.config)
+    file_name = "timings.json" if worker_id is None \
+        else "timings_" + worker_id + ".json"
+    timer.write_json(os.path.join("output", "timings", run_time, file_name))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    # Attach the action timings of each test to the pytest-html report and
+    # enforce its WebDriver command budget.
+    outcome = yield
+    report = outcome.get_result()
+    if report.when != "call":
+        return
+    summary = timer.test_summary(item.nodeid)
+    if summary is None:
+        return
+
+    commands = summary["commands"]
+    budget = get_command_budget(item)
+    report.webdriver_commands = commands
+    report.command_budget = budget
+    if hasattr(item, "user_properties"):
+        item.user_properties.append(("webdriver_commands", commands))
+    if budget is not None and commands > budget and report.passed:
+        report.outcome = "failed"
+        report.longrepr = ("WebDriver command budget exceeded: "
+                           + str(commands) + " commands sent, budget is "
+                           + str(budget) + ".")
+
+    pytest_html = item.config.pluginmanager.getplugin("html")
+    if pytest_html is not None:
+        extra = getattr(report, "extra", [])
+        extra.append(pytest_html.extras.json(summary, "Action timings"))
+        report.extra = extra
+
+
+def pytest_terminal_summary(terminalreporter):
+    # Report the tests that sent the most WebDriver commands. Counts are read
+    # from the reports so that this also works with pytest-xdist.
+    counts = []
+    for reports in terminalreporter.stats.values():
+        for report in reports:
+            commands = getattr(report, "webdriver_commands", None)
+            if getattr(report, "when", None) == "call" and commands is not None:
+                counts.append((commands, getattr(report, "command_budget",
+                                                 None), report.nodeid))
+    if not counts:
+        return
+
+    counts.sort(reverse=True)
+    terminalreporter.section("WebDriver commands")
+    terminalreporter.write_line("Total: " + str(sum(c[0] for c in counts))
+                                + " commands in " + str(len(counts))
+                                + " tests")
+    for commands, budget, nodeid in counts[:10]:
+        line = str(commands).rjust(7) + "  " + nodeid
+        if budget is not None:
+            line += "  (budget " + str(budget) + ")"
+        terminalreporter.write_line(line)
+    over = [c for c in counts if c[1] is not None and c[0] > c[1]]
+    for commands, budget, nodeid in over:
+        terminalreporter.write_line("Over budget: " + nodeid + " ("
+                                    + str(commands) + " > " + str(budget)
+                                    + ")", red=True)
+
+
+@pytest.yield_fixture(autouse=True)
+def action_timing(request):
+    timer.start_test(request.node.nodeid)
+    yield
+    timer.end_test()
 
 
 @pytest.yield_fixture(scope="session")
-def driver_setup(request, browser, local, setuipath, setffpath, seturl):
-    wdf = WebDriverFactory(browser, local, setuipath, setffpath, seturl)
+def driver_setup(request, browser, local, setuipath, setffpath, seturl,
+                 xdist_worker, servermode, browserprofile):
+    # Session scope is per process, so each xdist worker gets its own browser,
+    # local server, and download directory.
+    wdf = WebDriverFactory(browser, local, setuipath, setffpath, seturl,
+                           xdist_worker, servermode, browserprofile)
     driver = wdf.get_webdriver_instance()
 
     yield driver
@@ -23,6 +168,22 @@ def pytest_addoption(parser):
                      help="Path for Firefox binary.")
     parser.addoption("--seturl",
                      help="URL for web-hosted Avida-ED.")
+    parser.addoption("--servermode",
+                     help="Local web server mode: cached (default) or simple.")
+    parser.addoption("--resetmode",
+                     help="How hard resets are done: fast (default) or "
+                          "refresh.")
+    parser.addoption("--browserprofile",
+                     help="Browser launch profile: full (default), lean, or "
+                          "headless.")
+    parser.addoption("--timewarp",
+                     help="Factor that the time_warp fixture speeds up "
+                          "Avida-ED's timers by (default 10).")
+    parser.addoption("--menuclicks",
+                     help="How menu options are used: real (default) or "
+                          "fast.")
+    parser.addoption("--benchmark", action="store_true",
+                     help="Run the benchmarks in tests/benchmark.")
 
 
 @pytest.fixture(scope="session")
@@ -47,3 +208,42 @@ def setffpath(request):
 @pytest.fixture(scope="session")
 def seturl(request):
     return request.config.getoption("--seturl")
+
+
+@pytest.fixture(scope="session")
+def servermode(request):
+    return request.config.getoption("--servermode")
+
+
+@pytest.fixture(scope="session")
+def resetmode(request):
+    mode = request.config.getoption("--resetmode")
+    if mode is None:
+        return "fast"
+    return mode.lower()
+
+
+@pytest.fixture(scope="session")
+def browserprofile(request):
+    return request.config.getoption("--browserprofile")
+
+
+@pytest.fixture(scope="session")
+def timewarp(request):
+    scale = request.config.getoption("--timewarp")
+    if scale is None:
+        return 10
+    return float(scale)
+
+
+@pytest.fixture(scope="session")
+def menuclicks(request):
+    mode = request.config.getoption("--menuclicks")
+    if mode is None:
+        return "real"
+    return mode.lower()
+
+
+@pytest.fixture(scope="session")
+def xdist_worker(request):
+    return get_worker_id(request.config)
@@ -36,7 +36,7 @@ class OrgRepControlsTest(BaseTest):
         self.bp.add_org_to_org_view()
 
         # Wait for ancestor to be in org view, ensure initial values sensible.
-        self.op.wait_until_org_controls_enabled()
+        assert self.op.wait_until_org_controls_enabled()
         assert self.op.get_cycle() == 0
 
         # Test that forward and back options work.
@@ -41,29 +41,29 @@ class OrgRepStatsTest(BaseTest):
         self.bp.add_org_to_org_view()
 
         # Wait for ancestor to be in org view, ensure initial values sensible.
-        self.op.wait_until_org_controls_enabled()
+        assert self.op.wait_until_org_controls_enabled()
 
         # Make sure at beginning of reproduction, all stats 0.
-        assert self.op.get_org_num_not_performed() == 0
-        assert self.op.get_org_num_nan_performed() == 0
-        assert self.op.get_org_num_and_performed() == 0
-        assert self.op.get_org_num_orn_performed() == 0
-        assert self.op.get_org_num_oro_performed() == 0
-        assert self.op.get_org_num_ant_performed() == 0
-        assert self.op.get_org_num_nor_performed() == 0
-        assert self.op.get_org_num_xor_performed() == 0
-        assert self.op.get_org_num_equ_performed() == 0
+        assert self.op.get_org_num_functions_performed() == {"not": 0,
+                                                            "nan": 0,
+                                                            "and": 0,
+                                                            "orn": 0,
+                                                            "oro": 0,
+                                                            "ant": 0,
+                                                            "nor": 0,
+                                                            "xor": 0,
+                                                            "equ": 0}
 
         # Go to end of reproduction.
         self.op.end_org_rep()
 
         # Assert that all functions have been performed.
-        assert self.op.get_org_num_not_performed() == 1
-        assert self.op.get_org_num_nan_performed() == 1
-        assert self.op.get_org_num_and_performed() == 1
-        assert self.op.get_org_num_orn_performed() == 1
-        assert self.op.get_org_num_oro_performed() == 1
-        assert self.op.get_org_num_ant_performed() == 1
-        assert self.op.get_org_num_nor_performed() == 1
-        assert self.op.get_org_num_xor_performed() == 1
-        assert self.op.get_org_num_equ_performed() == 1
+        assert self.op.get_org_num_functions_performed() == {"not": 1,
+                                                            "nan": 1,
+                                                            "and": 1,
+                                                            "orn": 1,
+                                                            "oro": 1,
+                                                            "ant": 1,
+                                                            "nor": 1,
+                                                            "xor": 1,
+                                                            "equ": 1}
@@ -95,3 +95,29 @@ class EnvSettingsInputTest(BaseTest):
 
         # Wait a short period so that response to run attempt occurs.
         self.bp.util.sleep(3)
+
+    @pytest.mark.run(order=5)
+    @pytest.mark.usefixtures("hard_reset")
+    def test_input_dishsize_macro(self):
+        """
+        Tests that a page macro can set the dish size through the
+        environmental settings widgets and read it back in a single script
+        call, then add an organism and start the run through WebDriver, with
+        every step succeeding and Avida-ED not crashing on the negative size.
+
+        :return: None.
+        """
+
+        # Edit dish size, add an organism, and try to run the experiment.
+        macro = self.pp.env_settings_macro(cols="-12") \
+            .call(self.bp.add_ancestor_to_dish) \
+            .call(self.pp.run_from_pop)
+        result = self.pp.run_macro(macro)
+        assert result.ok, result
+        assert result.values["cols"] == "-12"
+        # The in-page steps take one script call (plus one command if the
+        # script timeout has to be raised first).
+        assert result.round_trips <= 2
+
+        # Wait for a short period so that response to run attempt occurs.
+        self.bp.util.sleep(3)
@@ -37,8 +37,10 @@ class PauseUpdateTest(BaseTest):
         # Run the experiment.
         self.bp.run_from_menu()
 
-        # Wait long enough for experiment to have reached update 9.
-        self.bp.util.sleep(10, "Waiting for experiment to pause automatically.")
+        # Wait for experiment to pause itself at update 9.
+        assert self.pp.wait_until_update_reached(9)
+        assert self.pp.wait_until_runpause_text_is_run()
+        assert self.pp.wait_until_update_stable()
 
         # Check that pause worked properly.
         assert self.pp.get_pop_current_update() == 9
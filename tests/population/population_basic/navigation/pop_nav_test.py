@@ -10,6 +10,7 @@ class PopulationNavigationTest(BaseTest):
     """
 
     @pytest.mark.run(order=1)
+    @pytest.mark.command_budget(200)
     def test_toggle_env_settings(self):
         """
         Tests toggling the Environmental Settings panel on and off.
@@ -18,16 +19,20 @@ class PopulationNavigationTest(BaseTest):
         """
         self.bp.go_to_population()
         self.pp.show_env_settings()
-        assert self.pp.env_settings_displayed()
-        assert not self.pp.grid_displayed()
+        state = self.bp.probe_state()
+        assert self.pp.env_settings_displayed(state)
+        assert not self.pp.grid_displayed(state)
         self.pp.hide_env_settings()
-        assert not self.pp.env_settings_displayed()
-        assert self.pp.grid_displayed()
+        state = self.bp.probe_state()
+        assert not self.pp.env_settings_displayed(state)
+        assert self.pp.grid_displayed(state)
         self.pp.show_env_settings()
-        assert self.pp.env_settings_displayed()
-        assert not self.pp.grid_displayed()
+        state = self.bp.probe_state()
+        assert self.pp.env_settings_displayed(state)
+        assert not self.pp.grid_displayed(state)
 
     @pytest.mark.run(order=2)
+    @pytest.mark.command_budget(200)
     def test_toggle_pop_stats(self):
         """
         Tests toggling the Population Statistics window on and off.
@@ -0,0 +1,52 @@
+import pytest
+
+from tests.base_test import BaseTest
+
+
+class PopulationGridAggregatesTest(BaseTest):
+    """
+    Test class that checks that the grid statistics computed inside the page
+    agree with the ones calculated from the full grid data.
+    """
+
+    @pytest.mark.run(order=1)
+    @pytest.mark.usefixtures("hard_reset", "no_render")
+    def test_grid_aggregates_match_averages(self):
+        """
+        Tests that the in-page aggregates of a running experiment agree with
+        the averages calculated in Python and with the statistics panel.
+
+        :return: None.
+        """
+
+        # Run the experiment for a while, then pause it.
+        self.bp.add_ancestor_to_dish()
+        self.pp.run_from_pop()
+        assert self.pp.wait_until_update_reached(50, wait_time=60)
+        self.pp.pause_from_pop()
+        assert self.pp.wait_until_update_stable(cache_reads=True)
+
+        calculated_values = self.pp.calculate_pop_averages()
+        assert calculated_values[0] == self.pp.get_pop_current_viable()
+
+        # The in-page aggregates should agree with the values calculated above.
+        aggregates = self.pp.grid_aggregates(
+            stats=("count", "sum", "mean", "min", "max", "p50"))
+        assert aggregates["viable"] == calculated_values[0]
+        assert abs(aggregates["fitness"]["mean"] - calculated_values[1]) < 1e-6
+        assert abs(aggregates["gestation"]["mean"] - calculated_values[2]) < 1e-6
+        assert abs(aggregates["metabolism"]["mean"] - calculated_values[3]) < 1e-6
+
+        # The other statistics should be consistent with the mean.
+        fitness = aggregates["fitness"]
+        assert fitness["count"] == calculated_values[0]
+        assert fitness["min"] <= fitness["p50"] <= fitness["max"]
+        assert fitness["min"] <= fitness["mean"] <= fitness["max"]
+        assert abs(fitness["sum"] - fitness["mean"] * fitness["count"]) < 1e-6
+
+        # The dish and the graph should show the same population once the
+        # skipped draws have been replayed.
+        with self.pp.rendering_restored():
+            assert self.pp.grid_displayed()
+            assert self.pp.gr_get_pop_curr_num_orgs() == \
+                self.pp.get_pop_num_orgs()
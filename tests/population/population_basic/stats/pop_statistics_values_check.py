@@ -20,7 +20,7 @@ class PopulationStatsValueCheck(BaseTest):
         self.pp.run_from_pop()
         self.bp.util.sleep(10, "Waiting for experiment to run for a while.")
         self.pp.pause_from_pop()
-        self.bp.util.sleep(10, "Waiting for pause.")
+        assert self.pp.wait_until_update_stable()
         calculated_values = self.pp.calculate_pop_averages()
 
         assert calculated_values[0] == self.pp.get_pop_current_viable()
@@ -0,0 +1,23 @@
+"""
+Runs all benchmarks included in the tests folder.
+
+This script runs the benchmarks in tests/benchmark, which measure how fast
+Avida-ED runs rather than whether it behaves correctly. Results are written to
+output/benchmark.
+"""
+
+import pytest
+import sys
+
+if __name__ == '__main__':
+    benchmark_path = r"tests/benchmark"
+
+    pytest_args = ["-v",
+                   "--benchmark",
+                   "--junitxml=./output/junit_xml/benchmark_junit_xml.log",
+                   "--html=./output/html_report/benchmark_html_report.html",
+                   "--self-contained-html",
+                   benchmark_path]
+
+    pytest_args.extend(sys.argv)
+    pytest.main(pytest_args)
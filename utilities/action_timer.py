@@ -0,0 +1,261 @@
+import bisect
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+
+from utilities.custom_logger import create_custom_logger
+
+
+class ActionTimer:
+    """
+    Class that records how long page-object and DriverWrapper calls take and
+    how many WebDriver commands each of them issues.
+
+    Calls are aggregated by method (e.g. 'PopulationPage.show_env_settings')
+    both for the whole run and for each test. Durations are kept in a small
+    fixed-bucket histogram so that recording a call stays cheap.
+
+    Example Usage:
+    timer.start_test("tests/...::test_name")
+    ... run the test ...
+    timer.end_test()
+    timer.write_json("output/timings/timings.json")
+    """
+
+    log = create_custom_logger(logging.INFO)
+
+    # Upper bounds (in ms) of the histogram buckets. Anything slower goes into
+    # a final overflow bucket.
+    __bucket_bounds = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+                       10000, 30000, 60000)
+
+    def __init__(self):
+        """
+        Initializes an ActionTimer object.
+        """
+        self.enabled = True
+        self.command_count = 0
+        self.current_test = None
+        self.methods = {}
+        self.tests = {}
+        self.__test_start_time = None
+        self.__test_start_commands = 0
+
+    def instrument_driver(self, driver):
+        """
+        Wraps the command executor of a WebDriver so that every command it
+        sends to the browser is counted. Does nothing if the driver has already
+        been instrumented.
+
+        :param driver: The WebDriver to instrument.
+
+        :return: None.
+        """
+        executor = getattr(driver, "command_executor", None)
+        if executor is None or getattr(executor, "_aved_counted", False):
+            return
+
+        execute = executor.execute
+
+        @functools.wraps(execute)
+        def counting_execute(*args, **kwargs):
+            self.command_count += 1
+            return execute(*args, **kwargs)
+
+        executor.execute = counting_execute
+        executor._aved_counted = True
+        self.log.info("Counting WebDriver commands.")
+
+    def record(self, name, duration, commands):
+        """
+        Records a single call.
+
+        :param name: Qualified name of the method that was called.
+
+        :param duration: Time in seconds that the call took.
+
+        :param commands: Number of WebDriver commands the call issued.
+
+        :return: None.
+        """
+        self.__add(self.methods, name, duration, commands)
+        if self.current_test is not None:
+            test = self.tests[self.current_test]
+            self.__add(test["methods"], name, duration, commands)
+
+    def start_test(self, test_id):
+        """
+        Starts attributing calls to a test.
+
+        :param test_id: The id of the test (e.g. the pytest node id).
+
+        :return: None.
+        """
+        self.current_test = test_id
+        self.tests[test_id] = {"total_time": 0.0, "commands": 0,
+                               "methods": {}}
+        self.__test_start_time = time.perf_counter()
+        self.__test_start_commands = self.command_count
+
+    def end_test(self):
+        """
+        Stops attributing calls to the current test and records its totals.
+
+        :return: None.
+        """
+        if self.current_test is None:
+            return
+        test = self.tests[self.current_test]
+        test["total_time"] = time.perf_counter() - self.__test_start_time
+        test["commands"] = self.command_count - self.__test_start_commands
+        self.log.info("Test " + self.current_test + " took "
+                      + str(test["total_time"]) + " seconds and "
+                      + str(test["commands"]) + " WebDriver commands.")
+        self.current_test = None
+
+    def test_summary(self, test_id):
+        """
+        Gets the recorded timings of a single test.
+
+        :param test_id: The id of the test.
+
+        :return: Dict of the test's timings (see to_dict), or None if the test
+        has not been recorded.
+        """
+        test = self.tests.get(test_id)
+        if test is None:
+            return None
+        summary = {"commands": test["commands"],
+                   "total_time": test["total_time"],
+                   "methods": self.__summarize(test["methods"])}
+        if test_id == self.current_test:
+            summary["commands"] = \
+                self.command_count - self.__test_start_commands
+            summary["total_time"] = \
+                time.perf_counter() - self.__test_start_time
+        return summary
+
+    def to_dict(self):
+        """
+        Gets everything that has been recorded in a JSON-friendly form.
+
+        :return: Dict with the keys 'histogram_bounds_ms', 'methods' (timings
+        for each method across the whole run), and 'tests' (timings for each
+        test).
+        """
+        return {"histogram_bounds_ms": list(self.__bucket_bounds),
+                "commands": self.command_count,
+                "methods": self.__summarize(self.methods),
+                "tests": {test_id: self.test_summary(test_id)
+                          for test_id in self.tests}}
+
+    def write_json(self, file_path):
+        """
+        Writes everything that has been recorded to a JSON file.
+
+        :param file_path: Path of the file to write.
+
+        :return: None.
+        """
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(file_path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2, sort_keys=True)
+        self.log.info("Wrote action timings to " + file_path + ".")
+
+    ############################################################################
+    # Methods below this point shouldn't be called outside this class.
+    ############################################################################
+
+    def __add(self, entries, name, duration, commands):
+        """
+        Adds a call to an aggregate entry, creating the entry if needed.
+
+        :param entries: Dict of entries to add to.
+
+        :param name: Qualified name of the method that was called.
+
+        :param duration: Time in seconds that the call took.
+
+        :param commands: Number of WebDriver commands the call issued.
+
+        :return: None.
+        """
+        entry = entries.get(name)
+        if entry is None:
+            entry = entries[name] = [0, 0.0, 0.0, 0,
+                                     [0] * (len(self.__bucket_bounds) + 1)]
+        entry[0] += 1
+        entry[1] += duration
+        if duration > entry[2]:
+            entry[2] = duration
+        entry[3] += commands
+        entry[4][bisect.bisect_left(self.__bucket_bounds,
+                                    duration * 1000)] += 1
+
+    def __summarize(self, entries):
+        """
+        Converts aggregate entries into JSON-friendly dicts.
+
+        :param entries: Dict of entries to convert.
+
+        :return: Dict mapping each method name to its summary.
+        """
+        return {name: {"calls": calls,
+                       "total_time": total,
+                       "mean_time": total / calls,
+                       "max_time": longest,
+                       "commands": commands,
+                       "histogram": histogram}
+                for name, (calls, total, longest, commands, histogram)
+                in entries.items()}
+
+
+# Timer shared by every instrumented class.
+timer = ActionTimer()
+
+
+def timed(func):
+    """
+    Decorator that records the duration and WebDriver command count of every
+    call to func with the shared timer.
+
+    :param func: The function to wrap.
+
+    :return: The wrapped function.
+    """
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not timer.enabled:
+            return func(*args, **kwargs)
+        start_commands = timer.command_count
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timer.record(name, time.perf_counter() - start,
+                         timer.command_count - start_commands)
+
+    wrapper._aved_timed = True
+    return wrapper
+
+
+def instrument_class(cls):
+    """
+    Wraps every public method defined directly on a class with timed.
+
+    :param cls: The class to instrument.
+
+    :return: The class.
+    """
+    for name, value in list(vars(cls).items()):
+        if (not name.startswith("_") and inspect.isfunction(value)
+                and not getattr(value, "_aved_timed", False)):
+            setattr(cls, name, timed(value))
+    return cls
@@ -0,0 +1,145 @@
+import datetime
+import json
+import logging
+import math
+import os
+import platform
+
+from utilities.custom_logger import create_custom_logger
+
+# Two-sided critical values of Student's t distribution, indexed by degrees of
+# freedom (1-30) for each supported confidence level. Larger samples use the
+# normal approximation.
+_t_table = {
+    0.90: (6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833,
+           1.812, 1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734,
+           1.729, 1.725, 1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703,
+           1.701, 1.699, 1.697),
+    0.95: (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+           2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101,
+           2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052,
+           2.048, 2.045, 2.042),
+    0.99: (63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250,
+           3.169, 3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878,
+           2.861, 2.845, 2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771,
+           2.763, 2.756, 2.750)}
+_z_values = {0.90: 1.645, 0.95: 1.960, 0.99: 2.576}
+
+
+def summarize_samples(samples, confidence=0.95):
+    """
+    Computes the mean of a list of samples along with a confidence interval for
+    it based on Student's t distribution.
+
+    :param samples: List of numeric samples.
+
+    :param confidence: Confidence level of the interval (0.90, 0.95, or 0.99).
+
+    :return: Dict with the keys 'n', 'mean', 'stdev', 'ci_low', and 'ci_high'.
+    The interval is None if there are fewer than two samples.
+    """
+    n = len(samples)
+    if n == 0:
+        return {"n": 0, "mean": None, "stdev": None, "ci_low": None,
+                "ci_high": None}
+    mean = sum(samples) / n
+    if n < 2:
+        return {"n": n, "mean": mean, "stdev": None, "ci_low": None,
+                "ci_high": None}
+    stdev = math.sqrt(sum((x - mean) ** 2 for x in samples) / (n - 1))
+    df = n - 1
+    if df <= len(_t_table[confidence]):
+        critical = _t_table[confidence][df - 1]
+    else:
+        critical = _z_values[confidence]
+    half_width = critical * stdev / math.sqrt(n)
+    return {"n": n, "mean": mean, "stdev": stdev,
+            "ci_low": mean - half_width, "ci_high": mean + half_width}
+
+
+class BenchmarkResults:
+    """
+    Class that collects the results of a benchmark and writes them to a JSON
+    file so that runs on different builds can be compared.
+
+    Example Usage:
+    results = BenchmarkResults("update_throughput", {"window": 10})
+    results.add({"cols": 10, "rows": 10}, [52.1, 50.8, 51.5])
+    results.write_json()
+    """
+
+    log = create_custom_logger(logging.INFO)
+
+    def __init__(self, name, settings=None, confidence=0.95):
+        """
+        Initializes a BenchmarkResults object.
+
+        :param name: Name of the benchmark, used for the output file name.
+
+        :param settings: Optional dict of settings that apply to every
+        configuration (e.g. the measurement window).
+
+        :param confidence: Confidence level of the reported intervals.
+        """
+        self.name = name
+        self.settings = settings or {}
+        self.confidence = confidence
+        self.results = []
+        self.started = datetime.datetime.now()
+
+    def add(self, config, samples, extra=None):
+        """
+        Records the samples measured for one configuration.
+
+        :param config: Dict describing the configuration.
+
+        :param samples: List of measured values.
+
+        :param extra: Optional dict of other values to store with the result.
+
+        :return: Dict summarizing the samples (see summarize_samples).
+        """
+        summary = summarize_samples(samples, self.confidence)
+        result = {"config": config, "samples": samples, "summary": summary}
+        if extra:
+            result.update(extra)
+        self.results.append(result)
+        self.log.info("Benchmark " + self.name + " " + str(config) + ": "
+                      + str(summary))
+        return summary
+
+    def to_dict(self):
+        """
+        Gets the benchmark results in a JSON-friendly form.
+
+        :return: Dict of the results along with information about the run.
+        """
+        return {"benchmark": self.name,
+                "started": self.started.isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "confidence": self.confidence,
+                "settings": self.settings,
+                "results": self.results}
+
+    def write_json(self, directory="output/benchmark"):
+        """
+        Writes the benchmark results to a JSON file named after the benchmark
+        and the time it started. Writing again overwrites the same file, so
+        partial results can be saved as the benchmark progresses.
+
+        :param directory: Directory to write the file to.
+
+        :return: Path of the file that was written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        file_name = (self.name + "_"
+                     + self.started.strftime("%Y_%b_%d_%H_%M_%S"))
+        worker_id = os.environ.get("PYTEST_XDIST_WORKER")
+        if worker_id is not None:
+            file_name += "_" + worker_id
+        file_path = os.path.join(directory, file_name + ".json")
+        with open(file_path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2, sort_keys=True)
+        self.log.info("Wrote benchmark results to " + file_path + ".")
+        return file_path
@@ -4,6 +4,42 @@ import datetime
 import os
 
 
+class _WorkerFileHandler(logging.FileHandler):
+    """
+    File handler that only chooses the file its log goes to when the first
+    record is written. Loggers are created when their modules are imported,
+    which can be before the pytest-xdist worker id is known, so the worker's
+    folder can't be chosen when the handler is created.
+    """
+
+    def __init__(self, log_path, log_name, mode='w'):
+        """
+        Creates the handler without opening its file.
+
+        :param log_path: Folder of the log, which the worker's own folder
+        (if any) is added to.
+
+        :param log_name: File name of the log.
+
+        :param mode: Mode the file is opened in.
+        """
+        self.log_path = log_path
+        self.log_name = log_name
+        super().__init__(log_path + log_name, mode=mode, delay=True)
+
+    def _open(self):
+        # Each pytest-xdist worker writes to its own log.
+        log_path = self.log_path
+        worker_id = os.environ.get("PYTEST_XDIST_WORKER")
+        if worker_id is not None:
+            log_path += worker_id + "/"
+
+        # Create the directory for the log if it doesn't exist.
+        os.makedirs(log_path, exist_ok=True)
+        self.baseFilename = os.path.abspath(log_path + self.log_name)
+        return super()._open()
+
+
 def create_custom_logger(log_level=logging.DEBUG):
     """
     Creates a custom logger to provide a log of activities performed by our
@@ -23,12 +59,10 @@ def create_custom_logger(log_level=logging.DEBUG):
     logger = logging.getLogger(logger_name)
     logger.setLevel(logging.DEBUG)
 
-    # Create the directory for the log if it doesn't exist.
-    os.makedirs(log_path, exist_ok=True)
-
     # Create log file, overwriting any previous log files in that location.
-    file_handler = logging.FileHandler(log_path + log_name,
-                                       mode='w')
+    # The file is only created (in the worker's folder, if any) once the
+    # first record is written.
+    file_handler = _WorkerFileHandler(log_path, log_name, mode='w')
     file_handler.setLevel(log_level)
 
     formatter = logging.Formatter(
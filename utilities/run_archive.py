@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+from utilities.custom_logger import create_custom_logger
+
+# Fields of a PopStatsSnapshot (see PopulationPage.snapshot_pop_stats) that
+# are archived by default. 'update' must come first; range queries use it.
+DEFAULT_FIELDS = ("update", "organisms", "ave_fitness", "ave_gestation_time",
+                  "ave_metabolic_rate", "num_not", "num_nan", "num_and",
+                  "num_orn", "num_oro", "num_ant", "num_nor", "num_xor",
+                  "num_equ")
+
+
+class RunArchive:
+    """
+    Class that stores the per-update population statistics of a run on disk.
+
+    Each field is a column of float64 values in its own memory-mapped file,
+    which is preallocated and doubled in size when it fills up, so memory use
+    stays flat no matter how long the run is. A small JSON index records the
+    fields and how many rows have been written. Opening a directory that
+    already holds an archive reloads it without reading the columns into
+    memory.
+
+    Example Usage:
+    with RunArchive("output/archive/soak_run") as archive:
+        archive.extend(pp.drain_updates().stats)
+        late = archive.read(start_update=10000)
+        overview = archive.read_downsampled(500)
+    """
+
+    log = create_custom_logger(logging.INFO)
+
+    __index_name = "index.json"
+    __dtype = np.float64
+
+    def __init__(self, directory, fields=DEFAULT_FIELDS, capacity=4096,
+                 flush_interval=1000):
+        """
+        Opens the archive in a directory, creating it if needed.
+
+        :param directory: Directory holding the archive's files.
+
+        :param fields: Names of the fields to store. Ignored if the archive
+        already exists. The first field must be 'update'.
+
+        :param capacity: Number of rows to preallocate for a new archive.
+
+        :param flush_interval: Number of appended rows after which the columns
+        and index are flushed to disk.
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.__columns = {}
+        self.__unflushed = 0
+
+        index_path = os.path.join(directory, self.__index_name)
+        if os.path.exists(index_path):
+            with open(index_path) as file:
+                index = json.load(file)
+            self.fields = tuple(index["fields"])
+            self.length = index["length"]
+            self.capacity = index["capacity"]
+            self.log.info("Opened run archive in " + directory + " with "
+                          + str(self.length) + " rows.")
+        else:
+            if fields[0] != "update":
+                raise ValueError("The first field of a run archive must be "
+                                 "'update'.")
+            os.makedirs(directory, exist_ok=True)
+            self.fields = tuple(fields)
+            self.length = 0
+            self.capacity = capacity
+            for field in self.fields:
+                with open(self.__column_path(field), "wb") as file:
+                    file.truncate(self.capacity
+                                  * np.dtype(self.__dtype).itemsize)
+            self.__write_index()
+            self.log.info("Created run archive in " + directory + ".")
+        self.__map_columns()
+
+    def __len__(self):
+        return self.length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, record):
+        """
+        Appends the values of a single update.
+
+        :param record: A PopStatsSnapshot (or any object with an attribute for
+        each field) or a dict mapping each field to its value. Missing or None
+        values are stored as NaN.
+
+        :return: None.
+        """
+        if self.length == self.capacity:
+            self.__grow(self.capacity * 2)
+        get = record.get if isinstance(record, dict) \
+            else lambda field: getattr(record, field, None)
+        for field in self.fields:
+            value = get(field)
+            self.__columns[field][self.length] = \
+                np.nan if value is None else value
+        self.length += 1
+        self.__unflushed += 1
+        if self.__unflushed >= self.flush_interval:
+            self.flush()
+
+    def extend(self, records):
+        """
+        Appends the values of several updates, e.g. the stats of an UpdateBatch.
+
+        :param records: Iterable of records accepted by append.
+
+        :return: None.
+        """
+        for record in records:
+            self.append(record)
+
+    def read(self, start_update=None, stop_update=None, fields=None):
+        """
+        Reads the rows whose update lies in a range. Updates are assumed to be
+        appended in increasing order.
+
+        :param start_update: First update to include, or None to start at the
+        beginning of the run.
+
+        :param stop_update: Update to stop before, or None to read to the end
+        of the run.
+
+        :param fields: Names of the fields to read, or None for all of them.
+
+        :return: Dict mapping each field to a NumPy array of its values.
+        """
+        start, stop = self.__row_range(start_update, stop_update)
+        return {field: np.array(self.__columns[field][start:stop])
+                for field in (fields or self.fields)}
+
+    def read_downsampled(self, max_points, start_update=None,
+                         stop_update=None, fields=None):
+        """
+        Reads the rows whose update lies in a range, averaged into at most
+        max_points evenly sized bins so that long runs can be plotted or
+        compared cheaply. The update of each bin is the first update in it.
+
+        :param max_points: Maximum number of rows to return.
+
+        :param start_update: First update to include, or None to start at the
+        beginning of the run.
+
+        :param stop_update: Update to stop before, or None to read to the end
+        of the run.
+
+        :param fields: Names of the fields to read, or None for all of them.
+
+        :return: Dict mapping each field to a NumPy array of its values.
+        """
+        start, stop = self.__row_range(start_update, stop_update)
+        count = stop - start
+        if count <= max_points:
+            return self.read(start_update, stop_update, fields)
+
+        edges = np.linspace(0, count, max_points + 1).astype(np.int64)
+        bin_starts = edges[:-1]
+        bin_sizes = np.diff(edges)
+        results = {}
+        for field in (fields or self.fields):
+            values = self.__columns[field][start:stop]
+            if field == "update":
+                results[field] = np.array(values[bin_starts])
+            else:
+                results[field] = \
+                    np.add.reduceat(values, bin_starts) / bin_sizes
+        return results
+
+    def flush(self):
+        """
+        Writes all appended rows and the index to disk.
+
+        :return: None.
+        """
+        for column in self.__columns.values():
+            column.flush()
+        self.__write_index()
+        self.__unflushed = 0
+
+    def close(self):
+        """
+        Flushes the archive and releases its memory maps.
+
+        :return: None.
+        """
+        if not self.__columns:
+            return
+        self.flush()
+        self.__columns = {}
+        self.log.info("Closed run archive in " + self.directory + " with "
+                      + str(self.length) + " rows.")
+
+    ############################################################################
+    # Methods below this point shouldn't be called outside this class.
+    ############################################################################
+
+    def __column_path(self, field):
+        """
+        Gets the path of the file holding a field's values.
+
+        :param field: Name of the field.
+
+        :return: Path of the file.
+        """
+        return os.path.join(self.directory, field + ".f8")
+
+    def __map_columns(self):
+        """
+        Memory-maps every column file at the current capacity.
+
+        :return: None.
+        """
+        self.__columns = {field: np.memmap(self.__column_path(field),
+                                           dtype=self.__dtype, mode="r+",
+                                           shape=(self.capacity,))
+                          for field in self.fields}
+
+    def __grow(self, capacity):
+        """
+        Enlarges every column file and remaps it.
+
+        :param capacity: New number of rows that can be stored.
+
+        :return: None.
+        """
+        self.flush()
+        self.__columns = {}
+        for field in self.fields:
+            with open(self.__column_path(field), "r+b") as file:
+                file.truncate(capacity * np.dtype(self.__dtype).itemsize)
+        self.capacity = capacity
+        self.__write_index()
+        self.__map_columns()
+        self.log.info("Grew run archive in " + self.directory + " to "
+                      + str(capacity) + " rows.")
+
+    def __row_range(self, start_update, stop_update):
+        """
+        Converts a range of updates into a range of rows.
+
+        :param start_update: First update to include, or None.
+
+        :param stop_update: Update to stop before, or None.
+
+        :return: Tuple of the first row and the row to stop before.
+        """
+        updates = self.__columns["update"][:self.length]
+        start = 0 if start_update is None \
+            else int(np.searchsorted(updates, start_update, side="left"))
+        stop = self.length if stop_update is None \
+            else int(np.searchsorted(updates, stop_update, side="left"))
+        return start, max(start, stop)
+
+    def __write_index(self):
+        """
+        Writes the index file, replacing the old one only once the new one is
+        complete so that a crash never leaves a broken index.
+
+        :return: None.
+        """
+        index_path = os.path.join(self.directory, self.__index_name)
+        temp_path = index_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"fields": list(self.fields), "dtype": "float64",
+                       "length": self.length, "capacity": self.capacity},
+                      file)
+        os.replace(temp_path, index_path)
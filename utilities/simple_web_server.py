@@ -1,22 +1,283 @@
 import threading
 import os
+import gzip
+import hashlib
+import mimetypes
 
-from http.server import SimpleHTTPRequestHandler, HTTPServer
+from collections import namedtuple
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, \
+    HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import unquote, urlsplit
 
 from base.config import Configuration
 
+# A file held in memory by the cached server, along with its precomputed gzip
+# body (None if not worth compressing) and validation headers.
+CachedAsset = namedtuple("CachedAsset", ["body", "gzip_body", "etag",
+                                         "last_modified", "content_type"])
+
+
+class UIRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Request handler that serves files relative to the root path of the server
+    it belongs to rather than the current working directory, so that serving
+    the Avida-ED UI does not require changing the directory of the whole
+    process.
+    """
+
+    def translate_path(self, path):
+        """
+        Translates a URL path into a path within the server's root directory.
+
+        :param path: The path requested in the URL.
+
+        :return: The path of the file on the local filesystem.
+        """
+        cwd_path = super().translate_path(path)
+        relative_path = os.path.relpath(cwd_path, os.getcwd())
+        return os.path.join(self.server.root_path, relative_path)
+
+
+class ThreadingUIServer(ThreadingMixIn, HTTPServer):
+    """
+    HTTP server that handles each connection in its own thread, so that the
+    browser can load several assets at once.
+    """
+    daemon_threads = True
+
+
+class CachedUIRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler that serves the Avida-ED UI from the in-memory cache of
+    the server it belongs to. Connections are kept alive (HTTP/1.1), bodies are
+    sent gzipped when the browser accepts it, and conditional requests are
+    answered with 304 Not Modified.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """
+        Serves a GET request.
+
+        :return: None.
+        """
+        self.__serve(send_body=True)
+
+    def do_HEAD(self):
+        """
+        Serves a HEAD request.
+
+        :return: None.
+        """
+        self.__serve(send_body=False)
+
+    def log_message(self, format, *args):
+        """
+        Silences the per-request log that BaseHTTPRequestHandler writes to
+        stderr.
+
+        :return: None.
+        """
+        pass
+
+    def __serve(self, send_body):
+        """
+        Sends the cached asset for the requested path (or a 404).
+
+        :param send_body: False if only the headers should be sent.
+
+        :return: None.
+        """
+        asset = self.server.get_asset(urlsplit(self.path).path)
+        if asset is None:
+            body = b"Not Found"
+            self.send_response(404)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+            return
+
+        if (self.headers.get("If-None-Match") == asset.etag
+                or (self.headers.get("If-None-Match") is None
+                    and self.headers.get("If-Modified-Since")
+                    == asset.last_modified)):
+            self.send_response(304)
+            self.send_header("ETag", asset.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = asset.body
+        use_gzip = (asset.gzip_body is not None
+                    and "gzip" in self.headers.get("Accept-Encoding", ""))
+        if use_gzip:
+            body = asset.gzip_body
+
+        self.send_response(200)
+        self.send_header("Content-Type", asset.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", asset.etag)
+        self.send_header("Last-Modified", asset.last_modified)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+class CachedUIServer(ThreadingUIServer):
+    """
+    Threaded HTTP server that preloads the Avida-ED UI files into memory so
+    that page loads (e.g. on every hard reset) never touch the disk.
+    """
+
+    # Files smaller than this (in bytes) are not worth compressing.
+    __min_gzip_size = 1024
+
+    # Content types that are worth compressing.
+    __compressible_types = ("text/", "application/javascript",
+                            "application/json", "application/xml",
+                            "application/wasm", "image/svg+xml")
+
+    # Content types that mimetypes may not know about.
+    __extra_types = {".wasm": "application/wasm",
+                     ".mem": "application/octet-stream",
+                     ".json": "application/json",
+                     ".js": "application/javascript"}
+
+    def __init__(self, server_address, root_path, preload_dirs=()):
+        """
+        Initializes a CachedUIServer object.
+
+        :param server_address: Tuple of the host and port to listen on.
+
+        :param root_path: The directory that URL paths are relative to.
+
+        :param preload_dirs: Directories (relative to root_path) whose files
+        are loaded into the cache up front. Other files are cached the first
+        time they are requested.
+        """
+        super().__init__(server_address, CachedUIRequestHandler)
+        self.root_path = os.path.abspath(root_path)
+        self.cache = {}
+        self.cache_lock = threading.Lock()
+        for directory in preload_dirs:
+            self.__preload(os.path.join(self.root_path, directory))
+
+    def get_asset(self, url_path):
+        """
+        Gets the cached asset for a URL path, loading it from disk if it has
+        not been cached yet.
+
+        :param url_path: The path part of the requested URL.
+
+        :return: The CachedAsset, or None if there is no such file.
+        """
+        url_path = unquote(url_path)
+        if url_path.endswith("/"):
+            url_path += "index.html"
+        asset = self.cache.get(url_path)
+        if asset is None:
+            file_path = os.path.abspath(
+                os.path.join(self.root_path, url_path.lstrip("/")))
+            if (not file_path.startswith(self.root_path + os.sep)
+                    or not os.path.isfile(file_path)):
+                return None
+            asset = self.__load(file_path)
+            with self.cache_lock:
+                self.cache[url_path] = asset
+        return asset
+
+    def __preload(self, directory):
+        """
+        Loads every file in a directory (recursively) into the cache.
+
+        :param directory: The directory to load.
+
+        :return: None.
+        """
+        for dir_path, _, file_names in os.walk(directory):
+            for file_name in file_names:
+                file_path = os.path.join(dir_path, file_name)
+                url_path = "/" + os.path.relpath(file_path, self.root_path) \
+                    .replace(os.sep, "/")
+                self.cache[url_path] = self.__load(file_path)
+
+    def __load(self, file_path):
+        """
+        Reads a file and precomputes everything needed to serve it.
+
+        :param file_path: The path of the file on the local filesystem.
+
+        :return: A CachedAsset for the file.
+        """
+        with open(file_path, "rb") as file:
+            body = file.read()
+
+        extension = os.path.splitext(file_path)[1].lower()
+        content_type = self.__extra_types.get(extension)
+        if content_type is None:
+            content_type = (mimetypes.guess_type(file_path)[0]
+                            or "application/octet-stream")
+
+        gzip_body = None
+        if (len(body) >= self.__min_gzip_size
+                and content_type.startswith(self.__compressible_types)):
+            gzip_body = gzip.compress(body)
+            if len(gzip_body) >= len(body):
+                gzip_body = None
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        last_modified = formatdate(os.path.getmtime(file_path), usegmt=True)
+        return CachedAsset(body, gzip_body, etag, last_modified, content_type)
+
 
 class CustomWebServer:
 
-    def __init__(self):
+    # Path (relative to the UI path) of the Avida-ED page.
+    __app_path = "/av_ui/AvidaED.html"
+
+    # Directory (relative to the UI path) that the cached server preloads.
+    __app_dir = "av_ui"
+
+    def __init__(self, port=0, mode="cached"):
         """
         Initializes a CustomWebServer object.
+
+        :param port: The port that the server should listen on. The default of
+        0 picks a free ephemeral port, so that several servers (e.g. one per
+        pytest-xdist worker) can run at the same time.
+
+        :param mode: 'cached' for a threaded, keep-alive server that serves the
+        UI from memory with precomputed gzip bodies, or 'simple' for a
+        single-threaded server that reads every file from disk.
         """
         self.config = Configuration()
-        self.test_path = os.getcwd()
         self.ui_path = self.config.get_ui_path()
-        self.server_address = ('127.0.0.1', 8000)
-        self.httpd = HTTPServer(self.server_address, SimpleHTTPRequestHandler)
+        self.mode = mode
+        if mode == "simple":
+            self.httpd = HTTPServer(('127.0.0.1', port), UIRequestHandler)
+            self.httpd.root_path = self.ui_path
+        else:
+            self.httpd = CachedUIServer(('127.0.0.1', port), self.ui_path,
+                                        preload_dirs=[self.__app_dir])
+        self.server_address = self.httpd.server_address
+        self.running = False
+
+    def get_base_url(self):
+        """
+        Gets the URL of the Avida-ED app served by this server.
+
+        :return: String containing the URL.
+        """
+        return "http://" + self.server_address[0] + ":" \
+               + str(self.server_address[1]) + self.__app_path
 
     def run_http_server(self):
         """
@@ -24,14 +285,16 @@ class CustomWebServer:
 
         :return: None.
         """
-        os.chdir(self.ui_path)
         threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.running = True
 
     def cleanup(self):
         """
-        Cleans up after the server by changing back to the correct directory.
+        Cleans up after the server by shutting it down.
 
         :return: None.
         """
-        os.chdir(self.test_path)
+        if self.running:
+            self.httpd.shutdown()
+            self.running = False
         self.httpd.server_close()